@@ -27,7 +27,6 @@ import os
 import pathlib
 import statistics
 import subprocess
-from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Union
 
@@ -45,14 +44,86 @@ import requests
 from box import Box
 from github import Auth, Github, Repository
 
+from utils.chart_render import render_figures
+from utils.contributor_index import ContributorIndex
+from utils.dependency_matrix import DependencyMatrix
+from utils.http_cache import SQLiteResponseCache, install_pygithub_cache
+from utils.http_cassette import CassetteAdapter
+from utils.landscape import iter_github_metrics, iter_github_metrics_graphql
+from utils.landscape_analysis import (
+    build_landscape_array,
+    dependency_occurrence_counts,
+    landscape_dataframe,
+    sbom_dependency_table,
+    top_dependencies,
+)
+from utils.landscape_manifest import LandscapeManifest, refresh_landscape_records
+from utils.landscape_store import LandscapeParquetWriter, read_landscape_table
+from utils.rate_limit import RateLimitedAdapter, RateLimitScheduler
+from utils.readme_store import ReadmeStore
+
 # set predefined path for data
 data_dir = "../data"
 
+# set the number of repositories to gather data for at once
+max_workers = 8
+
+# set how to gather repository data from github:
+# "graphql" fetches a page of 100 repositories per request (using rest only
+# for sbom and contributor data) and "rest" fetches each field per repository
+collection_mode = "graphql"
+
+# set the github api location (may be set to a local stub server for testing)
+github_api_url = os.environ.get(
+    "LANDSCAPE_ANALYSIS_GH_API_URL", "https://api.github.com"
+)
+
+# pace github requests based on the rate limit headers github returns
+github_scheduler = RateLimitScheduler()
+
+# optionally record github traffic to (or replay it from) a local cassette
+# so the crawl may be re-run offline, set through
+# LANDSCAPE_ANALYSIS_GH_CASSETTE and LANDSCAPE_ANALYSIS_GH_CASSETTE_MODE
+# ("record" or "replay")
+github_adapter = RateLimitedAdapter(github_scheduler, pool_maxsize=max_workers)
+if os.environ.get("LANDSCAPE_ANALYSIS_GH_CASSETTE"):
+    github_adapter = CassetteAdapter(
+        path=os.environ["LANDSCAPE_ANALYSIS_GH_CASSETTE"],
+        mode=os.environ.get("LANDSCAPE_ANALYSIS_GH_CASSETTE_MODE", "replay"),
+        adapter=github_adapter,
+    )
+
+# route github requests through a shared on-disk response cache
+# which revalidates stale responses (without using rate limit quota)
+github_cache = SQLiteResponseCache()
+github_session = install_pygithub_cache(github_cache, adapter=github_adapter)
+
+# authorize the shared session for graphql requests made outside of pygithub
+github_session.headers.update(
+    {"Authorization": f"Bearer {os.environ.get('LANDSCAPE_ANALYSIS_GH_TOKEN')}"}
+)
+
+# store each owner's type (org or user) and repo manifest (ids, push and
+# update dates and default branch shas) to refresh only changed repos
+landscape_manifest = LandscapeManifest()
+
+# store readmes by blob sha (downloading only new readmes) and index
+# repo text for keyword searches
+readme_store = ReadmeStore()
+
 # set github authorization and client
+# (pygithub request spacing is disabled in favor of the scheduler)
 github_client = Github(
-    auth=Auth.Token(os.environ.get("LANDSCAPE_ANALYSIS_GH_TOKEN")), per_page=100
+    auth=Auth.Token(os.environ.get("LANDSCAPE_ANALYSIS_GH_TOKEN")),
+    base_url=github_api_url,
+    per_page=100,
+    pool_size=max_workers,
+    seconds_between_requests=None,
 )
 
+# collect figures by image path to render once the analysis has run
+chart_figures = {}
+
 # set plotly default theme
 pio.templates.default = "simple_white"
 
@@ -79,166 +150,75 @@ len(dbmi_set_github_usernames)
 
 
 # %%
-def get_github_org_or_user(
-    name: str,
-) -> Union[github.NamedUser.NamedUser, github.Organization.Organization]:
-    """
-    Convenience function to gather pygithub orgs or users similarly
-    using only a name as a reference point to simplify data gathering.
-    """
-
-    try:
-        # attempt to find github org
-        return github_client.get_organization(name)
-    except github.UnknownObjectException:
-        # if we failed to find the org, try as a user instead
-        return github_client.get_user(name)
-
-
-def safe_get_readme(repo: github.Repository.Repository) -> Optional[str]:
-    """
-    Safely retrieve GitHub repo readme data as a string,
-    returning a None where no readme is found.
-    """
-
-    try:
-        return repo.get_readme().decoded_content
-    except github.UnknownObjectException:
-        return None
-
-
-def safe_detect_license(repo: github.Repository.Repository) -> Optional[str]:
-    """
-    Safely retrieve detect the license type ID,
-    returning a None where no readme is found
-    """
-
-    try:
-        return repo.get_license().license.spdx_id
-    except:
-        return None
-
-
-def get_github_repo_sbom(full_name: str) -> Optional[Dict[str, str]]:
-    """
-    Gathers GitHub Software Bill of Materials (SBOM) data
-    given a full_name (org/repo_name).
-
-    See here for more information:
-    https://docs.github.com/en/rest/dependency-graph/sboms
-    """
-
-    try:
-        response = requests.get(
-            f"https://api.github.com/repos/{full_name}/dependency-graph/sbom",
-            headers={
-                "Accept": "application/vnd.github+json",
-                "Authorization": f"Bearer {os.environ.get('LANDSCAPE_ANALYSIS_GH_TOKEN')}",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
-            timeout=10,
+# gather targeted data from GitHub for new or changed repos (reusing stored
+# records for the rest), running per-repo requests concurrently and streaming
+# records into parquet files partitioned by owner (removing partitions for
+# owners no longer listed in github-orgs.yaml)
+def gather_repo_records(owner, owner_type, full_names):
+    if collection_mode == "graphql":
+        return iter_github_metrics_graphql(
+            org_names=[owner],
+            token=os.environ.get("LANDSCAPE_ANALYSIS_GH_TOKEN"),
+            max_workers=max_workers,
+            api_url=github_api_url,
+            cache=github_cache,
+            scheduler=github_scheduler,
+            readme_store=readme_store,
+            adapter=github_adapter,
+            only_repos=full_names,
         )
-        response.raise_for_status()  # Raise an exception for HTTP errors
-
-        # return the result json
-        return response.json()
+    return iter_github_metrics(
+        github_client=github_client,
+        org_names=[owner],
+        max_workers=max_workers,
+        api_url=github_api_url,
+        session=github_session,
+        readme_store=readme_store,
+        owner_types={owner: owner_type},
+        only_repos=full_names,
+    )
 
-    except requests.exceptions.RequestException as err:
-        return None
 
+github_metrics_records = refresh_landscape_records(
+    org_names=org_names,
+    session=github_session,
+    gather=gather_repo_records,
+    manifest=landscape_manifest,
+    api_url=github_api_url,
+)
+landscape_writer = LandscapeParquetWriter()
+landscape_writer.write_all(github_metrics_records)
+landscape_writer.prune_owners(org_names)
 
 # %%
-# gather targeted data from GitHub
-github_metrics = [
-    {
-        "GitHub Org Name": org_name,
-        "Repo Name": repo.name,
-        "GitHub Repo Full Name": repo.full_name,
-        "GitHub Repository ID": repo.id,
-        "Repository Size (KB)": repo.size,
-        "GitHub Repo Archived": repo.archived,
-        "GitHub Repo Created Month": repo.created_at.strftime("%Y-%m-%d"),
-        "GitHub Stars": repo.stargazers_count,
-        "GitHub Network Count": repo.network_count,
-        "GitHub Forks": repo.forks_count,
-        "GitHub Subscribers": repo.subscribers_count,
-        "GitHub Open Issues": repo.get_issues(state="open").totalCount,
-        "GitHub Contributors Count": repo.get_contributors().totalCount,
-        "GitHub Contributor Members": [
-            {
-                "id": contributor.id,
-                "name": contributor.name,
-                "login": contributor.login,
-            }
-            for contributor in repo.get_contributors()
-        ],
-        "GitHub License Type": safe_detect_license(repo),
-        "GitHub Topics": repo.topics,
-        "GitHub Description": repo.description,
-        "GitHub Readme": safe_get_readme(repo),
-        "GitHub Detected Languages": repo.get_languages(),
-        "GitHub Repo SBOM": get_github_repo_sbom(repo.full_name),
-    }
-    # make a request for github org data with pygithub
-    for org_name, repo in [
-        (
-            org_name,
-            repo,
-        )
-        for org_name in org_names
-        for repo in get_github_org_or_user(org_name).get_repos()
-    ]
-]
-ak.Array(github_metrics)
+# build the columnar landscape table once, including each repo's primary
+# language and total lines of detected code, along with the repo by
+# language matrix of detected bytes (reused for language analytics)
+landscape, language_matrix = build_landscape_array(read_landscape_table())
+landscape
 
 # %%
-df_github_metrics = pd.DataFrame(github_metrics)
-df_github_metrics.info()
-
+# search repo readmes, descriptions and topics by keyword
+readme_store.search("single cell OR microscopy")
 
 # %%
-# Function to find the top language for each row
-def find_top_language(languages):
-    """
-    Finds top language given a dictionary of GitHub-detected languages.
-    """
-    if isinstance(languages, dict):
-        non_empty_languages = {
-            key: value for key, value in languages.items() if value is not None
-        }
-        if non_empty_languages:
-            return max(non_empty_languages, key=non_empty_languages.get)
-    return None
-
-
-# gather the number of lines of code
-df_github_metrics["Total lines of GitHub detected code"] = (
-    df_github_metrics["GitHub Detected Languages"]
-    .dropna()
-    .apply(lambda x: sum(value if value is not None else 0 for value in x.values()))
-)
+# show github response cache and request scheduling statistics
+github_cache.stats, github_scheduler.stats
 
-# Apply the function to the "GitHub Detected Languages" column and create a new column "Primary programming language"
-df_github_metrics["Primary language"] = df_github_metrics[
-    "GitHub Detected Languages"
-].apply(find_top_language)
+# %%
+df_github_metrics = landscape_dataframe(landscape)
 df_github_metrics.info()
 
 # %%
-# prep for creating an hbar chart for primary languages
-grouped_data = (
-    df_github_metrics.groupby(["Primary language"]).size().reset_index(name="Count")
-)
+# index repos by contributor login for membership and overlap queries
+contributor_index = ContributorIndex(landscape)
 
-# Group by "Primary programming language" and calculate the sum of counts for each programming language
-programming_language_counts = (
-    grouped_data.groupby("Primary language")["Count"].sum().reset_index()
-)
+# show repos which depend on the fewest contributors
+contributor_index.bus_factor().head(20)
 
-# Sort programming languages by the sum of counts in descending order
-programming_language_counts = programming_language_counts.sort_values(
-    by="Count", ascending=False
-)
+# %%
+# count repos by primary language (sorted by count in descending order)
+programming_language_counts = language_matrix.primary_language_counts()
 programming_language_counts
 
 # %%
@@ -269,34 +249,22 @@ fig_languages.update_layout(
     ),
 )
 
-fig_languages.write_image("images/software-landscape-primary-language-counts.png")
+chart_figures["images/software-landscape-primary-language-counts.png"] = fig_languages
 fig_languages.show()
 
 # %%
 # gather total lines of code for all repos by language
-total_language_line_counts = [
-    {
-        "language": language,
-        "line_count": ak.sum(
-            ak.Array(github_metrics)["GitHub Detected Languages"][language]
-        ),
-    }
-    for language in ak.Array(github_metrics)["GitHub Detected Languages"].fields
-]
-
-df_total_language_line_counts = pd.DataFrame.from_records(
-    total_language_line_counts
-).sort_values(by="line_count")
+df_total_language_line_counts = language_matrix.line_counts()
 
 df_total_language_line_counts
 
 # %%
-# Create a horizontal bar chart for language line count totals
-
-df_total_language_line_counts = df_total_language_line_counts.sort_values(
-    by="line_count"
-)
+# show the share of each org's (or user's) code by language
+language_matrix.owner_language_share()
 
+# %%
+# Create a horizontal bar chart for language line count totals
+# (line counts are sorted in ascending order)
 fig_languages = px.bar(
     data_frame=df_total_language_line_counts,
     title=f"Repository Language Line Counts Total",
@@ -325,14 +293,12 @@ fig_languages.update_layout(
     ),
 )
 
-fig_languages.write_image("images/software-landscape-language-line-counts-total.png")
+chart_figures[
+    "images/software-landscape-language-line-counts-total.png"
+] = fig_languages
 fig_languages.show()
 
 # %%
-df_total_language_line_counts["line_count_log"] = np.log(
-    df_total_language_line_counts["line_count"]
-)
-
 # Create a horizontal bar chart for language line count totals
 fig_languages = px.bar(
     data_frame=df_total_language_line_counts.sort_values(by="line_count_log"),
@@ -362,24 +328,29 @@ fig_languages.update_layout(
     ),
 )
 
-fig_languages.write_image(
+chart_figures[
     "images/software-landscape-language-line-counts-total-log.png"
-)
+] = fig_languages
 fig_languages.show()
 
 # %%
-# value count the SBOM dependencies in total
-flat_array = ak.flatten(
-    ak.Array(github_metrics)["GitHub Repo SBOM"]["sbom"]["packages"]["name"]
-)
-flat_list = ak.to_list(flat_array)
-counts = Counter(flat_list)
-df_dependency_counts = pd.DataFrame(
-    list(counts.items()), columns=["Dependency", "Occurrence Count"]
-)
-df_dependency_counts_top = df_dependency_counts.sort_values(
-    by="Occurrence Count", ascending=False
-).head(100)
+# explode the SBOM packages into one row per repo dependency
+# (with purl-normalized dependency names)
+df_dependencies = sbom_dependency_table(landscape)
+
+# find repos with set member contributors
+set_contrib_mask = contributor_index.repo_mask(dbmi_set_github_usernames.to_list())
+
+# value count the SBOM dependencies for all and set member repos
+# by primary language in one group-by
+df_dependency_occurrences = dependency_occurrence_counts(
+    df_dependencies,
+    subsets={
+        "all": np.ones(len(landscape), dtype=bool),
+        "set-only": set_contrib_mask,
+    },
+)
+df_dependency_counts_top = top_dependencies(df_dependency_occurrences, subset="all")
 df_dependency_counts_top
 
 # %%
@@ -403,42 +374,20 @@ fig_dependencies.update_layout(
     ),
 )
 
-fig_dependencies.write_image("images/software-landscape-dependency-counts-total.png")
+chart_figures[
+    "images/software-landscape-dependency-counts-total.png"
+] = fig_dependencies
 fig_dependencies.show()
 
 # %%
 programming_language_counts.head(15)
 
 # %%
-# add the top language per repo
-github_metrics = [
-    dict(
-        repo,
-        **{
-            "Primary Programming Language": find_top_language(
-                repo["GitHub Detected Languages"]
-            )
-        }
-    )
-    for repo in github_metrics
-]
-ak.Array(github_metrics)
-
-# %%
-aarr = ak.Array(github_metrics)
 for programming_lang in programming_language_counts.head(15)["Primary language"]:
-    masked = aarr.mask[aarr["Primary Programming Language"] == programming_lang]
-
-    # value count the SBOM dependencies in total
-    flat_array = ak.flatten(masked["GitHub Repo SBOM"]["sbom"]["packages"]["name"])
-    flat_list = ak.to_list(flat_array)
-    counts = Counter(flat_list)
-    df_dependency_counts = pd.DataFrame(
-        list(counts.items()), columns=["Dependency", "Occurrence Count"]
+    # select the SBOM dependency counts for the language
+    df_dependency_counts_top = top_dependencies(
+        df_dependency_occurrences, subset="all", language=programming_lang
     )
-    df_dependency_counts_top = df_dependency_counts.sort_values(
-        by="Occurrence Count", ascending=False
-    ).head(100)
 
     fig_dependencies = px.bar(
         data_frame=df_dependency_counts_top.sort_values(by="Occurrence Count"),
@@ -460,59 +409,34 @@ for programming_lang in programming_language_counts.head(15)["Primary language"]
         ),
     )
 
-    fig_dependencies.write_image(
+    chart_figures[
         f"images/software-landscape-dependency-counts-total-{programming_lang}.png"
-    )
+    ] = fig_dependencies
     fig_dependencies.show()
 
 # %%
-# form listing of only set members
-github_metrics_set_contrib_only = [
-    repo
-    for repo in github_metrics
-    if any(
-        [
-            set_member
-            in [member["login"] for member in repo["GitHub Contributor Members"]]
-            for set_member in dbmi_set_github_usernames.to_list()
-        ]
-    )
-]
-ak.Array(github_metrics_set_contrib_only)
-
-# %%
-df_github_metrics_set_contrib_only = pd.DataFrame(github_metrics_set_contrib_only)
-# gather the number of lines of code
-df_github_metrics_set_contrib_only["Total lines of GitHub detected code"] = (
-    df_github_metrics_set_contrib_only["GitHub Detected Languages"]
-    .dropna()
-    .apply(lambda x: sum(value if value is not None else 0 for value in x.values()))
+# form a sparse repo by dependency matrix from the SBOM dependencies
+dependency_matrix = DependencyMatrix(
+    df_dependencies, repos=landscape["GitHub Repo Full Name"].to_list()
 )
 
-# Apply the function to the "GitHub Detected Languages" column and create a new column "Primary programming language"
-df_github_metrics_set_contrib_only[
-    "Primary language"
-] = df_github_metrics_set_contrib_only["GitHub Detected Languages"].apply(
-    find_top_language
-)
-df_github_metrics_set_contrib_only.info()
+# show the dependencies most often used together
+dependency_matrix.co_occurrence().head(20)
 
 # %%
-# prep for creating an hbar chart for primary languages
-grouped_data = (
-    df_github_metrics_set_contrib_only.groupby(["Primary language"])
-    .size()
-    .reset_index(name="Count")
-)
+# cluster repos by shared dependency stacks (jaccard similarity)
+df_dependency_clusters = dependency_matrix.cluster_repos(threshold=0.5)
+df_dependency_clusters[df_dependency_clusters["cluster_size"] > 1]
 
-# Group by "Primary programming language" and calculate the sum of counts for each programming language
-programming_language_counts = (
-    grouped_data.groupby("Primary language")["Count"].sum().reset_index()
-)
+# %%
+# form the subset of repos with set member contributors
+df_github_metrics_set_contrib_only = df_github_metrics[set_contrib_mask]
+df_github_metrics_set_contrib_only.info()
 
-# Sort programming languages by the sum of counts in descending order
-programming_language_counts = programming_language_counts.sort_values(
-    by="Count", ascending=False
+# %%
+# count set member contributed repos by primary language
+programming_language_counts = language_matrix.primary_language_counts(
+    mask=set_contrib_mask
 )
 programming_language_counts
 
@@ -543,36 +467,17 @@ fig_languages.update_layout(
     ),
 )
 
-fig_languages.write_image(
+chart_figures[
     "images/software-landscape-primary-language-counts-set-only.png"
-)
+] = fig_languages
 fig_languages.show()
 
 # %%
 # Create a horizontal bar chart for language line count totals
 # gather total lines of code for all repos by language
-total_language_line_counts = [
-    {
-        "language": language,
-        "line_count": ak.sum(
-            ak.Array(github_metrics_set_contrib_only)["GitHub Detected Languages"][
-                language
-            ]
-        ),
-    }
-    for language in ak.Array(github_metrics_set_contrib_only)[
-        "GitHub Detected Languages"
-    ].fields
-]
-
-df_total_language_line_counts = pd.DataFrame.from_records(
-    total_language_line_counts
-).sort_values(by="line_count")
+df_total_language_line_counts = language_matrix.line_counts(mask=set_contrib_mask)
 
 df_total_language_line_counts
-df_total_language_line_counts = df_total_language_line_counts.sort_values(
-    by="line_count"
-)
 
 fig_languages = px.bar(
     data_frame=df_total_language_line_counts,
@@ -602,16 +507,12 @@ fig_languages.update_layout(
     ),
 )
 
-fig_languages.write_image(
+chart_figures[
     "images/software-landscape-language-line-counts-total-set-only.png"
-)
+] = fig_languages
 fig_languages.show()
 
 # %%
-df_total_language_line_counts["line_count_log"] = np.log(
-    df_total_language_line_counts["line_count"]
-)
-
 # Create a horizontal bar chart for language line count totals
 fig_languages = px.bar(
     data_frame=df_total_language_line_counts.sort_values(by="line_count_log"),
@@ -641,26 +542,17 @@ fig_languages.update_layout(
     ),
 )
 
-fig_languages.write_image(
+chart_figures[
     "images/software-landscape-language-line-counts-total-log-set-only.png"
-)
+] = fig_languages
 fig_languages.show()
 
 # %%
-aarr = ak.Array(github_metrics_set_contrib_only)
 for programming_lang in programming_language_counts.head(15)["Primary language"]:
-    masked = aarr.mask[aarr["Primary Programming Language"] == programming_lang]
-
-    # value count the SBOM dependencies in total
-    flat_array = ak.flatten(masked["GitHub Repo SBOM"]["sbom"]["packages"]["name"])
-    flat_list = ak.to_list(flat_array)
-    counts = Counter(flat_list)
-    df_dependency_counts = pd.DataFrame(
-        list(counts.items()), columns=["Dependency", "Occurrence Count"]
+    # select the SBOM dependency counts for the language
+    df_dependency_counts_top = top_dependencies(
+        df_dependency_occurrences, subset="set-only", language=programming_lang
     )
-    df_dependency_counts_top = df_dependency_counts.sort_values(
-        by="Occurrence Count", ascending=False
-    ).head(100)
 
     fig_dependencies = px.bar(
         data_frame=df_dependency_counts_top.sort_values(by="Occurrence Count"),
@@ -682,7 +574,12 @@ for programming_lang in programming_language_counts.head(15)["Primary language"]
         ),
     )
 
-    fig_dependencies.write_image(
+    chart_figures[
         f"images/software-landscape-dependency-counts-total-{programming_lang}-set-only.png"
-    )
+    ] = fig_dependencies
     fig_dependencies.show()
+
+# %%
+# render the chart images in parallel, skipping charts which are unchanged
+# since their image was last rendered
+render_figures(chart_figures)
@@ -20,16 +20,60 @@
 # %%
 import json
 import os
-import time
 from datetime import datetime
-from typing import Optional
 
 import requests
 from github import Auth, Github
 
+from utils.checkpoint import RepoCheckpoint, checkpoint_scope
+from utils.contributions import (
+    count_contributions_with_search,
+    reconcile_contribution_counts,
+    store_repo_events,
+)
+from utils.event_store import ContributionEventStore
+from utils.http_cache import SQLiteResponseCache, install_pygithub_cache
+from utils.http_cassette import CassetteAdapter
+from utils.rate_limit import RateLimitedAdapter, RateLimitScheduler
+
 # %%
+# pace github requests based on the rate limit headers github returns,
+# optionally rotating across several comma-separated tokens
+# provided through SET_EFFORT_GH_TOKENS
+github_scheduler = RateLimitScheduler(
+    tokens=os.environ.get(
+        "SET_EFFORT_GH_TOKENS", os.environ.get("SET_EFFORT_GH_TOKEN", "")
+    ).split(",")
+)
+
+# optionally record github traffic to (or replay it from) a local cassette
+# so the crawl may be re-run offline, set through
+# SET_EFFORT_GH_CASSETTE and SET_EFFORT_GH_CASSETTE_MODE ("record" or "replay")
+github_adapter = RateLimitedAdapter(github_scheduler)
+if os.environ.get("SET_EFFORT_GH_CASSETTE"):
+    github_adapter = CassetteAdapter(
+        path=os.environ["SET_EFFORT_GH_CASSETTE"],
+        mode=os.environ.get("SET_EFFORT_GH_CASSETTE_MODE", "replay"),
+        adapter=github_adapter,
+    )
+
+# route github requests through a shared on-disk response cache
+# which revalidates stale responses (without using rate limit quota)
+github_cache = SQLiteResponseCache()
+github_session = install_pygithub_cache(github_cache, adapter=github_adapter)
+
+# authorize the shared session for graphql requests made outside of pygithub
+github_session.headers.update(
+    {"Authorization": f"Bearer {os.environ.get('SET_EFFORT_GH_TOKEN')}"}
+)
+
 # set github authorization and client
-g = Github(auth=Auth.Token(os.environ.get("SET_EFFORT_GH_TOKEN")), per_page=100)
+# (pygithub request spacing is disabled in favor of the scheduler)
+g = Github(
+    auth=Auth.Token(os.environ.get("SET_EFFORT_GH_TOKEN")),
+    per_page=100,
+    seconds_between_requests=None,
+)
 
 date_start = datetime.strptime("2022-07-01", "%Y-%m-%d")
 date_end = datetime.strptime("2023-06-30", "%Y-%m-%d")
@@ -37,6 +81,12 @@ date_end = datetime.strptime("2023-06-30", "%Y-%m-%d")
 # specify set members as github usernames
 set_members = ["vincerubinetti", "falquaddoomi", "d33bs"]
 
+# set how to count contributions: "scan" lists every pull request, review
+# and issue in each org repo, "search" uses github search api total counts
+# (one search per member, org and counter) and "reconcile" runs both and
+# shows the differences between them
+counting_mode = "scan"
+
 # Define github organization names
 orgs = [
     "cu-dbmi",
@@ -54,106 +104,93 @@ orgs = [
     "biothings",
 ]
 
-
 # %%
-def within_time_range(
-    date_to_check: Optional[datetime],
-    date_start: datetime = date_start,
-    date_end: datetime = date_end,
-) -> bool:
-    """
-    Checks whether given date falls within range of date_start and date_end
-    """
+# gather organization repos
+if counting_mode in ["scan", "reconcile"]:
+    org_repos = [
+        repo for org_name in orgs for repo in g.get_organization(org_name).get_repos()
+    ]
 
-    # if date_to_check is None, return false
-    if not date_to_check:
-        return False
+    print(len(org_repos))
 
-    return date_start <= date_to_check <= date_end
+# %%
+# gather per-repo issue, pull request and review events into the local event
+# store, checkpointing each repo so that restarts skip completed repos and
+# later runs only re-fetch repos which were pushed to or updated since
+if counting_mode in ["scan", "reconcile"]:
+    event_store = ContributionEventStore()
+    checkpoint = RepoCheckpoint(
+        scope=checkpoint_scope("github-contribution-events", since=date_start)
+    )
+
+    store_repo_events(
+        repos=org_repos,
+        since=date_start,
+        session=github_session,
+        event_store=event_store,
+        checkpoint=checkpoint,
+    )
+
+    # count contributions from the stored events
+    scan_counts = event_store.count_contributions(
+        set_members=set_members, date_start=date_start, date_end=date_end
+    )
 
+# %%
+# count contributions using github search qualifiers
+if counting_mode in ["search", "reconcile"]:
+    search_counts = count_contributions_with_search(
+        github_client=g,
+        set_members=set_members,
+        orgs=orgs,
+        date_start=date_start,
+        date_end=date_end,
+    )
 
 # %%
-# gather organization repos
-org_repos = [
-    repo for org_name in orgs for repo in g.get_organization(org_name).get_repos()
-]
+# compare the full scan and search counts
+if counting_mode == "reconcile":
+    display(reconcile_contribution_counts(scan_counts, search_counts))
+
+# %%
+contribution_counts = search_counts if counting_mode == "search" else scan_counts
 
-print(len(org_repos))
+# Print the numbers
+print(f"Repo opened issues: {contribution_counts['open_issues']}")
+print(f"Repo closed issues: {contribution_counts['closed_issues']}")
+print(f"Repo opened pull requests: {contribution_counts['open_prs']}")
+print(f"Repo closed pull requests: {contribution_counts['closed_prs']}", end="\n\n")
+
+print(f"Repos contributed to count: {len(contribution_counts['touched_repos'])}")
+print(
+    "Total number of issues: "
+    f"{contribution_counts['open_issues'] + contribution_counts['closed_issues']}"
+)
+print(
+    "Total pull requests: "
+    f"{contribution_counts['open_prs'] + contribution_counts['closed_prs']}"
+)
+print(f"Total pull request reviews: {contribution_counts['reviewed_prs']}")
 
 # %%
-# Initialize counters
-repo_contribution_count = 0
-total_open_prs = 0
-total_closed_prs = 0
-total_reviewed_prs = 0
-total_open_issues = 0
-total_closed_issues = 0
-
-touched_repos = []
-
-# Loop over the repositories and increment counters
-for repo in org_repos:
-    # add arbitrary sleep to avoid rate limit exceptions
-    time.sleep(1)
-    # pull request block
-    # Loop over list of pulls in the repository
-    for pull in repo.get_pulls(state="all"):
-        if (
-            within_time_range(date_to_check=pull.created_at)
-            or within_time_range(date_to_check=pull.closed_at)
-            or within_time_range(date_to_check=pull.updated_at)
-        ):
-            # for pull requests authored by set members
-            if pull.user.login in set_members:
-                if pull.state == "open":
-                    total_open_prs += 1
-                elif pull.state == "closed":
-                    total_closed_prs += 1
-                if repo.full_name not in touched_repos:
-                    touched_repos.append(repo.full_name)
-
-            # pull request review block
-            for review in pull.get_reviews():
-                if (
-                    # if the reviewer is one of the set members
-                    review.user.login in set_members
-                    # if the reviewer is not the issue author
-                    # (don't count comments on PR submitted by same set member)
-                    and pull.user.login != review.user.login
-                    and within_time_range(date_to_check=review.submitted_at)
-                ):
-                    total_reviewed_prs += 1
-                    if repo.full_name not in touched_repos:
-                        touched_repos.append(repo.full_name)
-    
-    # add arbitrary sleep to avoid rate limit exceptions
-    time.sleep(1)
-    
-    # Loop over list of issues in the repository
-    for issue in repo.get_issues(state="all", since=date_start):
-        if (
-            within_time_range(date_to_check=issue.created_at)
-            or within_time_range(date_to_check=issue.closed_at)
-            or within_time_range(date_to_check=issue.updated_at)
-        ):
-            # non pull-request issue block
-            if issue.user.login in set_members:
-                if issue.state == "open":
-                    total_open_issues += 1
-                elif issue.state == "closed":
-                    total_closed_issues += 1
-
-                if repo.full_name not in touched_repos:
-                    touched_repos.append(repo.full_name)
+# show monthly pull request and issue counts by member from the stored events
+if counting_mode in ["scan", "reconcile"]:
+    display(
+        event_store.query(
+            """
+            SELECT author, kind, DATE_TRUNC('month', created_at) AS month, COUNT(*) AS count
+            FROM github_items
+            WHERE author IN (SELECT UNNEST(?::VARCHAR[]))
+                AND created_at >= ? AND created_at < ?::TIMESTAMP + INTERVAL 1 DAY
+            GROUP BY author, kind, month
+            ORDER BY month, author, kind
+            """,
+            set_members,
+            date_start,
+            date_end,
+        )
+    )
 
 # %%
-# Print the numbers
-print(f"Repo opened issues: {total_open_issues}")
-print(f"Repo closed issues: {total_closed_issues}")
-print(f"Repo opened pull requests: {total_open_prs}")
-print(f"Repo closed pull requests: {total_closed_prs}", end="\n\n")
-
-print(f"Repos contributed to count: {len(touched_repos)}")
-print(f"Total number of issues: {total_open_issues + total_closed_issues}")
-print(f"Total pull requests: {total_open_prs + total_closed_prs}")
-print(f"Total pull request reviews: {total_reviewed_prs}")
+# show github response cache and request scheduling statistics
+github_cache.stats, github_scheduler.stats
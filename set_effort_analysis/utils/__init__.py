@@ -0,0 +1,3 @@
+"""
+Shared utilities for DBMI SET effort analysis notebooks.
+"""
@@ -0,0 +1,104 @@
+"""
+Parallel, cache-aware rendering of plotly figures to image files.
+
+Each figure's data and layout are hashed and compared with the hash
+recorded when its image was last rendered, so charts whose data has not
+changed are skipped. Remaining figures are rendered within a process
+pool where each worker process reuses one kaleido instance.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+import plotly.graph_objects as go
+
+# default location for the hashes of rendered charts
+DEFAULT_RENDER_MANIFEST_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/cache/chart-render-hashes.json"
+)
+
+# kaleido instance reused for every figure rendered by a worker process
+_kaleido_scope = None
+
+
+def figure_hash(figure: go.Figure) -> str:
+    """
+    Hashes the data and layout of a figure (the full figure specification).
+    """
+
+    return hashlib.sha256(
+        json.dumps(json.loads(figure.to_json()), sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def _start_kaleido() -> None:
+    """
+    Starts the kaleido instance for a worker process.
+    """
+
+    global _kaleido_scope
+    from kaleido.scopes.plotly import PlotlyScope
+
+    _kaleido_scope = PlotlyScope()
+
+
+def _render_figure(path_and_spec: Tuple[str, str]) -> str:
+    """
+    Renders a figure specification (as JSON) to an image file using the
+    worker process kaleido instance, with the format taken from the file
+    extension.
+    """
+
+    path, spec = path_and_spec
+    image = _kaleido_scope.transform(
+        json.loads(spec), format=pathlib.Path(path).suffix.lstrip(".")
+    )
+    pathlib.Path(path).write_bytes(image)
+
+    return path
+
+
+def render_figures(
+    figures: Dict[str, go.Figure],
+    manifest_path: Union[str, pathlib.Path] = DEFAULT_RENDER_MANIFEST_PATH,
+    max_workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, str]:
+    """
+    Renders figures (keyed by image path) which changed since they were
+    last rendered, skipping figures whose data and layout hash matches
+    the existing image. Returns whether each image was "rendered" or
+    "unchanged".
+    """
+
+    manifest_path = pathlib.Path(manifest_path)
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    hashes = {path: figure_hash(figure) for path, figure in figures.items()}
+    changed = [
+        path
+        for path, spec_hash in hashes.items()
+        if force
+        or manifest.get(str(pathlib.Path(path).resolve())) != spec_hash
+        or not pathlib.Path(path).exists()
+    ]
+
+    if changed:
+        with ProcessPoolExecutor(
+            max_workers=max_workers or min(len(changed), os.cpu_count() or 1),
+            initializer=_start_kaleido,
+        ) as executor:
+            for path in executor.map(
+                _render_figure,
+                [(path, figures[path].to_json()) for path in changed],
+            ):
+                # record each image as soon as it has been rendered
+                manifest[str(pathlib.Path(path).resolve())] = hashes[path]
+                manifest_path.parent.mkdir(parents=True, exist_ok=True)
+                manifest_path.write_text(json.dumps(manifest, indent=2))
+
+    return {path: "rendered" if path in changed else "unchanged" for path in figures}
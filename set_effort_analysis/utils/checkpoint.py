@@ -0,0 +1,124 @@
+"""
+SQLite-backed checkpoints for resumable, incremental repository crawls.
+
+Each repository's results are committed as soon as they are gathered,
+along with the repository's pushed_at and updated_at timestamps. Restarted
+or later crawls reuse results for repositories which have not changed.
+"""
+
+import hashlib
+import json
+import pathlib
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Union
+
+import github
+
+# default location for crawl checkpoints
+DEFAULT_CHECKPOINT_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/cache/github-crawl-checkpoints.sqlite"
+)
+
+
+def checkpoint_scope(name: str, **params: Any) -> str:
+    """
+    Forms a checkpoint scope from a crawl name and the parameters which
+    change its results, so differently parameterized crawls never share
+    checkpointed results.
+    """
+
+    return "{}-{}".format(
+        name,
+        hashlib.sha256(
+            json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16],
+    )
+
+
+class RepoCheckpoint:
+    """
+    Stores per-repository crawl results within a scope, keyed by
+    repository full name.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        path: Union[str, pathlib.Path] = DEFAULT_CHECKPOINT_PATH,
+    ):
+        self.scope = scope
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                scope TEXT,
+                full_name TEXT,
+                pushed_at TEXT,
+                updated_at TEXT,
+                result TEXT,
+                completed_at REAL,
+                PRIMARY KEY (scope, full_name)
+            )
+            """
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _repo_versions(repo: github.Repository.Repository) -> tuple:
+        """
+        Forms comparable pushed_at and updated_at values for a repository.
+        """
+
+        return (
+            repo.pushed_at.isoformat() if repo.pushed_at else None,
+            repo.updated_at.isoformat() if repo.updated_at else None,
+        )
+
+    def get(self, repo: github.Repository.Repository) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves checkpointed results for a repository, returning None
+        where there are none or the repository has changed since.
+        """
+
+        row = self._connection.execute(
+            """
+            SELECT pushed_at, updated_at, result FROM checkpoints
+            WHERE scope = ? AND full_name = ?
+            """,
+            (self.scope, repo.full_name),
+        ).fetchone()
+
+        if row is None or tuple(row[:2]) != self._repo_versions(repo):
+            return None
+
+        return json.loads(row[2])
+
+    def save(self, repo: github.Repository.Repository, result: Dict[str, Any]) -> None:
+        """
+        Commits results for a repository to the checkpoint store.
+        """
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.scope,
+                repo.full_name,
+                *self._repo_versions(repo),
+                json.dumps(result),
+                time.time(),
+            ),
+        )
+        self._connection.commit()
+
+    def completed_count(self) -> int:
+        """
+        Counts repositories with checkpointed results within the scope.
+        """
+
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE scope = ?", (self.scope,)
+        ).fetchone()[0]
@@ -0,0 +1,245 @@
+"""
+Command-line report of DBMI SET GitHub contribution counts for several
+reporting periods at once.
+
+Members and orgs are read from the software landscape YAML files. Repos
+are crawled once into the contribution event store, from the earliest
+period start, and then every period is counted with a single query over
+the stored events.
+
+Run from the set_effort_analysis directory, for example:
+
+    python -m utils.contribution_report --fiscal-year 2022 --fiscal-year 2023
+    python -m utils.contribution_report --fiscal-year 2024 --quarterly
+    python -m utils.contribution_report --period 2023H2=2023-07-01:2023-12-31
+"""
+
+import argparse
+import logging
+import os
+import pathlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from box import Box
+from github import Auth, Github
+
+from utils.checkpoint import RepoCheckpoint, checkpoint_scope
+from utils.contributions import CONTRIBUTION_COUNTERS, store_repo_events
+from utils.event_store import DEFAULT_EVENT_STORE_PATH, ContributionEventStore
+from utils.http_cache import SQLiteResponseCache, install_pygithub_cache
+from utils.landscape import get_github_org_or_user
+from utils.rate_limit import RateLimitedAdapter, RateLimitScheduler
+
+# default location for software landscape members and orgs
+DEFAULT_LANDSCAPE_DIR = pathlib.Path(__file__).parents[2] / "data/software-landscape"
+
+
+def fiscal_year_period(year: int) -> Tuple[datetime, datetime]:
+    """
+    Forms the start and end dates for a fiscal year
+    (July 1st of the prior year through June 30th).
+    """
+
+    return datetime(year - 1, 7, 1), datetime(year, 6, 30)
+
+
+def fiscal_quarter_periods(year: int) -> Dict[str, Tuple[datetime, datetime]]:
+    """
+    Forms named start and end dates for each quarter of a fiscal year.
+    """
+
+    quarter_dates = [
+        (datetime(year - 1, 7, 1), datetime(year - 1, 9, 30)),
+        (datetime(year - 1, 10, 1), datetime(year - 1, 12, 31)),
+        (datetime(year, 1, 1), datetime(year, 3, 31)),
+        (datetime(year, 4, 1), datetime(year, 6, 30)),
+    ]
+
+    return {
+        f"FY{year}-Q{quarter}": dates
+        for quarter, dates in enumerate(quarter_dates, start=1)
+    }
+
+
+def parse_period(value: str) -> Tuple[str, Tuple[datetime, datetime]]:
+    """
+    Parses a named period provided as NAME=YYYY-MM-DD:YYYY-MM-DD.
+    """
+
+    try:
+        name, dates = value.split("=")
+        date_start, date_end = (
+            datetime.strptime(date, "%Y-%m-%d") for date in dates.split(":")
+        )
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            f"Expected NAME=YYYY-MM-DD:YYYY-MM-DD for period, received {value}"
+        ) from exc
+
+    return name, (date_start, date_end)
+
+
+def build_periods(
+    periods: List[Tuple[str, Tuple[datetime, datetime]]],
+    fiscal_years: List[int],
+    quarterly: bool = False,
+) -> Dict[str, Tuple[datetime, datetime]]:
+    """
+    Combines named periods and fiscal years (optionally split into quarters)
+    into one mapping of period names to start and end dates.
+    """
+
+    built_periods = dict(periods)
+    for year in fiscal_years:
+        if quarterly:
+            built_periods.update(fiscal_quarter_periods(year))
+        else:
+            built_periods[f"FY{year}"] = fiscal_year_period(year)
+
+    return built_periods
+
+
+def report_contributions(
+    periods: Dict[str, Tuple[datetime, datetime]],
+    set_members: List[str],
+    orgs: List[str],
+    tokens: List[str],
+    event_store_path: pathlib.Path = DEFAULT_EVENT_STORE_PATH,
+) -> pd.DataFrame:
+    """
+    Crawls org repos once from the earliest period start into the event
+    store and counts set_members contributions for every period.
+    """
+
+    # pace github requests and share the on-disk response cache
+    # with the contributions notebook
+    scheduler = RateLimitScheduler(tokens=tokens)
+    cache = SQLiteResponseCache()
+    session = install_pygithub_cache(cache, adapter=RateLimitedAdapter(scheduler))
+    session.headers.update({"Authorization": f"Bearer {tokens[0]}"})
+
+    github_client = Github(
+        auth=Auth.Token(tokens[0]), per_page=100, seconds_between_requests=None
+    )
+
+    # a single crawl covers every period
+    since = min(date_start for date_start, _ in periods.values())
+    event_store = ContributionEventStore(path=event_store_path)
+    store_repo_events(
+        repos=[
+            repo
+            for org in orgs
+            for repo in get_github_org_or_user(github_client, org).get_repos()
+        ],
+        since=since,
+        session=session,
+        event_store=event_store,
+        checkpoint=RepoCheckpoint(
+            scope=checkpoint_scope("github-contribution-events", since=since)
+        ),
+    )
+
+    return pd.DataFrame(
+        [
+            dict(
+                {
+                    "period": period,
+                    "date_start": periods[period][0].date(),
+                    "date_end": periods[period][1].date(),
+                },
+                **{counter: counts[counter] for counter in CONTRIBUTION_COUNTERS},
+                touched_repos=len(counts["touched_repos"]),
+            )
+            for period, counts in event_store.count_contributions_by_period(
+                set_members=set_members, periods=periods
+            ).items()
+        ]
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command-line entry point for the contribution report.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Count DBMI SET GitHub contributions for several reporting periods "
+            "from a single crawl of the software landscape orgs."
+        )
+    )
+    parser.add_argument(
+        "--period",
+        action="append",
+        default=[],
+        type=parse_period,
+        help="named period as NAME=YYYY-MM-DD:YYYY-MM-DD (may be repeated)",
+    )
+    parser.add_argument(
+        "--fiscal-year",
+        action="append",
+        default=[],
+        type=int,
+        help="fiscal year ending June 30th of YEAR (may be repeated)",
+    )
+    parser.add_argument(
+        "--quarterly",
+        action="store_true",
+        help="report each fiscal year by quarter",
+    )
+    parser.add_argument(
+        "--members-file",
+        default=DEFAULT_LANDSCAPE_DIR / "github-dbmi-set-members.yaml",
+        type=pathlib.Path,
+        help="YAML file with github_users to count contributions for",
+    )
+    parser.add_argument(
+        "--orgs-file",
+        default=DEFAULT_LANDSCAPE_DIR / "github-orgs.yaml",
+        type=pathlib.Path,
+        help="YAML file with organizations (or users) whose repos are crawled",
+    )
+    parser.add_argument(
+        "--event-store",
+        default=DEFAULT_EVENT_STORE_PATH,
+        type=pathlib.Path,
+        help="DuckDB contribution event store location",
+    )
+    parser.add_argument("--output", type=pathlib.Path, help="CSV file to write")
+    args = parser.parse_args(argv)
+
+    periods = build_periods(args.period, args.fiscal_year, args.quarterly)
+    if not periods:
+        parser.error("provide at least one --period or --fiscal-year")
+
+    # one or more comma-separated tokens to rotate requests across
+    tokens = [
+        token
+        for token in os.environ.get(
+            "SET_EFFORT_GH_TOKENS", os.environ.get("SET_EFFORT_GH_TOKEN", "")
+        ).split(",")
+        if token
+    ]
+    if not tokens:
+        parser.error("set SET_EFFORT_GH_TOKEN (or SET_EFFORT_GH_TOKENS)")
+
+    # show crawl progress
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    df_report = report_contributions(
+        periods=periods,
+        set_members=Box.from_yaml(filename=args.members_file).github_users,
+        orgs=Box.from_yaml(filename=args.orgs_file).organizations,
+        tokens=tokens,
+        event_store_path=args.event_store,
+    )
+
+    if args.output is not None:
+        df_report.to_csv(args.output, index=False)
+    print(df_report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
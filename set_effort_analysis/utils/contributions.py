@@ -0,0 +1,299 @@
+"""
+Utilities for gathering DBMI SET GitHub contribution counts.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import github
+import pandas as pd
+import requests
+from github import Github
+
+from utils.checkpoint import RepoCheckpoint
+from utils.event_store import ContributionEventStore
+from utils.landscape import GITHUB_API_URL, run_github_graphql_query
+
+# progress messages for long crawls (shown where logging is configured)
+logger = logging.getLogger(__name__)
+
+# counters reported for contributions
+CONTRIBUTION_COUNTERS = [
+    "open_prs",
+    "closed_prs",
+    "reviewed_prs",
+    "open_issues",
+    "closed_issues",
+]
+
+# number of pull requests to gather reviews for within one graphql query
+REVIEW_BATCH_SIZE = 50
+
+# github search qualifiers for each counter by a single member
+SEARCH_COUNTER_QUERIES = {
+    "open_prs": "is:pr is:open author:{member}",
+    "closed_prs": "is:pr is:closed author:{member}",
+    "reviewed_prs": "is:pr reviewed-by:{member} -author:{member}",
+    "open_issues": "is:issue is:open author:{member}",
+    "closed_issues": "is:issue is:closed author:{member}",
+}
+
+
+def as_naive_utc(date: datetime) -> datetime:
+    """
+    Converts timezone-aware datetimes (as returned by newer PyGithub
+    releases) to naive UTC datetimes for comparison.
+    """
+
+    if date.tzinfo is not None:
+        return date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def get_pull_request_reviews(
+    session: requests.Session,
+    full_name: str,
+    pull_numbers: List[int],
+    api_url: str = GITHUB_API_URL,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Gathers reviewer logins and submitted dates for many pull requests
+    of a repository using aliased GraphQL pull request lookups
+    (REVIEW_BATCH_SIZE pull requests and up to 100 reviews each per query),
+    following review pages for pull requests with more than 100 reviews.
+    """
+
+    owner, name = full_name.split("/")
+    reviews = {number: [] for number in pull_numbers}
+    # review page cursors for pull requests which still need to be gathered
+    pending = {number: None for number in pull_numbers}
+
+    while pending:
+        batch = list(pending.items())[:REVIEW_BATCH_SIZE]
+        query = """
+        query($owner: String!, $name: String!) {
+          repository(owner: $owner, name: $name) {
+            %s
+          }
+        }
+        """ % "\n".join(
+            f"""
+            pr{number}: pullRequest(number: {number}) {{
+              reviews(first: 100, after: {json.dumps(cursor)}) {{
+                pageInfo {{ hasNextPage endCursor }}
+                nodes {{ author {{ login }} submittedAt }}
+              }}
+            }}
+            """
+            for number, cursor in batch
+        )
+        repository = run_github_graphql_query(
+            session=session,
+            query=query,
+            variables={"owner": owner, "name": name},
+            api_url=api_url,
+        )["repository"]
+
+        for number, _ in batch:
+            del pending[number]
+            pull = repository.get(f"pr{number}") if repository else None
+            if pull is None:
+                continue
+            reviews[number] += [
+                {
+                    "login": review["author"]["login"] if review["author"] else None,
+                    "submitted_at": (
+                        datetime.strptime(review["submittedAt"], "%Y-%m-%dT%H:%M:%SZ")
+                        if review["submittedAt"]
+                        else None
+                    ),
+                }
+                for review in pull["reviews"]["nodes"]
+            ]
+            if pull["reviews"]["pageInfo"]["hasNextPage"]:
+                pending[number] = pull["reviews"]["pageInfo"]["endCursor"]
+
+    return reviews
+
+
+def gather_repo_events(
+    repo: github.Repository.Repository,
+    since: datetime,
+    session: requests.Session,
+    api_url: str = GITHUB_API_URL,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Gathers issue, pull request and review events for a single repository
+    for items updated since a date, returning item and review records
+    for a ContributionEventStore.
+
+    Issues and pull requests are gathered in a single pass over the
+    issues endpoint (which includes pull requests), from most to least
+    recently updated, stopping once items were last updated before
+    since. Reviews for all gathered pull requests are then gathered in
+    bulk through GraphQL using session (which must be authorized for
+    GitHub).
+    """
+
+    items = []
+
+    # Loop over list of issues and pull requests in the repository
+    for issue in repo.get_issues(
+        state="all", since=since, sort="updated", direction="desc"
+    ):
+        # items are sorted by updated date, so no later items may be in range
+        if as_naive_utc(issue.updated_at) < as_naive_utc(since):
+            break
+
+        items.append(
+            {
+                "repo": repo.full_name,
+                "org": repo.full_name.split("/")[0],
+                "number": issue.number,
+                "kind": "pull_request" if issue.pull_request is not None else "issue",
+                "author": issue.user.login if issue.user else None,
+                "state": issue.state,
+                "created_at": as_naive_utc(issue.created_at),
+                "updated_at": as_naive_utc(issue.updated_at),
+                "closed_at": as_naive_utc(issue.closed_at) if issue.closed_at else None,
+            }
+        )
+
+    # pull request review block
+    pull_reviews = get_pull_request_reviews(
+        session=session,
+        full_name=repo.full_name,
+        pull_numbers=[
+            item["number"] for item in items if item["kind"] == "pull_request"
+        ],
+        api_url=api_url,
+    )
+    reviews = [
+        {
+            "repo": repo.full_name,
+            "number": number,
+            "reviewer": review["login"],
+            "submitted_at": review["submitted_at"],
+        }
+        for number, number_reviews in pull_reviews.items()
+        for review in number_reviews
+    ]
+
+    return items, reviews
+
+
+def store_repo_events(
+    repos: List[github.Repository.Repository],
+    since: datetime,
+    session: requests.Session,
+    event_store: ContributionEventStore,
+    checkpoint: RepoCheckpoint,
+    api_url: str = GITHUB_API_URL,
+) -> None:
+    """
+    Gathers issue, pull request and review events since a date for each
+    repository into the event store, checkpointing each repository so that
+    restarts skip completed repositories and later runs only re-fetch
+    repositories which were pushed to or updated since.
+
+    Repositories whose stored events start after since are also re-fetched,
+    and re-fetches start from the earliest of since and the stored coverage
+    so runs over shorter windows never narrow the events stored for others.
+    """
+
+    since = as_naive_utc(since)
+    for idx, repo in enumerate(repos, start=1):
+        covered_since = event_store.covered_since(repo.full_name)
+        if (
+            checkpoint.get(repo) is None
+            or covered_since is None
+            or covered_since > since
+        ):
+            repo_since = min(since, covered_since or since)
+            items, reviews = gather_repo_events(
+                repo=repo, since=repo_since, session=session, api_url=api_url
+            )
+            event_store.replace_repo_events(
+                repo=repo.full_name, items=items, reviews=reviews, since=repo_since
+            )
+            checkpoint.save(repo, {"items": len(items), "reviews": len(reviews)})
+        logger.info("Gathered %s of %s repos: %s", idx, len(repos), repo.full_name)
+
+
+def count_contributions_with_search(
+    github_client: Github,
+    set_members: List[str],
+    orgs: List[str],
+    date_start: datetime,
+    date_end: datetime,
+) -> Dict[str, Any]:
+    """
+    Counts set_members contributions to orgs within the time range using
+    GitHub search qualifiers, making one search per member, org and
+    counter rather than listing every pull request and issue.
+
+    Search results include items created before date_end and updated
+    after date_start and review counts are by pull request rather than
+    by review, so results may differ from the full scan
+    (see reconcile_contribution_counts). Touched repos are gathered from
+    only the first page of each search (up to the client's per_page
+    items), so they may be incomplete for members with many results.
+    """
+
+    counts = {counter: 0 for counter in CONTRIBUTION_COUNTERS}
+    touched_repos = set()
+    date_qualifiers = "updated:>={} created:<={}".format(
+        date_start.strftime("%Y-%m-%d"), date_end.strftime("%Y-%m-%d")
+    )
+
+    for member in set_members:
+        for org in orgs:
+            for counter, query in SEARCH_COUNTER_QUERIES.items():
+                results = github_client.search_issues(
+                    f"{query.format(member=member)} org:{org} {date_qualifiers}"
+                )
+                # the first page provides the total count along with
+                # touched repos (without requesting further pages)
+                touched_repos.update(
+                    item.repository_url.split("/repos/")[-1]
+                    for item in results.get_page(0)
+                )
+                counts[counter] += results.totalCount
+
+    return dict(counts, touched_repos=sorted(touched_repos))
+
+
+def reconcile_contribution_counts(
+    scan_counts: Dict[str, Any], search_counts: Dict[str, Any]
+) -> pd.DataFrame:
+    """
+    Compares full scan and search-based contribution counts,
+    including touched repos found by only one of the two.
+    """
+
+    scan_repos = {repo.lower() for repo in scan_counts["touched_repos"]}
+    search_repos = {repo.lower() for repo in search_counts["touched_repos"]}
+
+    return pd.DataFrame(
+        [
+            {
+                "counter": counter,
+                "full_scan": scan_counts[counter],
+                "search": search_counts[counter],
+                "difference": search_counts[counter] - scan_counts[counter],
+            }
+            for counter in CONTRIBUTION_COUNTERS
+        ]
+        + [
+            {
+                "counter": "touched_repos",
+                "full_scan": len(scan_repos),
+                "search": len(search_repos),
+                "difference": len(search_repos) - len(scan_repos),
+                "full_scan_only": sorted(scan_repos - search_repos),
+                "search_only": sorted(search_repos - scan_repos),
+            }
+        ]
+    )
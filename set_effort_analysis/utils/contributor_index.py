@@ -0,0 +1,115 @@
+"""
+Inverted index from contributor logins to landscape repositories.
+
+The index is built once from the contributor members of every repository
+and answers membership and overlap queries (repos touched by a group of
+users, contributors shared between orgs, per-repo bus factor) without
+rescanning contributor lists for each repository and user.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List
+
+import awkward as ak
+import numpy as np
+import pandas as pd
+
+
+class ContributorIndex:
+    """
+    Indexes repository contributors by login and by owner (org or user).
+    """
+
+    def __init__(self, landscape: ak.Array):
+        members = ak.fill_none(landscape["GitHub Contributor Members"], [], axis=0)
+        counts = ak.to_numpy(ak.num(members))
+        repo_index = np.repeat(np.arange(len(landscape)), counts)
+        flat_members = ak.flatten(members)
+
+        self.size = len(landscape)
+        self.repos = (
+            ak.to_arrow(landscape["GitHub Repo Full Name"], extensionarray=False)
+            .to_pandas()
+            .to_numpy()
+        )
+
+        # one row per repository contributor
+        self.contributions = pd.DataFrame(
+            {
+                "repo_index": repo_index,
+                "repo": self.repos[repo_index],
+                "org": ak.to_arrow(landscape["GitHub Org Name"], extensionarray=False)
+                .to_pandas()
+                .to_numpy()[repo_index],
+                "login": ak.to_arrow(flat_members["login"], extensionarray=False)
+                .to_pandas()
+                .to_numpy(),
+                "contributions": ak.to_numpy(
+                    ak.fill_none(flat_members["contributions"], 0)
+                ),
+            }
+        ).dropna(subset=["login"])
+
+        # login -> repository rows and org -> logins
+        self.repo_indexes_by_login: Dict[str, np.ndarray] = {
+            login: group.to_numpy()
+            for login, group in self.contributions.groupby("login")["repo_index"]
+        }
+        self.logins_by_org: Dict[str, FrozenSet[str]] = {
+            org: frozenset(group)
+            for org, group in self.contributions.groupby("org")["login"]
+        }
+
+    def repo_mask(self, logins: Iterable[str]) -> np.ndarray:
+        """
+        Finds repositories (as a boolean mask over the landscape rows)
+        with any of the logins among their contributors.
+        """
+
+        mask = np.zeros(self.size, dtype=bool)
+        for login in logins:
+            mask[self.repo_indexes_by_login.get(login, [])] = True
+
+        return mask
+
+    def repos_touched_by(self, logins: Iterable[str]) -> List[str]:
+        """
+        Lists repositories with any of the logins among their contributors.
+        """
+
+        return sorted(self.repos[self.repo_mask(logins)])
+
+    def shared_contributors(self, org_a: str, org_b: str) -> List[str]:
+        """
+        Lists contributors to repositories of both orgs (or users).
+        """
+
+        return sorted(
+            self.logins_by_org.get(org_a, frozenset())
+            & self.logins_by_org.get(org_b, frozenset())
+        )
+
+    def bus_factor(self, threshold: float = 0.5) -> pd.DataFrame:
+        """
+        Finds the bus factor for each repository: the smallest number of
+        contributors who together made at least threshold of its
+        contributions (commits).
+        """
+
+        df_contributions = self.contributions.sort_values(
+            by=["repo_index", "contributions"], ascending=[True, False]
+        )
+        grouped = df_contributions.groupby("repo_index")["contributions"]
+        share_before = (
+            grouped.cumsum() - df_contributions["contributions"]
+        ) / grouped.transform("sum")
+
+        return (
+            df_contributions.assign(needed=share_before < threshold)
+            .groupby(["repo_index", "repo"], as_index=False)
+            .agg(
+                contributors=("login", "size"),
+                bus_factor=("needed", "sum"),
+            )
+            .drop(columns="repo_index")
+            .sort_values(by=["bus_factor", "contributors"])
+        )
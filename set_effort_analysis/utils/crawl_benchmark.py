@@ -0,0 +1,320 @@
+"""
+Offline collection-throughput benchmarks for the GitHub crawls.
+
+Each crawl (landscape GraphQL, landscape REST and contribution events)
+is run against a local FakeGitHubServer synthesizing orgs of several
+sizes, first with empty caches and stores ("cold") and then again
+reusing them ("warm"). Wall time, requests issued and requests per
+repository are reported so optimizations can be compared without a
+GitHub token or network access, for example:
+
+python -m utils.crawl_benchmark --repos 10 100 1000
+"""
+
+import argparse
+import pathlib
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from github import Auth, Github
+
+from utils.checkpoint import RepoCheckpoint
+from utils.contributions import store_repo_events
+from utils.event_store import ContributionEventStore
+from utils.fake_github import FakeGitHubServer
+from utils.http_cache import SQLiteResponseCache, install_pygithub_cache
+from utils.landscape import iter_github_metrics, iter_github_metrics_graphql
+from utils.landscape_manifest import LandscapeManifest, refresh_landscape_records
+from utils.landscape_store import LandscapeParquetWriter
+from utils.rate_limit import RateLimitedAdapter, RateLimitScheduler
+from utils.readme_store import ReadmeStore
+
+# token sent to the fake server (quotas are tracked per token)
+BENCHMARK_TOKEN = "benchmark-token"
+
+# crawls which may be benchmarked
+SCENARIOS = [
+    "landscape-graphql",
+    "landscape-rest",
+    "landscape-refresh",
+    "contributions",
+]
+
+
+class CrawlEnvironment:
+    """
+    Caches, stores and clients for one crawl against the fake server,
+    kept within a working directory so that a repeated (warm) run
+    reuses them.
+    """
+
+    def __init__(
+        self,
+        server: FakeGitHubServer,
+        workdir: pathlib.Path,
+        max_workers: int = 8,
+        requests_per_second: float = 1000.0,
+    ):
+        self.server = server
+        self.workdir = workdir
+        self.max_workers = max_workers
+        self.scheduler = RateLimitScheduler(
+            requests_per_second=requests_per_second,
+            burst=max(1, int(requests_per_second)),
+        )
+        self.cache = SQLiteResponseCache(path=workdir / "github-http-cache.sqlite")
+        self.session = install_pygithub_cache(
+            self.cache, adapter=RateLimitedAdapter(self.scheduler)
+        )
+        self.session.headers.update({"Authorization": f"Bearer {BENCHMARK_TOKEN}"})
+        self.readme_store = ReadmeStore(path=workdir / "readme-store.sqlite")
+        self.records_path = workdir / "software-landscape-records"
+        self.manifest = LandscapeManifest(
+            path=workdir / "software-landscape-manifest.sqlite"
+        )
+        self.event_store = ContributionEventStore(
+            path=workdir / "github-contribution-events.duckdb"
+        )
+        self.checkpoint = RepoCheckpoint(
+            scope="benchmark", path=workdir / "github-crawl-checkpoints.sqlite"
+        )
+        self.github_client = Github(
+            auth=Auth.Token(BENCHMARK_TOKEN),
+            base_url=server.url,
+            per_page=100,
+            pool_size=max_workers,
+            seconds_between_requests=None,
+        )
+
+    def landscape_graphql(self, org_names: List[str]) -> int:
+        """
+        Runs the GraphQL landscape crawl, writing records to Parquet
+        (as with the landscape notebook) and returning the number of records.
+        """
+
+        return LandscapeParquetWriter(
+            path=self.workdir / "software-landscape-records-graphql"
+        ).write_all(
+            iter_github_metrics_graphql(
+                org_names=org_names,
+                token=BENCHMARK_TOKEN,
+                max_workers=self.max_workers,
+                api_url=self.server.url,
+                cache=self.cache,
+                scheduler=self.scheduler,
+                readme_store=self.readme_store,
+            )
+        )
+
+    def landscape_rest(self, org_names: List[str]) -> int:
+        """
+        Runs the REST landscape crawl, writing records to Parquet (which
+        checks REST records against the landscape schema) and returning
+        the number of records.
+        """
+
+        return LandscapeParquetWriter(
+            path=self.workdir / "software-landscape-records-rest"
+        ).write_all(
+            iter_github_metrics(
+                github_client=self.github_client,
+                org_names=org_names,
+                max_workers=self.max_workers,
+                token=BENCHMARK_TOKEN,
+                api_url=self.server.url,
+                session=self.session,
+                readme_store=self.readme_store,
+            )
+        )
+
+    def landscape_refresh(self, org_names: List[str]) -> int:
+        """
+        Runs an incremental (manifest-driven) GraphQL landscape refresh,
+        writing records to Parquet and returning the number of records.
+        """
+
+        return LandscapeParquetWriter(path=self.records_path).write_all(
+            refresh_landscape_records(
+                org_names=org_names,
+                session=self.session,
+                gather=lambda owner, owner_type, full_names: iter_github_metrics_graphql(
+                    org_names=[owner],
+                    token=BENCHMARK_TOKEN,
+                    max_workers=self.max_workers,
+                    api_url=self.server.url,
+                    cache=self.cache,
+                    scheduler=self.scheduler,
+                    readme_store=self.readme_store,
+                    only_repos=full_names,
+                ),
+                manifest=self.manifest,
+                records_path=self.records_path,
+                api_url=self.server.url,
+            )
+        )
+
+    def contributions(self, org_names: List[str]) -> int:
+        """
+        Runs the contribution event crawl, returning the number of repos.
+        """
+
+        repos = [
+            repo
+            for org_name in org_names
+            for repo in self.github_client.get_organization(org_name).get_repos()
+        ]
+        store_repo_events(
+            repos=repos,
+            since=datetime(2022, 7, 1),
+            session=self.session,
+            event_store=self.event_store,
+            checkpoint=self.checkpoint,
+            api_url=self.server.url,
+        )
+
+        return len(repos)
+
+
+def run_benchmark(
+    repo_counts: List[int],
+    scenarios: Optional[List[str]] = None,
+    max_workers: int = 8,
+    requests_per_second: float = 1000.0,
+    rate_limit: int = 5000,
+    warm: bool = True,
+    changed_fraction: float = 0.1,
+) -> pd.DataFrame:
+    """
+    Benchmarks each crawl against a synthesized org for each repository
+    count, returning wall time and request counts for each run.
+
+    Before the warm run of the landscape refresh, changed_fraction of the
+    repositories are pushed to and the response cache is cleared, to
+    simulate a later (for example, weekly) refresh.
+    """
+
+    results = []
+    with FakeGitHubServer(
+        orgs={f"bench-org-{count}": count for count in repo_counts},
+        rate_limit=rate_limit,
+    ) as server:
+        for scenario in scenarios or SCENARIOS:
+            for count in repo_counts:
+                with tempfile.TemporaryDirectory() as workdir:
+                    environment = CrawlEnvironment(
+                        server=server,
+                        workdir=pathlib.Path(workdir),
+                        max_workers=max_workers,
+                        requests_per_second=requests_per_second,
+                    )
+                    crawl: Callable[[List[str]], int] = getattr(
+                        environment, scenario.replace("-", "_")
+                    )
+                    for run in ["cold", "warm"] if warm else ["cold"]:
+                        if run == "warm" and scenario == "landscape-refresh":
+                            server.touch_repos(f"bench-org-{count}", changed_fraction)
+                            environment.cache.clear()
+                        results.append(
+                            dict(
+                                scenario=scenario,
+                                repos=count,
+                                run=run,
+                                **measure(server, crawl, [f"bench-org-{count}"]),
+                            )
+                        )
+
+    return pd.DataFrame(results)
+
+
+def measure(
+    server: FakeGitHubServer, crawl: Callable[[List[str]], int], org_names: List[str]
+) -> Dict[str, Any]:
+    """
+    Measures wall time and the requests received by the server for a crawl.
+    """
+
+    server.reset_stats()
+    start = time.perf_counter()
+    gathered = crawl(org_names)
+    seconds = time.perf_counter() - start
+    stats = dict(server.stats)
+
+    return {
+        "gathered": gathered,
+        "seconds": round(seconds, 3),
+        "requests": stats["requests"],
+        "requests_per_repo": round(stats["requests"] / max(gathered, 1), 2),
+        "graphql_requests": stats["graphql"],
+        "not_modified": stats["not_modified"],
+        "rate_limited": stats["rate_limited"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Command line entry point for the crawl benchmarks.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the GitHub crawls against a local fake GitHub server."
+    )
+    parser.add_argument(
+        "--repos",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="Number of repositories for each synthesized org.",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="Crawl to benchmark (may be repeated, defaults to all).",
+    )
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=1000.0,
+        help="Request pacing for the rate limit scheduler.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=5000,
+        help="Requests allowed per token and resource each hour by the server.",
+    )
+    parser.add_argument(
+        "--cold-only", action="store_true", help="Skip the warm (cached) runs."
+    )
+    parser.add_argument(
+        "--changed-fraction",
+        type=float,
+        default=0.1,
+        help="Fraction of repositories changed before the warm landscape refresh.",
+    )
+    parser.add_argument("--output", help="Optional CSV file for the results.")
+    args = parser.parse_args(argv)
+
+    df_results = run_benchmark(
+        repo_counts=args.repos,
+        scenarios=args.scenario,
+        max_workers=args.max_workers,
+        requests_per_second=args.requests_per_second,
+        rate_limit=args.rate_limit,
+        warm=not args.cold_only,
+        changed_fraction=args.changed_fraction,
+    )
+
+    print(df_results.to_string(index=False))
+    if args.output:
+        df_results.to_csv(args.output, index=False)
+
+    return df_results
+
+
+if __name__ == "__main__":
+    main()
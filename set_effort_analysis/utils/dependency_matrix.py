@@ -0,0 +1,144 @@
+"""
+Sparse repository by dependency incidence matrix for SBOM analytics.
+
+Dependency co-occurrence, repository similarity and clustering by shared
+dependency stacks are computed with sparse matrix products, which scale
+to thousands of repositories and tens of thousands of packages.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from utils.landscape_analysis import dependency_labels
+
+
+class DependencyMatrix:
+    """
+    Binary repository by dependency (CSR) matrix built from an exploded
+    SBOM dependency table (see sbom_dependency_table).
+    """
+
+    def __init__(self, dependencies: pd.DataFrame, repos: List[str]):
+        self.repos = np.asarray(repos, dtype=object)
+
+        # (dependencies are keyed by ecosystem and name)
+        pairs = (
+            dependencies.assign(dependency=dependency_labels(dependencies))[
+                ["repo_index", "dependency"]
+            ]
+            .dropna()
+            .drop_duplicates()
+        )
+        dependency_codes, self.dependencies = pd.factorize(
+            pairs["dependency"], sort=True
+        )
+        self.dependencies = np.asarray(self.dependencies, dtype=object)
+
+        self.matrix = sparse.csr_matrix(
+            (
+                np.ones(len(pairs), dtype=np.int32),
+                (pairs["repo_index"].to_numpy(), dependency_codes),
+            ),
+            shape=(len(self.repos), len(self.dependencies)),
+        )
+
+    def dependency_counts(self) -> np.ndarray:
+        """
+        Counts the number of repositories which use each dependency.
+        """
+
+        return np.asarray(self.matrix.sum(axis=0)).ravel()
+
+    def co_occurrence(self, min_count: int = 2, top_n: int = 100) -> pd.DataFrame:
+        """
+        Counts repositories sharing each pair of dependencies, returning
+        the top_n pairs used together by at least min_count repositories.
+        """
+
+        pairs = sparse.triu(self.matrix.T @ self.matrix, k=1).tocoo()
+        keep = pairs.data >= min_count
+
+        return (
+            pd.DataFrame(
+                {
+                    "dependency_a": self.dependencies[pairs.row[keep]],
+                    "dependency_b": self.dependencies[pairs.col[keep]],
+                    "repo_count": pairs.data[keep],
+                }
+            )
+            .sort_values(by="repo_count", ascending=False)
+            .head(top_n)
+            .reset_index(drop=True)
+        )
+
+    def repo_similarity(
+        self, metric: str = "jaccard", rows: Optional[np.ndarray] = None
+    ) -> sparse.csr_matrix:
+        """
+        Computes repository similarity ("jaccard" or "cosine") over shared
+        dependencies as a sparse matrix (repositories sharing no
+        dependencies are left as implicit zeros), for all pairs or
+        only from the repositories at rows.
+        """
+
+        rows = np.arange(len(self.repos)) if rows is None else np.asarray(rows)
+        shared = (self.matrix[rows] @ self.matrix.T).tocoo()
+        sizes = np.asarray(self.matrix.sum(axis=1)).ravel()
+        row_sizes = sizes[rows][shared.row]
+        col_sizes = sizes[shared.col]
+
+        if metric == "jaccard":
+            scores = shared.data / (row_sizes + col_sizes - shared.data)
+        elif metric == "cosine":
+            scores = shared.data / np.sqrt(row_sizes * col_sizes)
+        else:
+            raise ValueError(f"Unknown similarity metric: {metric}")
+
+        return sparse.csr_matrix((scores, (shared.row, shared.col)), shape=shared.shape)
+
+    def most_similar_repos(
+        self, repo: str, metric: str = "jaccard", top_n: int = 10
+    ) -> pd.DataFrame:
+        """
+        Finds the repositories with the most similar dependencies to a repo.
+        """
+
+        index = int(np.flatnonzero(self.repos == repo)[0])
+        row = self.repo_similarity(metric=metric, rows=[index]).tocoo()
+        others = row.col != index
+
+        return (
+            pd.DataFrame(
+                {"repo": self.repos[row.col[others]], "similarity": row.data[others]}
+            )
+            .sort_values(by="similarity", ascending=False)
+            .head(top_n)
+            .reset_index(drop=True)
+        )
+
+    def cluster_repos(
+        self, threshold: float = 0.5, metric: str = "jaccard"
+    ) -> pd.DataFrame:
+        """
+        Clusters repositories by shared dependency stacks, linking
+        repositories with at least threshold similarity and labeling the
+        connected groups. Repositories without dependencies are excluded.
+        """
+
+        similarity = self.repo_similarity(metric=metric)
+        similarity.data = (similarity.data >= threshold).astype(np.int8)
+        similarity.eliminate_zeros()
+        _, labels = connected_components(similarity, directed=False)
+
+        has_dependencies = np.asarray(self.matrix.sum(axis=1)).ravel() > 0
+        df_clusters = pd.DataFrame({"repo": self.repos, "cluster": labels})[
+            has_dependencies
+        ]
+
+        return df_clusters.assign(
+            cluster_size=df_clusters.groupby("cluster")["repo"].transform("size")
+        ).sort_values(by=["cluster_size", "cluster"], ascending=[False, True])
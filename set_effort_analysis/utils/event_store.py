@@ -0,0 +1,301 @@
+"""
+DuckDB-backed store of raw GitHub issue, pull request and review events.
+
+Contribution counters are computed with SQL over the stored events, so
+slicing by member, month, org or reporting period does not require
+crawling GitHub again.
+"""
+
+import pathlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import duckdb
+import pandas as pd
+
+# default location for the contribution event store
+DEFAULT_EVENT_STORE_PATH = (
+    pathlib.Path(__file__).parents[2]
+    / "data/github.com/github-contribution-events.duckdb"
+)
+
+# columns for each stored table
+ITEM_COLUMNS = [
+    "repo",
+    "org",
+    "number",
+    "kind",
+    "author",
+    "state",
+    "created_at",
+    "updated_at",
+    "closed_at",
+]
+REVIEW_COLUMNS = ["repo", "number", "reviewer", "submitted_at"]
+
+# items and reviews counted as set member contributions within each
+# reporting period (provided as a periods table with period, date_start and
+# date_end columns) for set members (provided as a set_members table).
+# periods include the whole day of date_end (events before the next day).
+CONTRIBUTION_EVENTS_CTE = """
+WITH periods_bounds AS (
+    SELECT period, date_start, date_end + INTERVAL 1 DAY AS date_after
+    FROM periods
+),
+in_range_items AS (
+    SELECT periods_bounds.period, github_items.* FROM github_items
+    JOIN periods_bounds ON
+        (
+            github_items.created_at >= periods_bounds.date_start
+            AND github_items.created_at < periods_bounds.date_after
+        )
+        OR (
+            github_items.closed_at >= periods_bounds.date_start
+            AND github_items.closed_at < periods_bounds.date_after
+        )
+        OR (
+            github_items.updated_at >= periods_bounds.date_start
+            AND github_items.updated_at < periods_bounds.date_after
+        )
+),
+member_items AS (
+    SELECT * FROM in_range_items
+    WHERE author IN (SELECT login FROM set_members)
+),
+member_reviews AS (
+    SELECT in_range_items.period, github_reviews.repo FROM github_reviews
+    JOIN in_range_items ON
+        github_reviews.repo = in_range_items.repo
+        AND github_reviews.number = in_range_items.number
+    JOIN periods_bounds ON periods_bounds.period = in_range_items.period
+    -- if the reviewer is one of the set members
+    WHERE github_reviews.reviewer IN (SELECT login FROM set_members)
+        -- if the reviewer is not the pull request author
+        AND (
+            in_range_items.author IS NULL
+            OR github_reviews.reviewer != in_range_items.author
+        )
+        AND github_reviews.submitted_at >= periods_bounds.date_start
+        AND github_reviews.submitted_at < periods_bounds.date_after
+)
+"""
+
+# contribution counters for each period computed from the stored events
+CONTRIBUTION_COUNTS_SQL = (
+    CONTRIBUTION_EVENTS_CTE
+    + """
+SELECT
+    periods.period,
+    COALESCE(item_counts.open_prs, 0) AS open_prs,
+    COALESCE(item_counts.closed_prs, 0) AS closed_prs,
+    COALESCE(review_counts.reviewed_prs, 0) AS reviewed_prs,
+    COALESCE(item_counts.open_issues, 0) AS open_issues,
+    COALESCE(item_counts.closed_issues, 0) AS closed_issues
+FROM periods
+LEFT JOIN (
+    SELECT
+        period,
+        SUM(CASE WHEN kind = 'pull_request' AND state = 'open' THEN 1 ELSE 0 END)
+            AS open_prs,
+        SUM(CASE WHEN kind = 'pull_request' AND state = 'closed' THEN 1 ELSE 0 END)
+            AS closed_prs,
+        SUM(CASE WHEN kind = 'issue' AND state = 'open' THEN 1 ELSE 0 END)
+            AS open_issues,
+        SUM(CASE WHEN kind = 'issue' AND state = 'closed' THEN 1 ELSE 0 END)
+            AS closed_issues
+    FROM member_items GROUP BY period
+) AS item_counts ON item_counts.period = periods.period
+LEFT JOIN (
+    SELECT period, COUNT(*) AS reviewed_prs FROM member_reviews GROUP BY period
+) AS review_counts ON review_counts.period = periods.period
+ORDER BY periods.date_start, periods.date_end, periods.period
+"""
+)
+
+# repos touched by contributions counted above for each period
+TOUCHED_REPOS_SQL = (
+    CONTRIBUTION_EVENTS_CTE
+    + """
+SELECT period, repo FROM member_items
+UNION
+SELECT period, repo FROM member_reviews
+ORDER BY period, repo
+"""
+)
+
+
+class ContributionEventStore:
+    """
+    Stores issue, pull request and review events by repository within
+    a DuckDB database and computes contribution counters from them.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path] = DEFAULT_EVENT_STORE_PATH):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.connection = duckdb.connect(str(self.path))
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS github_items (
+                repo VARCHAR,
+                org VARCHAR,
+                number INTEGER,
+                kind VARCHAR,
+                author VARCHAR,
+                state VARCHAR,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                closed_at TIMESTAMP
+            )
+            """
+        )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS github_reviews (
+                repo VARCHAR,
+                number INTEGER,
+                reviewer VARCHAR,
+                submitted_at TIMESTAMP
+            )
+            """
+        )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS github_repo_coverage (
+                repo VARCHAR,
+                since TIMESTAMP
+            )
+            """
+        )
+
+    def covered_since(self, repo: str) -> Optional[datetime]:
+        """
+        Finds the date since which a repository's events were gathered,
+        or None where the repository's events have not been stored.
+        """
+
+        coverage = self.connection.execute(
+            "SELECT since FROM github_repo_coverage WHERE repo = ?", [repo]
+        ).fetchone()
+
+        return coverage[0] if coverage else None
+
+    def replace_repo_events(
+        self,
+        repo: str,
+        items: List[Dict[str, Any]],
+        reviews: List[Dict[str, Any]],
+        since: datetime,
+    ) -> None:
+        """
+        Replaces all stored events for a repository (gathered since a date,
+        which is recorded as the repository's coverage) within one
+        transaction.
+        """
+
+        df_items = pd.DataFrame(items, columns=ITEM_COLUMNS).astype(
+            {
+                "created_at": "datetime64[ns]",
+                "updated_at": "datetime64[ns]",
+                "closed_at": "datetime64[ns]",
+            }
+        )
+        df_reviews = pd.DataFrame(reviews, columns=REVIEW_COLUMNS).astype(
+            {"submitted_at": "datetime64[ns]"}
+        )
+
+        self.connection.register("df_items", df_items)
+        self.connection.register("df_reviews", df_reviews)
+        self.connection.execute("BEGIN TRANSACTION")
+        try:
+            self.connection.execute("DELETE FROM github_items WHERE repo = ?", [repo])
+            self.connection.execute("DELETE FROM github_reviews WHERE repo = ?", [repo])
+            self.connection.execute("INSERT INTO github_items SELECT * FROM df_items")
+            self.connection.execute(
+                "INSERT INTO github_reviews SELECT * FROM df_reviews"
+            )
+            self.connection.execute(
+                "DELETE FROM github_repo_coverage WHERE repo = ?", [repo]
+            )
+            self.connection.execute(
+                "INSERT INTO github_repo_coverage VALUES (?, ?)", [repo, since]
+            )
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        finally:
+            self.connection.unregister("df_items")
+            self.connection.unregister("df_reviews")
+
+    def query(self, sql: str, *params: Any) -> pd.DataFrame:
+        """
+        Runs a SQL query over the stored events (tables github_items
+        and github_reviews), returning a dataframe.
+        """
+
+        return self.connection.execute(sql, list(params)).df()
+
+    def count_contributions_by_period(
+        self,
+        set_members: List[str],
+        periods: Dict[str, Tuple[datetime, datetime]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Counts pull requests, pull request reviews and issues from
+        set_members along with the repos touched for each named period
+        (mapped to a date_start and date_end, including the whole date_end
+        day), computing every period within one query over the stored events.
+        """
+
+        df_periods = pd.DataFrame(
+            [
+                {"period": period, "date_start": date_start, "date_end": date_end}
+                for period, (date_start, date_end) in periods.items()
+            ],
+            columns=["period", "date_start", "date_end"],
+        ).astype({"date_start": "datetime64[ns]", "date_end": "datetime64[ns]"})
+
+        self.connection.register("periods", df_periods)
+        self.connection.register(
+            "set_members", pd.DataFrame({"login": list(set_members)})
+        )
+        try:
+            counts = self.connection.execute(CONTRIBUTION_COUNTS_SQL).df()
+            touched_repos = self.connection.execute(TOUCHED_REPOS_SQL).fetchall()
+        finally:
+            self.connection.unregister("periods")
+            self.connection.unregister("set_members")
+
+        return {
+            record["period"]: dict(
+                {
+                    counter: int(value)
+                    for counter, value in record.items()
+                    if counter != "period"
+                },
+                touched_repos=[
+                    repo
+                    for (period, repo) in touched_repos
+                    if period == record["period"]
+                ],
+            )
+            for record in counts.to_dict(orient="records")
+        }
+
+    def count_contributions(
+        self,
+        set_members: List[str],
+        date_start: datetime,
+        date_end: datetime,
+    ) -> Dict[str, Any]:
+        """
+        Counts pull requests, pull request reviews and issues from
+        set_members from date_start through the end of the date_end day,
+        along with the repos touched.
+        """
+
+        return self.count_contributions_by_period(
+            set_members=set_members, periods={"period": (date_start, date_end)}
+        )["period"]
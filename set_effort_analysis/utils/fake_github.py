@@ -0,0 +1,800 @@
+"""
+Local stand-in for the GitHub REST and GraphQL APIs used by the crawls.
+
+The server synthesizes deterministic orgs (or users) with any number of
+repositories, including contributors, issues, pull requests, reviews,
+languages, licenses, readmes and SBOMs, and answers requests with GitHub
+style pagination (Link headers), ETags and rate limit headers. Crawls
+may be pointed at it through their api_url (or the PyGithub base_url) to
+measure and compare request counts and wall time without a token or
+network access.
+"""
+
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# date from which synthetic timestamps are spread
+BASE_DATE = datetime(2021, 7, 1)
+
+# language, license and package pools for synthetic repositories
+LANGUAGES = ["Python", "Jupyter Notebook", "R", "JavaScript", "Shell", "TypeScript"]
+LICENSES = ["MIT", "BSD-3-Clause", "Apache-2.0", "GPL-3.0"]
+PACKAGES = [
+    ("pip", "pypi", name)
+    for name in ["numpy", "pandas", "scipy", "requests", "pyyaml", "matplotlib"]
+] + [("npm", "npm", name) for name in ["react", "d3", "lodash", "typescript"]]
+
+
+def _timestamp(date: datetime) -> str:
+    """
+    Formats a date as a GitHub API timestamp.
+    """
+
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _seed(*parts: Any) -> int:
+    """
+    Forms a deterministic number from values (for synthetic variation).
+    """
+
+    return zlib.crc32("/".join(str(part) for part in parts).encode("utf-8"))
+
+
+class FakeGitHubServer:
+    """
+    Threaded HTTP server synthesizing GitHub API responses for the given
+    orgs and users (each mapped to their number of repositories).
+
+    Requests count against a per-token, per-resource (core, search,
+    graphql) quota of rate_limit requests each rate_limit_window seconds,
+    with 403 responses once a quota is exhausted. Conditional requests
+    matching a response ETag are answered with 304 Not Modified and do not
+    count against quotas (as with GitHub). Exhausted quotas and secondary
+    rate limits (403 with Retry-After) may also be injected, with quota
+    times taken from clock so schedulers may be checked without waiting.
+    """
+
+    def __init__(
+        self,
+        orgs: Optional[Dict[str, int]] = None,
+        users: Optional[Dict[str, int]] = None,
+        contributors_per_repo: int = 5,
+        contributor_pool: int = 50,
+        issues_per_repo: int = 10,
+        reviews_per_pull: int = 1,
+        rate_limit: int = 5000,
+        rate_limit_window: int = 60 * 60,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.owners = {
+            **{name: ("Organization", count) for name, count in (orgs or {}).items()},
+            **{name: ("User", count) for name, count in (users or {}).items()},
+        }
+        self.contributors_per_repo = contributors_per_repo
+        self.contributor_pool = contributor_pool
+        self.issues_per_repo = issues_per_repo
+        self.reviews_per_pull = reviews_per_pull
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.clock = clock
+
+        # (time, token, resource, status) for each request
+        self.request_log: List[Tuple[float, str, str, int]] = []
+
+        self._secondary_limits: List[float] = []
+        self._revisions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._quotas: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.stats: Dict[str, int] = {}
+        self.reset_stats()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self, "GET")
+
+            def do_POST(self):
+                server._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base url for the server (used in place of https://api.github.com).
+        """
+
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGitHubServer":
+        """
+        Starts serving requests from a background thread.
+        """
+
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeGitHubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        """
+        Resets the request counts (total, by resource, not modified and
+        rate limited) and the request log.
+        """
+
+        with self._lock:
+            self.request_log = []
+            self.stats = {
+                "requests": 0,
+                "core": 0,
+                "search": 0,
+                "graphql": 0,
+                "not_modified": 0,
+                "rate_limited": 0,
+            }
+
+    def touch_repos(self, owner: str, fraction: float) -> List[str]:
+        """
+        Simulates pushes to a fraction of an owner's repositories (evenly
+        spread), changing their pushed and updated dates and default branch
+        commit sha. Returns the full names of the changed repositories.
+        """
+
+        names = self.repo_names(owner)
+        step = max(1, round(1 / fraction)) if fraction > 0 else len(names) + 1
+        touched = [f"{owner}/{name}" for name in names[::step]]
+        with self._lock:
+            for full_name in touched:
+                self._revisions[full_name] = self._revisions.get(full_name, 0) + 1
+
+        return touched
+
+    # synthetic data
+
+    def repo_names(self, owner: str) -> List[str]:
+        """
+        Lists the synthetic repository names for an owner.
+        """
+
+        return [f"repo-{idx:04d}" for idx in range(self.owners[owner][1])]
+
+    def _owner(self, login: str) -> Dict[str, Any]:
+        """
+        Forms the org or user payload for a login.
+        """
+
+        kind = self.owners[login][0] if login in self.owners else "User"
+        return {
+            "login": login,
+            "id": _seed("owner", login) % 10**8,
+            "type": kind,
+            "name": f"{login.replace('-', ' ').title()}",
+            "url": f"{self.url}/{'orgs' if kind == 'Organization' else 'users'}/{login}",
+            "repos_url": f"{self.url}/{'orgs' if kind == 'Organization' else 'users'}/{login}/repos",
+            "public_repos": self.owners.get(login, (kind, 0))[1],
+        }
+
+    def _contributors(self, full_name: str) -> List[str]:
+        """
+        Chooses contributor logins for a repository from the contributor pool.
+        """
+
+        start = _seed("contributors", full_name)
+        return [
+            f"contributor-{(start + idx) % self.contributor_pool:03d}"
+            for idx in range(min(self.contributors_per_repo, self.contributor_pool))
+        ]
+
+    def _languages(self, full_name: str) -> Dict[str, int]:
+        """
+        Forms the detected language byte counts for a repository.
+        """
+
+        seed = _seed("languages", full_name)
+        return {
+            LANGUAGES[(seed + idx) % len(LANGUAGES)]: (seed >> (idx * 4)) % 50000 + 100
+            for idx in range(seed % 3 + 1)
+        }
+
+    def _license(self, full_name: str) -> Optional[str]:
+        """
+        Chooses the license SPDX ID for a repository (some have none).
+        """
+
+        seed = _seed("license", full_name)
+        return None if seed % 5 == 0 else LICENSES[seed % len(LICENSES)]
+
+    def _readme(self, full_name: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Forms the readme blob sha and contents for a repository
+        (some have none).
+        """
+
+        if _seed("readme", full_name) % 7 == 0:
+            return None
+        content = (
+            f"# {full_name.split('/')[1]}\n\nSynthetic repository {full_name} "
+            f"using {', '.join(self._languages(full_name))}.\n"
+        ).encode("utf-8")
+        # git blob sha of the contents
+        sha = hashlib.sha1(
+            b"blob %d\0" % len(content) + content, usedforsecurity=False
+        ).hexdigest()
+        return sha, content
+
+    def _repo(self, owner: str, name: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Forms the repository payload, as listed or (where full) as
+        returned for a single repository.
+        """
+
+        full_name = f"{owner}/{name}"
+        seed = _seed("repo", full_name)
+        revision = self._revisions.get(full_name, 0)
+        license_id = self._license(full_name)
+        repo = {
+            "id": seed % 10**9,
+            "node_id": f"R_{seed}",
+            "name": name,
+            "full_name": full_name,
+            "owner": self._owner(owner),
+            "private": False,
+            "description": f"Synthetic repository {name} of {owner}",
+            "fork": False,
+            "url": f"{self.url}/repos/{full_name}",
+            "html_url": f"https://github.com/{full_name}",
+            "created_at": _timestamp(BASE_DATE - timedelta(days=seed % 2000)),
+            "updated_at": _timestamp(BASE_DATE + timedelta(days=seed % 700 + revision)),
+            "pushed_at": _timestamp(BASE_DATE + timedelta(days=seed % 650 + revision)),
+            "size": seed % 100000,
+            "stargazers_count": seed % 300,
+            "watchers_count": seed % 300,
+            "forks_count": seed % 40,
+            "open_issues_count": self.issues_per_repo // 2,
+            "archived": seed % 11 == 0,
+            "default_branch": "main",
+            "topics": [f"topic-{seed % 9}", f"topic-{seed % 13}"],
+            "license": (
+                {"key": license_id.lower(), "spdx_id": license_id, "name": license_id}
+                if license_id
+                else None
+            ),
+        }
+        # (as with github) these are only included for single repositories
+        if full:
+            repo.update({"network_count": seed % 40, "subscribers_count": seed % 30})
+
+        return repo
+
+    def _issues(self, full_name: str) -> List[Dict[str, Any]]:
+        """
+        Forms the issues and pull requests (every second item) of a repository.
+        """
+
+        seed = _seed("issues", full_name)
+        contributors = self._contributors(full_name)
+        issues = []
+        for number in range(1, self.issues_per_repo + 1):
+            created_at = BASE_DATE + timedelta(days=(seed + number * 37) % 700)
+            updated_at = created_at + timedelta(days=number % 30)
+            closed = number % 3 == 0
+            issue = {
+                "id": seed % 10**6 * 1000 + number,
+                "number": number,
+                "title": f"Synthetic item {number}",
+                "user": {"login": contributors[number % len(contributors)]},
+                "state": "closed" if closed else "open",
+                "created_at": _timestamp(created_at),
+                "updated_at": _timestamp(updated_at),
+                "closed_at": _timestamp(updated_at) if closed else None,
+                "url": f"{self.url}/repos/{full_name}/issues/{number}",
+                "repository_url": f"{self.url}/repos/{full_name}",
+            }
+            if number % 2 == 0:
+                issue["pull_request"] = {
+                    "url": f"{self.url}/repos/{full_name}/pulls/{number}"
+                }
+            issues.append(issue)
+
+        return issues
+
+    def _sbom(self, full_name: str) -> Dict[str, Any]:
+        """
+        Forms the SPDX SBOM for a repository from the package pool.
+        """
+
+        seed = _seed("sbom", full_name)
+        packages = [
+            PACKAGES[(seed + idx) % len(PACKAGES)] for idx in range(seed % 5 + 1)
+        ]
+        return {
+            "sbom": {
+                "SPDXID": "SPDXRef-DOCUMENT",
+                "spdxVersion": "SPDX-2.3",
+                "name": f"com.github.{full_name}",
+                "documentNamespace": f"https://spdx.org/spdxdocs/{full_name}",
+                "creationInfo": {
+                    "created": _timestamp(BASE_DATE),
+                    "creators": ["Tool: GitHub.com-Dependency-Graph"],
+                },
+                "packages": [
+                    {
+                        "SPDXID": f"SPDXRef-{prefix}-{name}",
+                        "name": f"{prefix}:{name}",
+                        "versionInfo": f"1.{(seed + idx) % 10}.0",
+                        "downloadLocation": "NOASSERTION",
+                        "externalRefs": [
+                            {
+                                "referenceCategory": "PACKAGE-MANAGER",
+                                "referenceType": "purl",
+                                "referenceLocator": f"pkg:{purl_type}/{name}@1.{(seed + idx) % 10}.0",
+                            }
+                        ],
+                    }
+                    for idx, (prefix, purl_type, name) in enumerate(packages)
+                ],
+                "relationships": [],
+            }
+        }
+
+    # request handling
+
+    def exhaust_quota(self, token: str, resource: str, reset_after: float) -> None:
+        """
+        Exhausts a token's quota for a resource until reset_after seconds
+        from now (as if spent by another client).
+        """
+
+        with self._lock:
+            self._quotas[(token, resource)] = {
+                "remaining": 0,
+                "reset": self.clock() + reset_after,
+            }
+
+    def add_secondary_rate_limits(self, count: int, retry_after: float) -> None:
+        """
+        Answers the next count requests with secondary rate limit responses
+        (403 with a Retry-After of retry_after seconds).
+        """
+
+        with self._lock:
+            self._secondary_limits.extend([retry_after] * count)
+
+    def _charge(self, token: str, resource: str) -> Tuple[bool, Dict[str, str]]:
+        """
+        Counts a request against a token's quota, returning whether the
+        quota allowed it and the rate limit headers for the response.
+        """
+
+        with self._lock:
+            now = self.clock()
+            quota = self._quotas.get((token, resource))
+            if quota is None or quota["reset"] <= now:
+                quota = {
+                    "remaining": self.rate_limit,
+                    "reset": now + self.rate_limit_window,
+                }
+                self._quotas[(token, resource)] = quota
+
+            allowed = quota["remaining"] > 0
+            if allowed:
+                quota["remaining"] -= 1
+            else:
+                self.stats["rate_limited"] += 1
+
+            return allowed, {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(int(quota["remaining"])),
+                "X-RateLimit-Reset": str(int(quota["reset"])),
+                "X-RateLimit-Used": str(int(self.rate_limit - quota["remaining"])),
+                "X-RateLimit-Resource": resource,
+            }
+
+    def _paginate(
+        self, items: List[Any], path: str, query: Dict[str, str]
+    ) -> Tuple[List[Any], Dict[str, str]]:
+        """
+        Selects a page of items with GitHub style Link headers.
+        """
+
+        per_page = min(int(query.get("per_page", 30)), 100)
+        page = int(query.get("page", 1))
+        last = max(1, -(-len(items) // per_page))
+
+        def page_url(number: int) -> str:
+            return f"{self.url}{path}?{urlencode(dict(query, page=number))}"
+
+        links = []
+        if page < last:
+            links += [
+                f'<{page_url(page + 1)}>; rel="next"',
+                f'<{page_url(last)}>; rel="last"',
+            ]
+        if page > 1:
+            links += [
+                f'<{page_url(page - 1)}>; rel="prev"',
+                f'<{page_url(1)}>; rel="first"',
+            ]
+
+        return (
+            items[(page - 1) * per_page : page * per_page],
+            {"Link": ", ".join(links)} if links else {},
+        )
+
+    def _rest(
+        self, path: str, query: Dict[str, str]
+    ) -> Tuple[int, Any, Dict[str, str]]:
+        """
+        Answers a REST request, returning the status, json body and headers.
+        """
+
+        not_found = (404, {"message": "Not Found"}, {})
+
+        match = re.fullmatch(r"/(orgs|users)/([^/]+)(/repos)?", path)
+        if match:
+            kind, login, repos = match.groups()
+            # (as with github) orgs may also be found through /users
+            if (
+                kind == "orgs"
+                and self.owners.get(login, ("User",))[0] != "Organization"
+            ):
+                return not_found
+            if not repos:
+                return 200, self._owner(login), {}
+            if login not in self.owners:
+                return not_found
+            items, headers = self._paginate(
+                [self._repo(login, name) for name in self.repo_names(login)],
+                path,
+                query,
+            )
+            return 200, items, headers
+
+        match = re.fullmatch(r"/repos/([^/]+)/([^/]+)(/.*)?", path)
+        if not match:
+            return not_found
+        owner, name, endpoint = match.groups()
+        if owner not in self.owners or name not in self.repo_names(owner):
+            return not_found
+        full_name = f"{owner}/{name}"
+
+        if endpoint is None:
+            return 200, self._repo(owner, name, full=True), {}
+        if endpoint == "/languages":
+            return 200, self._languages(full_name), {}
+        if endpoint == "/dependency-graph/sbom":
+            return 200, self._sbom(full_name), {}
+        if endpoint == "/license":
+            license_id = self._license(full_name)
+            if license_id is None:
+                return not_found
+            return (
+                200,
+                {
+                    "name": "LICENSE",
+                    "path": "LICENSE",
+                    "license": {
+                        "key": license_id.lower(),
+                        "name": license_id,
+                        "spdx_id": license_id,
+                    },
+                },
+                {},
+            )
+        if endpoint == "/readme":
+            readme = self._readme(full_name)
+            if readme is None:
+                return not_found
+            sha, content = readme
+            return (
+                200,
+                {
+                    "type": "file",
+                    "encoding": "base64",
+                    "name": "README.md",
+                    "path": "README.md",
+                    "size": len(content),
+                    "sha": sha,
+                    "content": base64.b64encode(content).decode("ascii"),
+                },
+                {},
+            )
+        if endpoint == "/contributors":
+            items, headers = self._paginate(
+                [
+                    {
+                        "login": login,
+                        "id": _seed("user", login) % 10**8,
+                        "type": "User",
+                        "url": f"{self.url}/users/{login}",
+                        "contributions": _seed(full_name, login) % 200 + 1,
+                    }
+                    for login in self._contributors(full_name)
+                ],
+                path,
+                query,
+            )
+            return 200, items, headers
+        match = re.fullmatch(r"/issues/(\d+)", endpoint)
+        if match:
+            issue = next(
+                (
+                    issue
+                    for issue in self._issues(full_name)
+                    if issue["number"] == int(match.group(1))
+                ),
+                None,
+            )
+            return (200, issue, {}) if issue else not_found
+        if endpoint == "/issues":
+            issues = self._issues(full_name)
+            state = query.get("state", "open")
+            if state != "all":
+                issues = [issue for issue in issues if issue["state"] == state]
+            if "since" in query:
+                issues = [
+                    issue
+                    for issue in issues
+                    if issue["updated_at"] >= query["since"][:19] + "Z"
+                ]
+            issues.sort(
+                key=lambda issue: issue[f"{query.get('sort', 'created')}_at"],
+                reverse=query.get("direction", "desc") == "desc",
+            )
+            items, headers = self._paginate(issues, path, query)
+            return 200, items, headers
+
+        return not_found
+
+    def _graphql(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answers the GraphQL queries made by the crawls (repository pages,
+        user names, blob texts and pull request reviews).
+        """
+
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+
+        if "repositoryOwner" in query:
+            login = variables.get("login")
+            if login not in self.owners:
+                return {"data": {"repositoryOwner": None}}
+            first = int(re.search(r"repositories\(first: (\d+)", query).group(1))
+            offset = int(variables.get("cursor") or 0)
+            names = self.repo_names(login)
+            return {
+                "data": {
+                    "repositoryOwner": {
+                        "__typename": self.owners[login][0],
+                        "repositories": {
+                            "pageInfo": {
+                                "hasNextPage": offset + first < len(names),
+                                "endCursor": str(offset + first),
+                            },
+                            "nodes": [
+                                self._graphql_repo(login, name)
+                                for name in names[offset : offset + first]
+                            ],
+                        },
+                    }
+                }
+            }
+
+        data = {}
+        for alias, login in re.findall(r"(u\d+): user\(login: (\"[^\"]*\")\)", query):
+            data[alias] = {"name": self._owner(json.loads(login))["name"]}
+
+        for alias, owner, name, sha in re.findall(
+            r"(b\d+): repository\(owner: (\"[^\"]*\"), name: (\"[^\"]*\")\) "
+            r"\{ object\(oid: (\"[^\"]*\")\)",
+            query,
+        ):
+            readme = self._readme(f"{json.loads(owner)}/{json.loads(name)}")
+            data[alias] = {
+                "object": (
+                    {"text": readme[1].decode("utf-8")}
+                    if readme and readme[0] == json.loads(sha)
+                    else None
+                )
+            }
+
+        pulls = re.findall(r"pr(\d+): pullRequest\(number: \d+\)", query)
+        if pulls:
+            full_name = f"{variables.get('owner')}/{variables.get('name')}"
+            issues = {issue["number"]: issue for issue in self._issues(full_name)}
+            contributors = self._contributors(full_name)
+            data["repository"] = {
+                f"pr{number}": {
+                    "reviews": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        "nodes": [
+                            {
+                                "author": {
+                                    "login": contributors[
+                                        (int(number) + idx + 1) % len(contributors)
+                                    ]
+                                },
+                                "submittedAt": issues[int(number)]["updated_at"],
+                            }
+                            for idx in range(self.reviews_per_pull)
+                        ],
+                    }
+                }
+                if int(number) in issues and "pull_request" in issues[int(number)]
+                else None
+                for number in pulls
+            }
+
+        return {"data": data}
+
+    def _graphql_repo(self, owner: str, name: str) -> Dict[str, Any]:
+        """
+        Forms the GraphQL repository node requested by the landscape crawl
+        and manifest listing.
+        """
+
+        repo = self._repo(owner, name, full=True)
+        full_name = repo["full_name"]
+        readme = self._readme(full_name)
+        open_issues = [
+            issue for issue in self._issues(full_name) if issue["state"] == "open"
+        ]
+
+        return {
+            "name": name,
+            "nameWithOwner": full_name,
+            "databaseId": repo["id"],
+            "diskUsage": repo["size"],
+            "isArchived": repo["archived"],
+            "createdAt": repo["created_at"],
+            "pushedAt": repo["pushed_at"],
+            "updatedAt": repo["updated_at"],
+            "defaultBranchRef": {
+                "target": {
+                    "oid": hashlib.sha1(
+                        f"{full_name}@{repo['pushed_at']}".encode("utf-8"),
+                        usedforsecurity=False,
+                    ).hexdigest()
+                }
+            },
+            "stargazerCount": repo["stargazers_count"],
+            "forkCount": repo["forks_count"],
+            "watchers": {"totalCount": repo["subscribers_count"]},
+            "issues": {
+                "totalCount": sum("pull_request" not in issue for issue in open_issues)
+            },
+            "pullRequests": {
+                "totalCount": sum("pull_request" in issue for issue in open_issues)
+            },
+            "licenseInfo": (
+                {"spdxId": repo["license"]["spdx_id"]} if repo["license"] else None
+            ),
+            "repositoryTopics": {
+                "nodes": [{"topic": {"name": topic}} for topic in repo["topics"]]
+            },
+            "description": repo["description"],
+            "languages": {
+                "edges": [
+                    {"size": size, "node": {"name": language}}
+                    for language, size in self._languages(full_name).items()
+                ]
+            },
+            "readmeMd": {"oid": readme[0]} if readme else None,
+            "readmeRst": None,
+            "readmeTxt": None,
+            "readme": None,
+            "readmeLower": None,
+        }
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        """
+        Answers a request, applying rate limits and conditional requests.
+        """
+
+        url = urlsplit(handler.path)
+        path = url.path.rstrip("/")
+        query = dict(parse_qsl(url.query))
+        resource = (
+            "graphql"
+            if path == "/graphql"
+            else "search"
+            if path.startswith("/search/")
+            else "core"
+        )
+        request_body = handler.rfile.read(
+            int(handler.headers.get("Content-Length") or 0)
+        )
+        # (quotas are tracked by token, without the authorization scheme)
+        token = handler.headers.get("Authorization", "").split(" ")[-1]
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[resource] += 1
+            retry_after = (
+                self._secondary_limits.pop(0) if self._secondary_limits else None
+            )
+
+        if method == "POST" and path == "/graphql":
+            status, body, headers = 200, self._graphql(json.loads(request_body)), {}
+        elif method == "GET" and path == "/search/issues":
+            status, body, headers = (
+                200,
+                {"total_count": 0, "incomplete_results": False, "items": []},
+                {},
+            )
+        elif method == "GET":
+            status, body, headers = self._rest(path, query)
+        else:
+            status, body, headers = 404, {"message": "Not Found"}, {}
+
+        content = json.dumps(body).encode("utf-8")
+        etag = '"{}"'.format(hashlib.sha256(content).hexdigest()[:32])
+
+        if retry_after is not None:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            status = 403
+            content = json.dumps(
+                {"message": "You have exceeded a secondary rate limit."}
+            ).encode("utf-8")
+            headers = {"Retry-After": str(int(retry_after))}
+        elif status == 200 and handler.headers.get("If-None-Match") == etag:
+            with self._lock:
+                self.stats["not_modified"] += 1
+            status, content = 304, b""
+            headers = {"ETag": etag}
+        else:
+            allowed, rate_headers = self._charge(token, resource)
+            headers = dict(headers, **rate_headers)
+            if not allowed:
+                status = 403
+                content = json.dumps(
+                    {"message": "API rate limit exceeded for this token."}
+                ).encode("utf-8")
+            elif status == 200:
+                headers["ETag"] = etag
+
+        with self._lock:
+            self.request_log.append((self.clock(), token, resource, status))
+
+        handler.send_response(status)
+        for header, value in headers.items():
+            handler.send_header(header, value)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
@@ -0,0 +1,258 @@
+"""
+Local stand-in for the Toggl Track workspace and detailed reports APIs.
+
+The server synthesizes deterministic time entries for every weekday
+from a start date and answers detailed report requests with Toggl style
+pagination (total_count and per_page), rejecting date ranges longer
+than the reports API allows. The Toggl collector may be pointed at it
+through its api_url to measure and compare request counts without a
+token or network access.
+"""
+
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from utils.fake_github import _seed
+
+# client, project and description pools for synthetic time entries
+CLIENTS = ["Way Lab", "DBMI Administration", "Greene Lab"]
+PROJECTS = ["Software Engineering", "Operations", "Outreach"]
+DESCRIPTIONS = [
+    "PR Review",
+    "pycytominer development",
+    "CytoTable development",
+    "Team meeting",
+    "BSSw blog post",
+    "Hiring interviews",
+    "Cloud storage planning",
+]
+
+# number of entries on each page of a detailed report (fixed by Toggl)
+DETAILS_PER_PAGE = 50
+
+# longest date range (in days) accepted by the reports API
+MAX_REPORT_DAYS = 365
+
+
+class FakeTogglServer:
+    """
+    Threaded HTTP server synthesizing Toggl responses for one workspace
+    with up to entries_per_day time entries on each weekday from
+    start_date.
+
+    Where requests_per_second is provided, requests arriving faster than
+    it allows are answered with 429 Too Many Requests (as Toggl does).
+    """
+
+    def __init__(
+        self,
+        start_date: date = date(2022, 1, 1),
+        entries_per_day: int = 12,
+        workspace_id: int = 1234567,
+        requests_per_second: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.start_date = start_date
+        self.entries_per_day = entries_per_day
+        self.workspace_id = workspace_id
+        self.requests_per_second = requests_per_second
+
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+        self.stats: Dict[str, int] = {}
+        self.reset_stats()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base url for the server (used in place of https://api.track.toggl.com).
+        """
+
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeTogglServer":
+        """
+        Starts serving requests from a background thread.
+        """
+
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeTogglServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        """
+        Resets the request counts (total, by endpoint, rejected and
+        rate limited).
+        """
+
+        with self._lock:
+            self.stats = {
+                "requests": 0,
+                "workspaces": 0,
+                "details": 0,
+                "rejected": 0,
+                "rate_limited": 0,
+            }
+
+    # synthetic data
+
+    def entries(self, day: date) -> List[Dict[str, Any]]:
+        """
+        Forms the time entries for a day (none on weekends or before the
+        start date).
+        """
+
+        if day < self.start_date or day.weekday() >= 5:
+            return []
+
+        entries = []
+        for idx in range(_seed("toggl", day) % (self.entries_per_day + 1)):
+            start = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=8, minutes=idx * 40
+            )
+            duration = (5 + _seed("toggl", day, idx) % 35) * 60 * 1000
+            client = CLIENTS[_seed("client", day, idx) % len(CLIENTS)]
+            entries.append(
+                {
+                    "id": int(day.strftime("%Y%m%d")) * 100 + idx,
+                    "pid": 100 + idx % len(PROJECTS),
+                    "tid": None,
+                    "uid": 42,
+                    "description": DESCRIPTIONS[
+                        _seed("description", day, idx) % len(DESCRIPTIONS)
+                    ],
+                    "start": start.strftime("%Y-%m-%dT%H:%M:%S-07:00"),
+                    "end": (start + timedelta(milliseconds=duration)).strftime(
+                        "%Y-%m-%dT%H:%M:%S-07:00"
+                    ),
+                    "updated": start.strftime("%Y-%m-%dT%H:%M:%S-07:00"),
+                    "dur": duration,
+                    "user": "SET Member",
+                    "use_stop": True,
+                    "client": client,
+                    "project": PROJECTS[idx % len(PROJECTS)],
+                    "project_color": "0",
+                    "project_hex_color": "#06aaf5",
+                    "task": None,
+                    "billable": None,
+                    "is_billable": False,
+                    "cur": None,
+                    "tags": ["set"] if idx % 3 == 0 else [],
+                }
+            )
+
+        return entries
+
+    # request handling
+
+    def _details(self, query: Dict[str, str]) -> Tuple[int, Any]:
+        """
+        Answers a detailed report request with one page of entries.
+        """
+
+        if "user_agent" not in query or "workspace_id" not in query:
+            return 400, {"error": {"message": "user_agent and workspace_id required"}}
+        if int(query["workspace_id"]) != self.workspace_id:
+            return 403, {"error": {"message": "Forbidden workspace"}}
+
+        since = date.fromisoformat(query["since"])
+        until = date.fromisoformat(query["until"])
+        if until < since or (until - since).days + 1 > MAX_REPORT_DAYS:
+            return 400, {"error": {"message": "Maximum allowed date range is 365 days"}}
+
+        entries = [
+            entry
+            for offset in range((until - since).days + 1)
+            for entry in self.entries(since + timedelta(days=offset))
+        ]
+        page = int(query.get("page", 1))
+
+        return 200, {
+            "total_grand": sum(entry["dur"] for entry in entries),
+            "total_billable": None,
+            "total_currencies": [{"currency": None, "amount": None}],
+            "total_count": len(entries),
+            "per_page": DETAILS_PER_PAGE,
+            "data": entries[(page - 1) * DETAILS_PER_PAGE : page * DETAILS_PER_PAGE],
+        }
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        """
+        Answers a request, applying the request rate limit.
+        """
+
+        url = urlsplit(handler.path)
+        path = url.path.rstrip("/")
+        query = dict(parse_qsl(url.query))
+
+        with self._lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            limited = (
+                self.requests_per_second is not None
+                and now - self._last_request < 1 / self.requests_per_second
+            )
+            if limited:
+                self.stats["rate_limited"] += 1
+            else:
+                self._last_request = now
+
+        if limited:
+            status, body = 429, {"error": {"message": "Too Many Requests"}}
+        elif path == "/api/v9/me/workspaces":
+            with self._lock:
+                self.stats["workspaces"] += 1
+            status, body = 200, [{"id": self.workspace_id, "name": "SET Workspace"}]
+        elif path == "/reports/api/v2/details":
+            with self._lock:
+                self.stats["details"] += 1
+            status, body = self._details(query)
+        else:
+            status, body = 404, {"error": {"message": "Not Found"}}
+
+        if status == 400:
+            with self._lock:
+                self.stats["rejected"] += 1
+
+        content = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
@@ -0,0 +1,367 @@
+"""
+Persistent SQLite-backed HTTP response cache for GitHub API requests.
+
+Cached responses are served directly while within a per-endpoint time to
+live (TTL) and are otherwise revalidated with conditional requests
+(ETag / If-None-Match and Last-Modified / If-Modified-Since). GitHub does
+not count 304 Not Modified responses against the API rate limit.
+"""
+
+import hashlib
+import json
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+import requests
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    Requester,
+)
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# default location for the shared github response cache
+DEFAULT_CACHE_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/cache/github-http-cache.sqlite"
+)
+
+# time to live (in seconds) for endpoints matching each url pattern,
+# checked in order with the first match being used
+DEFAULT_TTLS = {
+    r"/dependency-graph/sbom$": 7 * 24 * 60 * 60,
+    r"/license$": 7 * 24 * 60 * 60,
+    r"/users/[^/?]+$": 7 * 24 * 60 * 60,
+    r"/readme$": 24 * 60 * 60,
+    r"/languages$": 24 * 60 * 60,
+    r"/contributors": 24 * 60 * 60,
+}
+
+
+class SQLiteResponseCache:
+    """
+    Stores HTTP responses in a SQLite database, keeping hit / miss
+    statistics and evicting the least recently used responses
+    once the cache grows beyond max_size_bytes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path] = DEFAULT_CACHE_PATH,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: int = 60 * 60,
+        max_size_bytes: int = 2 * 1024**3,
+    ):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttls = [
+            (re.compile(pattern), ttl)
+            for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls).items()
+        ]
+        self.default_ttl = default_ttl
+        self.max_size_bytes = max_size_bytes
+        self.stats = {
+            "hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "stored": 0,
+            "evicted": 0,
+        }
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                status_code INTEGER,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._connection.commit()
+
+    def count(self, stat: str) -> None:
+        """
+        Increments a cache statistic (hits, revalidated, misses, ...).
+        """
+
+        with self._lock:
+            self.stats[stat] += 1
+
+    def ttl_for(self, url: str) -> int:
+        """
+        Finds the time to live for a url based on the endpoint patterns.
+        """
+
+        path = url.split("?")[0]
+        return next(
+            (ttl for pattern, ttl in self.ttls if pattern.search(path)),
+            self.default_ttl,
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves a cached response by key, marking it as recently used.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT url, status_code, headers, body, etag, last_modified, stored_at
+                FROM responses WHERE key = ?
+                """,
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._connection.commit()
+
+        return dict(
+            zip(
+                [
+                    "url",
+                    "status_code",
+                    "headers",
+                    "body",
+                    "etag",
+                    "last_modified",
+                    "stored_at",
+                ],
+                row,
+            ),
+            headers=json.loads(row[2]),
+        )
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """
+        Checks whether a cached response is still within its time to live.
+        """
+
+        return time.time() - entry["stored_at"] < self.ttl_for(entry["url"])
+
+    def refresh(self, key: str) -> None:
+        """
+        Restarts the time to live for a cached response after revalidation.
+        """
+
+        with self._lock:
+            now = time.time()
+            self._connection.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self._connection.commit()
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """
+        Stores a response, evicting least recently used responses
+        where the cache has grown beyond max_size_bytes.
+        """
+
+        body = response.content
+        now = time.time()
+        self.count("stored")
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.url,
+                    response.status_code,
+                    json.dumps(dict(response.headers)),
+                    body,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(body),
+                ),
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """
+        Removes least recently used responses until the cache fits
+        within max_size_bytes (expects the lock to be held).
+        """
+
+        total_size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.stats["evicted"] += 1
+            total_size -= size
+            if total_size <= self.max_size_bytes:
+                break
+
+    def clear(self) -> None:
+        """
+        Removes all cached responses.
+        """
+
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+
+
+class CachedSession(requests.Session):
+    """
+    Requests session which serves GET requests from a SQLiteResponseCache,
+    revalidating stale responses using conditional requests.
+    """
+
+    def __init__(self, cache: SQLiteResponseCache):
+        super().__init__()
+        self.cache = cache
+
+    @staticmethod
+    def cache_key(request: requests.PreparedRequest) -> str:
+        """
+        Forms a cache key from the request url and the headers which
+        change the response (responses are not shared across tokens).
+        """
+
+        return hashlib.sha256(
+            "\n".join(
+                [
+                    request.url,
+                    request.headers.get("Accept", ""),
+                    request.headers.get("Authorization", ""),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = self.cache_key(request)
+        entry = self.cache.get(key)
+
+        # serve fresh responses without making a request
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.count("hits")
+            return self._build_response(request, entry)
+
+        # revalidate stale responses using conditional request headers
+        if entry is not None:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            self.cache.count("revalidated")
+            self.cache.refresh(key)
+            cached_response = self._build_response(request, entry)
+            # keep the latest rate limit details from github
+            cached_response.headers.update(
+                {
+                    header: value
+                    for header, value in response.headers.items()
+                    if header.lower().startswith("x-ratelimit")
+                }
+            )
+            return cached_response
+
+        self.cache.count("misses")
+        if response.status_code == 200:
+            self.cache.store(key, response)
+
+        return response
+
+    @staticmethod
+    def _build_response(
+        request: requests.PreparedRequest, entry: Dict[str, Any]
+    ) -> requests.Response:
+        """
+        Forms a requests response from a cache entry.
+        """
+
+        response = requests.Response()
+        response.status_code = entry["status_code"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"]
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry["url"]
+        response.reason = "OK"
+        response.request = request
+        response.from_cache = True
+
+        return response
+
+
+def install_pygithub_cache(
+    cache: SQLiteResponseCache, adapter: Optional[HTTPAdapter] = None
+) -> CachedSession:
+    """
+    Routes all PyGithub requests through a shared CachedSession
+    using the PyGithub connection class injection hook.
+    Requests which miss the cache are sent through adapter where one is
+    provided (for example, a rate limited adapter) and through the
+    PyGithub retry adapter otherwise.
+    Returns the session so other requests may share the same cache.
+    """
+
+    session = CachedSession(cache=cache)
+    mount_lock = threading.Lock()
+    if adapter is not None:
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def use_cached_session(connection: Any) -> None:
+        # share the pygithub auth and retry adapter with the cached session
+        with mount_lock:
+            session.auth = connection.session.auth
+            prefix = f"{connection.protocol}://"
+            if prefix not in session.pygithub_mounts:
+                session.mount(prefix, connection.session.get_adapter(prefix))
+                session.pygithub_mounts.add(prefix)
+        connection.session.close()
+        connection.session = session
+
+    session.pygithub_mounts = set() if adapter is None else {"https://", "http://"}
+
+    class CachedHTTPSConnection(HTTPSRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            use_cached_session(self)
+
+    class CachedHTTPConnection(HTTPRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            use_cached_session(self)
+
+    Requester.injectConnectionClasses(CachedHTTPConnection, CachedHTTPSConnection)
+
+    return session
@@ -0,0 +1,177 @@
+"""
+Record / replay of GitHub API traffic using local cassette files.
+
+In record mode every request is sent to GitHub (through a wrapped
+transport adapter) and the request and response are appended to a JSON
+lines cassette. In replay mode requests are answered from the cassette
+without any network access, so crawls can be re-run offline with the
+exact responses GitHub returned. Authorization headers are never
+written to cassettes. Recordings are best made with an empty response
+cache so cassettes hold full responses rather than 304 revalidations.
+"""
+
+import base64
+import collections
+import hashlib
+import json
+import pathlib
+import threading
+from typing import Any, Deque, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# response headers which no longer apply once a body has been decoded
+DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMissError(KeyError):
+    """
+    Raised when a request being replayed was not recorded in the cassette.
+    """
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Requests transport adapter which records requests and responses to a
+    cassette ("record" mode) or answers requests from one ("replay" mode).
+
+    Requests are matched by method, url and a hash of the request body.
+    Repeated identical requests are answered with their recorded responses
+    in order, reusing the last response once these are exhausted.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path],
+        mode: str = "replay",
+        adapter: Optional[HTTPAdapter] = None,
+        **kwargs,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        super().__init__(**kwargs)
+        self.path = pathlib.Path(path)
+        self.mode = mode
+        self.adapter = adapter or HTTPAdapter(**kwargs)
+        self.stats = {"recorded": 0, "replayed": 0}
+
+        self._lock = threading.Lock()
+        self._interactions: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = {}
+        self._last: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("")
+        else:
+            with open(self.path) as cassette:
+                for line in cassette:
+                    interaction = json.loads(line)
+                    self._interactions.setdefault(
+                        self.match_key(
+                            interaction["method"],
+                            interaction["url"],
+                            interaction["body_sha256"],
+                        ),
+                        collections.deque(),
+                    ).append(interaction)
+
+    @staticmethod
+    def body_hash(body: Optional[Union[str, bytes]]) -> str:
+        """
+        Hashes a request body (empty bodies hash the same as no body).
+        """
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        return hashlib.sha256(body or b"").hexdigest()
+
+    @staticmethod
+    def match_key(method: str, url: str, body_sha256: str) -> Tuple[str, str, str]:
+        """
+        Forms the key used to match requests with recorded interactions.
+        """
+
+        return (method.upper(), url, body_sha256)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.mode == "replay":
+            return self._replay(request)
+
+        response = self.adapter.send(request, **kwargs)
+        self._record(request, response)
+
+        return response
+
+    def _record(
+        self, request: requests.PreparedRequest, response: requests.Response
+    ) -> None:
+        """
+        Appends a request and its response to the cassette.
+        """
+
+        content = response.content
+        try:
+            body, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+
+        interaction = {
+            "method": request.method,
+            "url": request.url,
+            "body_sha256": self.body_hash(request.body),
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                header: value
+                for header, value in response.headers.items()
+                if header.lower() not in DROPPED_RESPONSE_HEADERS
+            },
+            "body": body,
+            "body_encoding": encoding,
+        }
+
+        with self._lock:
+            with open(self.path, "a") as cassette:
+                cassette.write(json.dumps(interaction) + "\n")
+            self.stats["recorded"] += 1
+
+    def _replay(self, request: requests.PreparedRequest) -> requests.Response:
+        """
+        Answers a request with its next recorded response.
+        """
+
+        key = self.match_key(request.method, request.url, self.body_hash(request.body))
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if recorded:
+                self._last[key] = recorded.popleft()
+            interaction = self._last.get(key)
+            if interaction is None:
+                raise CassetteMissError(
+                    f"No recorded response for {request.method} {request.url}"
+                )
+            self.stats["replayed"] += 1
+
+        response = requests.Response()
+        response.status_code = interaction["status_code"]
+        response.reason = interaction["reason"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = (
+            base64.b64decode(interaction["body"])
+            if interaction["body_encoding"] == "base64"
+            else interaction["body"].encode("utf-8")
+        )
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+
+        return response
+
+    def close(self) -> None:
+        super().close()
+        self.adapter.close()
@@ -0,0 +1,638 @@
+"""
+Utilities for gathering DBMI related software landscape data from GitHub.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import github
+import requests
+from github import Github
+from requests.adapters import HTTPAdapter
+
+from utils.http_cache import CachedSession, SQLiteResponseCache
+from utils.rate_limit import RateLimitedAdapter, RateLimitScheduler
+from utils.readme_store import ReadmeStore
+
+# default github api location (may be replaced with a local stub server)
+GITHUB_API_URL = "https://api.github.com"
+
+# graphql query for a page of up to 100 repositories from an org or user,
+# including readme blob shas for the most common readme filenames
+GITHUB_REPOS_GRAPHQL_QUERY = """
+query($login: String!, $cursor: String) {
+  repositoryOwner(login: $login) {
+    repositories(first: 100, after: $cursor, ownerAffiliations: OWNER) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        nameWithOwner
+        databaseId
+        diskUsage
+        isArchived
+        createdAt
+        stargazerCount
+        forkCount
+        watchers { totalCount }
+        issues(states: OPEN) { totalCount }
+        pullRequests(states: OPEN) { totalCount }
+        licenseInfo { spdxId }
+        repositoryTopics(first: 100) { nodes { topic { name } } }
+        description
+        languages(first: 100) { edges { size node { name } } }
+        readmeMd: object(expression: "HEAD:README.md") { ... on Blob { oid } }
+        readmeRst: object(expression: "HEAD:README.rst") { ... on Blob { oid } }
+        readmeTxt: object(expression: "HEAD:README.txt") { ... on Blob { oid } }
+        readme: object(expression: "HEAD:README") { ... on Blob { oid } }
+        readmeLower: object(expression: "HEAD:readme.md") { ... on Blob { oid } }
+      }
+    }
+  }
+}
+"""
+
+
+# graphql query for the owner type and a page of up to 100 repository
+# manifest entries (used to detect changed repositories)
+GITHUB_REPO_MANIFEST_GRAPHQL_QUERY = """
+query($login: String!, $cursor: String) {
+  repositoryOwner(login: $login) {
+    __typename
+    repositories(first: 100, after: $cursor, ownerAffiliations: OWNER) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        nameWithOwner
+        pushedAt
+        updatedAt
+        defaultBranchRef { target { oid } }
+      }
+    }
+  }
+}
+"""
+
+
+def get_github_org_or_user(
+    github_client: Github,
+    name: str,
+    owner_type: Optional[str] = None,
+) -> Union[github.NamedUser.NamedUser, github.Organization.Organization]:
+    """
+    Convenience function to gather pygithub orgs or users similarly
+    using only a name as a reference point to simplify data gathering.
+    Where the owner_type ("Organization" or "User") is already known
+    only the matching endpoint is requested.
+    """
+
+    if owner_type == "Organization":
+        return github_client.get_organization(name)
+    if owner_type == "User":
+        return github_client.get_user(name)
+
+    try:
+        # attempt to find github org
+        return github_client.get_organization(name)
+    except github.UnknownObjectException:
+        # if we failed to find the org, try as a user instead
+        return github_client.get_user(name)
+
+
+def safe_get_readme_sha(
+    repo: github.Repository.Repository, readme_store: Optional[ReadmeStore] = None
+) -> Optional[str]:
+    """
+    Safely retrieve the GitHub repo readme blob sha, adding the readme
+    contents to the readme store where provided and returning
+    a None where no readme is found.
+    """
+
+    try:
+        readme = repo.get_readme()
+    except github.UnknownObjectException:
+        return None
+
+    if readme_store is not None and readme_store.missing([readme.sha]):
+        readme_store.put(readme.sha, readme.decoded_content)
+
+    return readme.sha
+
+
+def safe_detect_license(repo: github.Repository.Repository) -> Optional[str]:
+    """
+    Safely retrieve detect the license type ID,
+    returning a None where no license is found
+    """
+
+    try:
+        return repo.get_license().license.spdx_id
+    except github.GithubException:
+        return None
+
+
+def get_github_repo_sbom(
+    full_name: str,
+    token: Optional[str] = None,
+    api_url: str = GITHUB_API_URL,
+    session: Optional[requests.Session] = None,
+) -> Optional[Dict[str, str]]:
+    """
+    Gathers GitHub Software Bill of Materials (SBOM) data
+    given a full_name (org/repo_name), optionally through
+    a (cached) requests session.
+
+    See here for more information:
+    https://docs.github.com/en/rest/dependency-graph/sboms
+    """
+
+    try:
+        response = (session or requests).get(
+            f"{api_url}/repos/{full_name}/dependency-graph/sbom",
+            headers={
+                "Accept": "application/vnd.github+json",
+                "Authorization": f"Bearer {token or os.environ.get('LANDSCAPE_ANALYSIS_GH_TOKEN')}",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            timeout=10,
+        )
+        response.raise_for_status()  # Raise an exception for HTTP errors
+
+        # return the result json
+        return response.json()
+
+    except requests.exceptions.RequestException as err:
+        return None
+
+
+def get_github_repo_metrics(
+    org_name: str,
+    repo: github.Repository.Repository,
+    token: Optional[str] = None,
+    api_url: str = GITHUB_API_URL,
+    session: Optional[requests.Session] = None,
+    readme_store: Optional[ReadmeStore] = None,
+) -> Dict[str, Any]:
+    """
+    Gathers the landscape analysis record for a single repository.
+    Each call makes roughly ten blocking requests to GitHub.
+    """
+
+    # list contributors once for both the count and the members
+    contributors = list(repo.get_contributors())
+
+    return {
+        "GitHub Org Name": org_name,
+        "Repo Name": repo.name,
+        "GitHub Repo Full Name": repo.full_name,
+        "GitHub Repository ID": repo.id,
+        "Repository Size (KB)": repo.size,
+        "GitHub Repo Archived": repo.archived,
+        "GitHub Repo Created Month": repo.created_at.strftime("%Y-%m-%d"),
+        "GitHub Stars": repo.stargazers_count,
+        "GitHub Network Count": repo.network_count,
+        "GitHub Forks": repo.forks_count,
+        "GitHub Subscribers": repo.subscribers_count,
+        "GitHub Open Issues": repo.get_issues(state="open").totalCount,
+        "GitHub Contributors Count": len(contributors),
+        "GitHub Contributor Members": [
+            {
+                "id": contributor.id,
+                "name": contributor.name,
+                "login": contributor.login,
+                "contributions": contributor.contributions,
+            }
+            for contributor in contributors
+        ],
+        "GitHub License Type": safe_detect_license(repo),
+        "GitHub Topics": repo.topics,
+        "GitHub Description": repo.description,
+        "GitHub Readme SHA": safe_get_readme_sha(repo, readme_store=readme_store),
+        # (newer pygithub releases add a url entry to the language sizes)
+        "GitHub Detected Languages": {
+            language: size
+            for language, size in repo.get_languages().items()
+            if isinstance(size, int)
+        },
+        "GitHub Repo SBOM": get_github_repo_sbom(
+            full_name=repo.full_name, token=token, api_url=api_url, session=session
+        ),
+    }
+
+
+def iter_github_metrics(
+    github_client: Github,
+    org_names: List[str],
+    max_workers: int = 8,
+    token: Optional[str] = None,
+    api_url: str = GITHUB_API_URL,
+    session: Optional[requests.Session] = None,
+    readme_store: Optional[ReadmeStore] = None,
+    owner_types: Optional[Dict[str, str]] = None,
+    only_repos: Optional[Set[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields landscape analysis records for every repository of the
+    given orgs or users, running per-repo requests within a thread pool
+    bounded by max_workers. Known owner types (by name) avoid the org
+    then user lookup and only the repositories named in only_repos (by
+    full name) are gathered where provided.
+
+    Records are yielded in the same order as a sequential crawl
+    (by org name and then by repository listing order), one org or
+    user at a time so that at most one org's records are held at once.
+    Readmes are stored and each repository is indexed for search
+    within readme_store where provided.
+    """
+
+    def repo_metrics(
+        org_repo: Tuple[str, github.Repository.Repository]
+    ) -> Dict[str, Any]:
+        record = get_github_repo_metrics(
+            org_name=org_repo[0],
+            repo=org_repo[1],
+            token=token,
+            api_url=api_url,
+            session=session,
+            readme_store=readme_store,
+        )
+        if readme_store is not None:
+            readme_store.index_repo(record)
+
+        return record
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for org_name in org_names:
+            # gather the per-repo metrics for each org or user concurrently
+            yield from executor.map(
+                repo_metrics,
+                [
+                    (org_name, repo)
+                    for repo in get_github_org_or_user(
+                        github_client=github_client,
+                        name=org_name,
+                        owner_type=(owner_types or {}).get(org_name),
+                    ).get_repos()
+                    if only_repos is None or repo.full_name in only_repos
+                ],
+            )
+
+
+def run_github_graphql_query(
+    session: requests.Session,
+    query: str,
+    variables: Optional[Dict[str, Any]] = None,
+    api_url: str = GITHUB_API_URL,
+) -> Dict[str, Any]:
+    """
+    Runs a GitHub GraphQL query and returns the resulting data.
+    Partial results (for example, unknown users) are returned as nulls
+    by GitHub and are left for the caller to handle.
+    """
+
+    response = session.post(
+        f"{api_url}/graphql",
+        json={"query": query, "variables": variables or {}},
+        timeout=30,
+    )
+    response.raise_for_status()
+    result = response.json()
+
+    if result.get("data") is None:
+        raise RuntimeError(f"GitHub GraphQL query failed: {result.get('errors')}")
+
+    return result["data"]
+
+
+def get_github_graphql_repo_record(
+    org_name: str, node: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Forms a landscape analysis record from a GraphQL repository node.
+    Contributor and SBOM fields are left empty to be filled by REST.
+    """
+
+    # use the first readme blob found by the query aliases
+    readme_sha = next(
+        (
+            node[alias]["oid"]
+            for alias in ["readmeMd", "readmeRst", "readmeTxt", "readme", "readmeLower"]
+            if node.get(alias) and node[alias].get("oid") is not None
+        ),
+        None,
+    )
+
+    return {
+        "GitHub Org Name": org_name,
+        "Repo Name": node["name"],
+        "GitHub Repo Full Name": node["nameWithOwner"],
+        "GitHub Repository ID": node["databaseId"],
+        "Repository Size (KB)": node["diskUsage"],
+        "GitHub Repo Archived": node["isArchived"],
+        "GitHub Repo Created Month": node["createdAt"][:10],
+        "GitHub Stars": node["stargazerCount"],
+        # the fork network count is not available through graphql
+        "GitHub Network Count": None,
+        "GitHub Forks": node["forkCount"],
+        "GitHub Subscribers": node["watchers"]["totalCount"],
+        # the rest issues endpoint includes pull requests in this count
+        "GitHub Open Issues": node["issues"]["totalCount"]
+        + node["pullRequests"]["totalCount"],
+        "GitHub Contributors Count": 0,
+        "GitHub Contributor Members": [],
+        "GitHub License Type": (
+            node["licenseInfo"]["spdxId"] if node["licenseInfo"] else None
+        ),
+        "GitHub Topics": [
+            topic["topic"]["name"] for topic in node["repositoryTopics"]["nodes"]
+        ],
+        "GitHub Description": node["description"],
+        "GitHub Readme SHA": readme_sha,
+        "GitHub Detected Languages": {
+            edge["node"]["name"]: edge["size"] for edge in node["languages"]["edges"]
+        },
+        "GitHub Repo SBOM": None,
+    }
+
+
+def get_github_repo_manifest(
+    session: requests.Session,
+    owner: str,
+    api_url: str = GITHUB_API_URL,
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Gathers the owner type ("Organization" or "User") and a manifest entry
+    (id, pushed and updated dates and default branch commit sha) for each
+    repository of an org or user, using one GraphQL query per page of 100
+    repos. Returns a None owner type where the owner is not found.
+    """
+
+    owner_type = None
+    entries = []
+    cursor = None
+    while True:
+        repository_owner = run_github_graphql_query(
+            session=session,
+            query=GITHUB_REPO_MANIFEST_GRAPHQL_QUERY,
+            variables={"login": owner, "cursor": cursor},
+            api_url=api_url,
+        )["repositoryOwner"]
+        if repository_owner is None:
+            break
+
+        owner_type = repository_owner["__typename"]
+        repositories = repository_owner["repositories"]
+        entries += [
+            {
+                "full_name": node["nameWithOwner"],
+                "id": node["databaseId"],
+                "pushed_at": node["pushedAt"],
+                "updated_at": node["updatedAt"],
+                # empty repositories have no default branch
+                "default_branch_sha": (
+                    node["defaultBranchRef"]["target"]["oid"]
+                    if node["defaultBranchRef"]
+                    else None
+                ),
+            }
+            for node in repositories["nodes"]
+        ]
+
+        if not repositories["pageInfo"]["hasNextPage"]:
+            break
+        cursor = repositories["pageInfo"]["endCursor"]
+
+    return owner_type, entries
+
+
+def get_github_repo_contributor_logins(
+    session: requests.Session,
+    full_name: str,
+    api_url: str = GITHUB_API_URL,
+) -> List[Dict[str, Any]]:
+    """
+    Gathers contributor ids, logins and contribution (commit) counts
+    for a repository through REST,
+    as contributors are not available through GraphQL.
+    Returns an empty list for empty repos or where GitHub declines
+    to list contributors (for example, very large histories).
+    """
+
+    contributors = []
+    url = f"{api_url}/repos/{full_name}/contributors?per_page=100"
+    while url:
+        response = session.get(url, timeout=30)
+        if response.status_code != 200:
+            break
+        contributors += [
+            {
+                "id": contributor["id"],
+                "login": contributor["login"],
+                "contributions": contributor["contributions"],
+            }
+            for contributor in response.json()
+        ]
+        url = response.links.get("next", {}).get("url")
+
+    return contributors
+
+
+def get_github_user_names(
+    session: requests.Session,
+    logins: List[str],
+    api_url: str = GITHUB_API_URL,
+) -> Dict[str, Optional[str]]:
+    """
+    Gathers GitHub user display names for many logins using aliased
+    GraphQL user lookups, 100 logins per query.
+    """
+
+    names = {}
+    for offset in range(0, len(logins), 100):
+        batch = logins[offset : offset + 100]
+        query = "query {\n%s\n}" % "\n".join(
+            f"u{idx}: user(login: {json.dumps(login)}) {{ name }}"
+            for idx, login in enumerate(batch)
+        )
+        data = run_github_graphql_query(session=session, query=query, api_url=api_url)
+        names.update(
+            {
+                login: data[f"u{idx}"]["name"] if data.get(f"u{idx}") else None
+                for idx, login in enumerate(batch)
+            }
+        )
+
+    return names
+
+
+def get_github_blob_texts(
+    session: requests.Session,
+    blobs: List[Tuple[str, str]],
+    api_url: str = GITHUB_API_URL,
+) -> Dict[str, Optional[str]]:
+    """
+    Gathers the text of many git blobs, provided as (repository full name,
+    blob sha) pairs, using aliased GraphQL object lookups
+    (50 blobs per query).
+    """
+
+    texts = {}
+    for offset in range(0, len(blobs), 50):
+        batch = blobs[offset : offset + 50]
+        query = "query {\n%s\n}" % "\n".join(
+            f"b{idx}: repository(owner: {json.dumps(full_name.split('/')[0])}, "
+            f"name: {json.dumps(full_name.split('/')[1])}) "
+            f"{{ object(oid: {json.dumps(sha)}) {{ ... on Blob {{ text }} }} }}"
+            for idx, (full_name, sha) in enumerate(batch)
+        )
+        data = run_github_graphql_query(session=session, query=query, api_url=api_url)
+        texts.update(
+            {
+                sha: (
+                    data[f"b{idx}"]["object"]["text"]
+                    if data.get(f"b{idx}") and data[f"b{idx}"]["object"]
+                    else None
+                )
+                for idx, (_, sha) in enumerate(batch)
+            }
+        )
+
+    return texts
+
+
+def iter_github_metrics_graphql(
+    org_names: List[str],
+    token: Optional[str] = None,
+    max_workers: int = 8,
+    api_url: str = GITHUB_API_URL,
+    cache: Optional[SQLiteResponseCache] = None,
+    scheduler: Optional[RateLimitScheduler] = None,
+    readme_store: Optional[ReadmeStore] = None,
+    adapter: Optional[HTTPAdapter] = None,
+    only_repos: Optional[Set[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields landscape analysis records for every repository of the
+    given orgs or users using one GraphQL query per page of 100 repos.
+
+    REST is used only for SBOM data and contributor listings (which
+    GraphQL does not provide), run within a thread pool bounded by
+    max_workers. REST responses are revalidated through the cache
+    and requests are paced by the scheduler where these are provided.
+    Requests are instead sent through adapter where one is provided
+    (for example, a cassette adapter wrapping a rate limited adapter).
+    Records are completed and yielded a page at a time. Only the
+    repositories named in only_repos (by full name) are completed and
+    yielded where provided.
+
+    Where readme_store is provided, readme text is downloaded only for
+    blob shas which are not already stored and each repository is
+    indexed for search.
+    """
+
+    token = token or os.environ.get("LANDSCAPE_ANALYSIS_GH_TOKEN")
+    session = CachedSession(cache=cache) if cache else requests.Session()
+    if adapter is None and scheduler is not None:
+        adapter = RateLimitedAdapter(scheduler, pool_maxsize=max_workers)
+    if adapter is not None:
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    session.headers.update(
+        {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {token}",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+    )
+
+    def fill_rest_fields(record: Dict[str, Any]) -> None:
+        contributors = get_github_repo_contributor_logins(
+            session=session, full_name=record["GitHub Repo Full Name"], api_url=api_url
+        )
+        record["GitHub Contributors Count"] = len(contributors)
+        record["GitHub Contributor Members"] = contributors
+        record["GitHub Repo SBOM"] = get_github_repo_sbom(
+            full_name=record["GitHub Repo Full Name"],
+            token=token,
+            api_url=api_url,
+            session=session,
+        )
+
+    # contributor display names gathered so far (shared across pages)
+    names = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # gather paged repository data for each org or user
+        for org_name in org_names:
+            cursor = None
+            while True:
+                owner = run_github_graphql_query(
+                    session=session,
+                    query=GITHUB_REPOS_GRAPHQL_QUERY,
+                    variables={"login": org_name, "cursor": cursor},
+                    api_url=api_url,
+                )["repositoryOwner"]
+                if owner is None:
+                    break
+                repositories = owner["repositories"]
+                page_metrics = [
+                    get_github_graphql_repo_record(org_name=org_name, node=node)
+                    for node in repositories["nodes"]
+                    if only_repos is None or node["nameWithOwner"] in only_repos
+                ]
+
+                list(executor.map(fill_rest_fields, page_metrics))
+
+                # add contributor display names to match the rest record schema
+                names.update(
+                    get_github_user_names(
+                        session=session,
+                        logins=sorted(
+                            {
+                                member["login"]
+                                for record in page_metrics
+                                for member in record["GitHub Contributor Members"]
+                            }
+                            - names.keys()
+                        ),
+                        api_url=api_url,
+                    )
+                )
+                for record in page_metrics:
+                    record["GitHub Contributor Members"] = [
+                        {
+                            "id": member["id"],
+                            "name": names.get(member["login"]),
+                            "login": member["login"],
+                            "contributions": member["contributions"],
+                        }
+                        for member in record["GitHub Contributor Members"]
+                    ]
+
+                if readme_store is not None:
+                    # download only readmes which are not already stored
+                    readme_repos = {
+                        record["GitHub Readme SHA"]: record["GitHub Repo Full Name"]
+                        for record in page_metrics
+                        if record["GitHub Readme SHA"]
+                    }
+                    readme_texts = get_github_blob_texts(
+                        session=session,
+                        blobs=[
+                            (readme_repos[sha], sha)
+                            for sha in sorted(readme_store.missing(readme_repos))
+                        ],
+                        api_url=api_url,
+                    )
+                    for sha, text in readme_texts.items():
+                        if text is not None:
+                            readme_store.put(sha, text.encode("utf-8"))
+                    for record in page_metrics:
+                        readme_store.index_repo(record)
+
+                yield from page_metrics
+
+                if not repositories["pageInfo"]["hasNextPage"]:
+                    break
+                cursor = repositories["pageInfo"]["endCursor"]
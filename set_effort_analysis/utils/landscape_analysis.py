@@ -0,0 +1,258 @@
+"""
+Columnar analysis of software landscape repository records.
+
+The landscape table is built once as an Awkward Array from the Arrow
+records and derived columns are added to it in place, so aggregations
+work on typed columns rather than repeatedly rebuilding arrays from
+lists of dictionaries.
+"""
+
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote
+
+import awkward as ak
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.language_matrix import LanguageMatrix
+
+# package url (purl) ecosystem and name (including any namespace)
+PURL_PATTERN = r"^pkg:(?P<ecosystem>[^/]+)/(?P<name>[^@?#]+)"
+
+# ecosystem prefix used by github sbom package names (for example, pip:pandas)
+SBOM_NAME_PREFIX_PATTERN = r"^(?P<ecosystem>[a-z0-9]+):(?P<name>.+)$"
+
+# purl types for github sbom package name prefixes which differ from them
+ECOSYSTEM_ALIASES = {
+    "pip": "pypi",
+    "rubygems": "gem",
+    "go": "golang",
+    "actions": "githubactions",
+}
+
+# python package ecosystems, which use normalized names (see pep 503)
+PYTHON_ECOSYSTEMS = ["pypi"]
+
+
+def _map_to_list(column: pa.ChunkedArray, key: str, value: str) -> pa.ChunkedArray:
+    """
+    Converts an Arrow map column to a list of key / value records
+    (Awkward Array does not read Arrow maps).
+    """
+
+    return pa.chunked_array(
+        [
+            pa.ListArray.from_arrays(
+                chunk.offsets,
+                pa.StructArray.from_arrays(
+                    [chunk.keys, chunk.items], names=[key, value]
+                ),
+                mask=chunk.is_null(),
+            )
+            for chunk in column.chunks
+        ],
+        type=pa.list_(
+            pa.struct([(key, column.type.key_type), (value, column.type.item_type)])
+        ),
+    )
+
+
+def build_landscape_array(
+    table: pa.Table,
+) -> Tuple[ak.Array, Optional[LanguageMatrix]]:
+    """
+    Builds the landscape Awkward Array from Arrow landscape records,
+    adding each repository's primary language (by detected bytes) and
+    total detected lines of code. Detected languages become lists of
+    language and size records. Returns the landscape along with the
+    language matrix used for those columns (None without detected
+    languages) for reuse in language analytics.
+    """
+
+    if "GitHub Detected Languages" in table.column_names:
+        table = table.set_column(
+            table.column_names.index("GitHub Detected Languages"),
+            "GitHub Detected Languages",
+            _map_to_list(
+                table["GitHub Detected Languages"], key="language", value="size"
+            ),
+        )
+
+    landscape = ak.from_arrow(table)
+
+    language_matrix = None
+    if "GitHub Detected Languages" in table.column_names:
+        language_matrix = LanguageMatrix(landscape)
+        landscape["Total lines of GitHub detected code"] = language_matrix.totals()
+        landscape["Primary language"] = language_matrix.primary_languages().tolist()
+
+    return landscape, language_matrix
+
+
+def landscape_dataframe(landscape: ak.Array) -> pd.DataFrame:
+    """
+    Forms a pandas dataframe from the scalar (non-list, non-record)
+    columns of the landscape array.
+    """
+
+    return ak.to_arrow_table(
+        landscape[
+            [
+                field
+                for field in landscape.fields
+                if landscape[field].ndim == 1 and not ak.fields(landscape[field])
+            ]
+        ]
+    ).to_pandas()
+
+
+def _strings(array: ak.Array) -> pd.Series:
+    """
+    Converts an Awkward Array of strings to a pandas series.
+    """
+
+    return ak.to_arrow(array, extensionarray=False).to_pandas()
+
+
+def normalize_dependency_names(names: pd.Series, purls: pd.Series) -> pd.DataFrame:
+    """
+    Normalizes dependency names using package urls (purls) where available,
+    so names such as pip:pandas and pkg:pypi/pandas@2.1.3 collapse to one
+    dependency. Returns the ecosystem (as a purl type, where known) and the
+    normalized dependency name, which together identify a dependency.
+    """
+
+    # use the purl, or the name where the name is itself a purl
+    purls = purls.where(purls.notna(), names.where(names.str.startswith("pkg:")))
+    from_purl = purls.str.extract(PURL_PATTERN)
+    from_name = names.str.extract(SBOM_NAME_PREFIX_PATTERN)
+
+    ecosystem = from_purl["ecosystem"].fillna(
+        from_name["ecosystem"].replace(ECOSYSTEM_ALIASES)
+    )
+    dependency = from_purl["name"].fillna(from_name["name"]).fillna(names)
+
+    # decode percent-encoded purl names (for example, %40babel/core)
+    encoded = dependency.str.contains("%", regex=False, na=False)
+    dependency[encoded] = dependency[encoded].map(unquote)
+
+    python = ecosystem.isin(PYTHON_ECOSYSTEMS)
+    dependency[python] = (
+        dependency[python].str.lower().str.replace(r"[-_.]+", "-", regex=True)
+    )
+
+    return pd.DataFrame({"ecosystem": ecosystem, "dependency": dependency})
+
+
+def dependency_labels(dependencies: pd.DataFrame) -> pd.Series:
+    """
+    Labels dependencies with their ecosystem (as ecosystem:dependency, or
+    the dependency alone where the ecosystem is unknown) so same-named
+    packages from different ecosystems stay distinct.
+    """
+
+    return (dependencies["ecosystem"] + ":" + dependencies["dependency"]).fillna(
+        dependencies["dependency"]
+    )
+
+
+def sbom_dependency_table(landscape: ak.Array) -> pd.DataFrame:
+    """
+    Explodes SBOM packages into one row per repository dependency with
+    the repository (and its row within landscape), primary language,
+    package name, version, purl and normalized dependency name.
+    """
+
+    packages = ak.fill_none(
+        landscape["GitHub Repo SBOM"]["sbom"]["packages"], [], axis=0
+    )
+    flat_packages = ak.flatten(packages)
+    repo_index = np.repeat(np.arange(len(landscape)), ak.to_numpy(ak.num(packages)))
+
+    # use the first purl external reference for each package
+    external_refs = ak.fill_none(flat_packages["externalRefs"], [], axis=0)
+    purls = ak.firsts(
+        external_refs["referenceLocator"][external_refs["referenceType"] == "purl"]
+    )
+
+    df_dependencies = pd.DataFrame(
+        {
+            "repo_index": repo_index,
+            "repo": _strings(landscape["GitHub Repo Full Name"]).to_numpy()[repo_index],
+            "primary_language": _strings(landscape["Primary language"]).to_numpy()[
+                repo_index
+            ],
+            "name": _strings(flat_packages["name"]),
+            "version": _strings(flat_packages["versionInfo"]),
+            "purl": _strings(purls),
+        }
+    )
+
+    return pd.concat(
+        [
+            df_dependencies,
+            normalize_dependency_names(
+                df_dependencies["name"], df_dependencies["purl"]
+            ),
+        ],
+        axis=1,
+    )
+
+
+def dependency_occurrence_counts(
+    dependencies: pd.DataFrame, subsets: Dict[str, np.ndarray]
+) -> pd.DataFrame:
+    """
+    Counts dependency (by ecosystem and name) occurrences for every subset
+    of repositories (boolean masks over the landscape rows) and primary
+    language within a single group-by over the exploded dependency table.
+    """
+
+    return (
+        pd.concat(
+            [
+                dependencies[np.asarray(mask)[dependencies["repo_index"]]].assign(
+                    subset=subset
+                )
+                for subset, mask in subsets.items()
+            ]
+        )
+        .groupby(
+            ["subset", "primary_language", "ecosystem", "dependency"], dropna=False
+        )
+        .size()
+        .reset_index(name="Occurrence Count")
+    )
+
+
+def top_dependencies(
+    occurrence_counts: pd.DataFrame,
+    subset: str,
+    language: Optional[str] = None,
+    top_n: int = 100,
+) -> pd.DataFrame:
+    """
+    Selects the most frequent dependencies for a subset, either for one
+    primary language or (where no language is provided) for all repositories,
+    labeled with their ecosystem.
+    """
+
+    counts = occurrence_counts[occurrence_counts["subset"] == subset]
+    if language is not None:
+        counts = counts[counts["primary_language"] == language]
+
+    counts = counts.groupby(["ecosystem", "dependency"], as_index=False, dropna=False)[
+        "Occurrence Count"
+    ].sum()
+
+    return (
+        pd.DataFrame(
+            {
+                "Dependency": dependency_labels(counts),
+                "Occurrence Count": counts["Occurrence Count"],
+            }
+        )
+        .sort_values(by="Occurrence Count", ascending=False)
+        .head(top_n)
+    )
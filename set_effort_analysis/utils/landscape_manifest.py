@@ -0,0 +1,221 @@
+"""
+Per-owner repository manifests for incremental landscape refreshes.
+
+The owner type (org or user) and a manifest entry for each repository
+(id, pushed and updated dates and default branch commit sha) are stored
+after each crawl. Later refreshes compare a freshly listed manifest with
+the stored one and gather details only for new or changed repositories,
+reusing the stored landscape records for the rest.
+"""
+
+import pathlib
+import shutil
+import sqlite3
+import time
+import warnings
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+import requests
+
+from utils.landscape import GITHUB_API_URL, get_github_repo_manifest
+from utils.landscape_store import DEFAULT_LANDSCAPE_RECORDS_PATH, read_landscape_records
+
+# default location for the landscape repository manifests
+DEFAULT_LANDSCAPE_MANIFEST_PATH = (
+    pathlib.Path(__file__).parents[2]
+    / "data/github.com/software-landscape-manifest.sqlite"
+)
+
+# manifest fields compared to detect changed repositories
+MANIFEST_FIELDS = ["id", "pushed_at", "updated_at", "default_branch_sha"]
+
+
+class LandscapeManifest:
+    """
+    Stores owner types and repository manifests by owner (org or user).
+    """
+
+    def __init__(
+        self, path: Union[str, pathlib.Path] = DEFAULT_LANDSCAPE_MANIFEST_PATH
+    ):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS owners (
+                owner TEXT PRIMARY KEY,
+                owner_type TEXT,
+                refreshed_at REAL
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS repos (
+                owner TEXT,
+                full_name TEXT,
+                id INTEGER,
+                pushed_at TEXT,
+                updated_at TEXT,
+                default_branch_sha TEXT,
+                PRIMARY KEY (owner, full_name)
+            )
+            """
+        )
+        self._connection.commit()
+
+    def owner_type(self, owner: str) -> Optional[str]:
+        """
+        Retrieves the stored owner type ("Organization" or "User"),
+        returning None for owners which have not been stored.
+        """
+
+        row = self._connection.execute(
+            "SELECT owner_type FROM owners WHERE owner = ?", (owner,)
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def owner_types(self) -> Dict[str, str]:
+        """
+        Retrieves the stored owner type for every owner.
+        """
+
+        return dict(self._connection.execute("SELECT owner, owner_type FROM owners"))
+
+    def entries(self, owner: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieves the stored manifest entries for an owner by full name.
+        """
+
+        return {
+            full_name: dict(zip(MANIFEST_FIELDS, values))
+            for full_name, *values in self._connection.execute(
+                f"""
+                SELECT full_name, {", ".join(MANIFEST_FIELDS)} FROM repos
+                WHERE owner = ?
+                """,
+                (owner,),
+            )
+        }
+
+    def changed(self, owner: str, entries: Iterable[Dict[str, Any]]) -> Set[str]:
+        """
+        Finds the full names of new or changed repositories within a
+        freshly listed manifest compared with the stored manifest.
+        """
+
+        stored = self.entries(owner)
+
+        return {
+            entry["full_name"]
+            for entry in entries
+            if entry["full_name"] not in stored
+            or any(
+                stored[entry["full_name"]][field] != entry[field]
+                for field in MANIFEST_FIELDS
+            )
+        }
+
+    def save(
+        self, owner: str, owner_type: str, entries: Iterable[Dict[str, Any]]
+    ) -> None:
+        """
+        Replaces the stored owner type and manifest for an owner.
+        """
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO owners VALUES (?, ?, ?)",
+            (owner, owner_type, time.time()),
+        )
+        self._connection.execute("DELETE FROM repos WHERE owner = ?", (owner,))
+        self._connection.executemany(
+            "INSERT INTO repos VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    owner,
+                    entry["full_name"],
+                    *[entry[field] for field in MANIFEST_FIELDS],
+                )
+                for entry in entries
+            ],
+        )
+        self._connection.commit()
+
+
+def refresh_landscape_records(
+    org_names: List[str],
+    session: requests.Session,
+    gather: Callable[[str, str, Set[str]], Iterable[Dict[str, Any]]],
+    manifest: LandscapeManifest,
+    records_path: Union[str, pathlib.Path] = DEFAULT_LANDSCAPE_RECORDS_PATH,
+    api_url: str = GITHUB_API_URL,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields landscape records for every repository of the given orgs or
+    users, gathering only new or changed repositories and reusing stored
+    records (from the partitioned Parquet dataset) for the rest.
+
+    Each owner's manifest is listed through GraphQL with session (which
+    must be authorized for GitHub). gather is called with the owner name,
+    owner type and the full names of repositories to gather (for example,
+    iter_github_metrics_graphql with only_repos) and is skipped where
+    nothing changed. Records are yielded by owner in manifest order
+    (for LandscapeParquetWriter) and the manifest for an owner is saved
+    once its records have been yielded. Repositories missing from the
+    stored records are always gathered.
+    """
+
+    records_path = pathlib.Path(records_path)
+    for owner in org_names:
+        owner_type, entries = get_github_repo_manifest(
+            session=session, owner=owner, api_url=api_url
+        )
+        if owner_type is None:
+            warnings.warn(f"Skipping unknown GitHub org or user: {owner}", stacklevel=2)
+            continue
+
+        partition_path = records_path / f"owner={owner}"
+        stored = (
+            {
+                record["GitHub Repo Full Name"]: record
+                for record in read_landscape_records(path=partition_path)
+            }
+            if partition_path.exists()
+            else {}
+        )
+
+        to_gather = manifest.changed(owner, entries) | {
+            entry["full_name"] for entry in entries if entry["full_name"] not in stored
+        }
+        gathered = (
+            {
+                record["GitHub Repo Full Name"]: record
+                for record in gather(owner, owner_type, to_gather)
+            }
+            if to_gather
+            else {}
+        )
+
+        # (owners without repositories are never written, so remove any
+        # records stored for repositories which have since been removed)
+        if not entries and partition_path.exists():
+            shutil.rmtree(partition_path)
+
+        for entry in entries:
+            record = gathered.get(entry["full_name"], stored.get(entry["full_name"]))
+            if record is not None:
+                yield record
+
+        manifest.save(
+            owner,
+            owner_type,
+            # repositories which failed to gather are retried on the next refresh
+            [
+                entry
+                for entry in entries
+                if entry["full_name"] not in to_gather or entry["full_name"] in gathered
+            ],
+        )
@@ -0,0 +1,299 @@
+"""
+Streaming Parquet storage for software landscape repository records.
+
+Records are written as they are gathered into a Parquet dataset
+partitioned by owner (org or user) using an explicit Arrow schema and a
+fixed row group size, so memory use stays bounded by one row group and
+a failed crawl keeps every owner which was already written.
+"""
+
+import pathlib
+import shutil
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# default location for the landscape record dataset
+DEFAULT_LANDSCAPE_RECORDS_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/github.com/software-landscape-records"
+)
+
+# number of records written within each parquet row group
+DEFAULT_ROW_GROUP_SIZE = 256
+
+# column used to partition records by owner
+PARTITION_COLUMN = "GitHub Org Name"
+
+# schema for the sbom packages and relationships used by the analysis
+# (other sbom fields are dropped when records are written)
+SBOM_TYPE = pa.struct(
+    [
+        (
+            "sbom",
+            pa.struct(
+                [
+                    ("SPDXID", pa.string()),
+                    ("spdxVersion", pa.string()),
+                    ("name", pa.string()),
+                    ("documentNamespace", pa.string()),
+                    (
+                        "creationInfo",
+                        pa.struct(
+                            [
+                                ("created", pa.string()),
+                                ("creators", pa.list_(pa.string())),
+                            ]
+                        ),
+                    ),
+                    (
+                        "packages",
+                        pa.list_(
+                            pa.struct(
+                                [
+                                    ("SPDXID", pa.string()),
+                                    ("name", pa.string()),
+                                    ("versionInfo", pa.string()),
+                                    ("downloadLocation", pa.string()),
+                                    ("licenseConcluded", pa.string()),
+                                    ("licenseDeclared", pa.string()),
+                                    (
+                                        "externalRefs",
+                                        pa.list_(
+                                            pa.struct(
+                                                [
+                                                    (
+                                                        "referenceCategory",
+                                                        pa.string(),
+                                                    ),
+                                                    ("referenceType", pa.string()),
+                                                    (
+                                                        "referenceLocator",
+                                                        pa.string(),
+                                                    ),
+                                                ]
+                                            )
+                                        ),
+                                    ),
+                                ]
+                            )
+                        ),
+                    ),
+                    (
+                        "relationships",
+                        pa.list_(
+                            pa.struct(
+                                [
+                                    ("spdxElementId", pa.string()),
+                                    ("relatedSpdxElement", pa.string()),
+                                    ("relationshipType", pa.string()),
+                                ]
+                            )
+                        ),
+                    ),
+                ]
+            ),
+        )
+    ]
+)
+
+# schema for landscape records (matching the gathered record fields)
+LANDSCAPE_SCHEMA = pa.schema(
+    [
+        ("GitHub Org Name", pa.string()),
+        ("Repo Name", pa.string()),
+        ("GitHub Repo Full Name", pa.string()),
+        ("GitHub Repository ID", pa.int64()),
+        ("Repository Size (KB)", pa.int64()),
+        ("GitHub Repo Archived", pa.bool_()),
+        ("GitHub Repo Created Month", pa.string()),
+        ("GitHub Stars", pa.int64()),
+        ("GitHub Network Count", pa.int64()),
+        ("GitHub Forks", pa.int64()),
+        ("GitHub Subscribers", pa.int64()),
+        ("GitHub Open Issues", pa.int64()),
+        ("GitHub Contributors Count", pa.int64()),
+        (
+            "GitHub Contributor Members",
+            pa.list_(
+                pa.struct(
+                    [
+                        ("id", pa.int64()),
+                        ("name", pa.string()),
+                        ("login", pa.string()),
+                        ("contributions", pa.int64()),
+                    ]
+                )
+            ),
+        ),
+        ("GitHub License Type", pa.string()),
+        ("GitHub Topics", pa.list_(pa.string())),
+        ("GitHub Description", pa.string()),
+        ("GitHub Readme SHA", pa.string()),
+        ("GitHub Detected Languages", pa.map_(pa.string(), pa.int64())),
+        ("GitHub Repo SBOM", SBOM_TYPE),
+    ]
+)
+
+
+class LandscapeParquetWriter:
+    """
+    Writes landscape records to a Parquet dataset partitioned by owner
+    (as owner=<name> directories), buffering at most one row group per
+    owner. Existing partitions are replaced when an owner is first written
+    and partitions for owners no longer crawled may be pruned.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path] = DEFAULT_LANDSCAPE_RECORDS_PATH,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        schema: pa.Schema = LANDSCAPE_SCHEMA,
+    ):
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.schema = schema
+        self.records_written = 0
+
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._writers: Dict[str, pq.ParquetWriter] = {}
+        self._parts: Dict[str, int] = {}
+
+    def partition_path(self, owner: str) -> pathlib.Path:
+        """
+        Forms the partition directory for an owner.
+        """
+
+        return self.path / f"owner={owner}"
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Buffers a record, writing a row group once the owner's buffer is full.
+        Owners are expected to arrive in order, so the files for
+        other owners are completed when a new owner begins.
+        """
+
+        owner = record[PARTITION_COLUMN]
+        if owner not in self._buffers:
+            for other_owner in list(self._buffers):
+                self._close_owner(other_owner)
+            self._buffers[owner] = []
+
+        self._buffers[owner].append(record)
+        if len(self._buffers[owner]) >= self.row_group_size:
+            self._flush(owner)
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Writes every record from an iterable (such as a streaming crawl),
+        closing the writer afterwards and returning the number of records.
+        """
+
+        try:
+            for record in records:
+                self.write(record)
+        finally:
+            self.close()
+
+        return self.records_written
+
+    def _flush(self, owner: str) -> None:
+        """
+        Writes an owner's buffered records as one row group.
+        """
+
+        if not self._buffers[owner]:
+            return
+
+        if owner not in self._writers:
+            if owner not in self._parts:
+                # replace records from earlier crawls of this owner
+                shutil.rmtree(self.partition_path(owner), ignore_errors=True)
+                self.partition_path(owner).mkdir(parents=True)
+                self._parts[owner] = 0
+            self._writers[owner] = pq.ParquetWriter(
+                self.partition_path(owner) / f"part-{self._parts[owner]}.parquet",
+                schema=self.schema,
+            )
+            self._parts[owner] += 1
+
+        self._writers[owner].write_table(
+            pa.Table.from_pylist(self._buffers[owner], schema=self.schema),
+            row_group_size=self.row_group_size,
+        )
+        self.records_written += len(self._buffers[owner])
+        self._buffers[owner] = []
+
+    def _close_owner(self, owner: str) -> None:
+        """
+        Writes remaining buffered records and completes an owner's file.
+        """
+
+        self._flush(owner)
+        del self._buffers[owner]
+        if owner in self._writers:
+            self._writers.pop(owner).close()
+
+    def close(self) -> None:
+        """
+        Writes remaining buffered records and completes all files.
+        """
+
+        for owner in list(self._buffers):
+            self._close_owner(owner)
+
+    def prune_owners(self, owners: Iterable[str]) -> List[str]:
+        """
+        Removes partitions for owners which are not among owners (such as
+        orgs or users removed from the crawled list), returning the
+        removed owner names. Owner names are compared case-insensitively
+        (as with GitHub logins).
+        """
+
+        keep = {owner.lower() for owner in owners}
+        removed = []
+        for partition_path in sorted(self.path.glob("owner=*")):
+            owner = partition_path.name.split("=", 1)[1]
+            if partition_path.is_dir() and owner.lower() not in keep:
+                shutil.rmtree(partition_path)
+                removed.append(owner)
+
+        return removed
+
+
+def read_landscape_table(
+    path: Union[str, pathlib.Path] = DEFAULT_LANDSCAPE_RECORDS_PATH,
+    columns: Optional[List[str]] = None,
+) -> pa.Table:
+    """
+    Reads landscape records (optionally only some columns) from the
+    partitioned Parquet dataset as an Arrow table.
+    """
+
+    return ds.dataset(path, schema=LANDSCAPE_SCHEMA, format="parquet").to_table(
+        columns=columns
+    )
+
+
+def read_landscape_records(
+    path: Union[str, pathlib.Path] = DEFAULT_LANDSCAPE_RECORDS_PATH,
+    columns: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Reads landscape records (optionally only some columns) from the
+    partitioned Parquet dataset as a list of dictionaries, with map
+    columns (such as detected languages) returned as dictionaries.
+    """
+
+    table = read_landscape_table(path=path, columns=columns)
+    map_columns = [field.name for field in table.schema if pa.types.is_map(field.type)]
+
+    records = table.to_pylist()
+    for record in records:
+        for column in map_columns:
+            if record[column] is not None:
+                record[column] = dict(record[column])
+
+    return records
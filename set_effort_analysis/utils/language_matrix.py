@@ -0,0 +1,139 @@
+"""
+Dense repository by language matrix of GitHub detected language bytes.
+
+Per-repository totals, primary languages, language totals (and their
+log scale) and language shares by owner are computed as reductions over
+one numeric matrix, with subsets (such as repositories with set member
+contributions) selected through boolean row masks.
+"""
+
+from typing import Optional
+
+import awkward as ak
+import numpy as np
+import pandas as pd
+
+
+class LanguageMatrix:
+    """
+    Repository by language matrix of detected bytes (as reported by the
+    GitHub languages endpoint) built from the landscape array.
+    """
+
+    def __init__(self, landscape: ak.Array):
+        languages = ak.fill_none(landscape["GitHub Detected Languages"], [], axis=0)
+        repo_index = np.repeat(
+            np.arange(len(landscape)), ak.to_numpy(ak.num(languages))
+        )
+        flat_languages = ak.flatten(languages)
+
+        language_codes, self.languages = pd.factorize(
+            ak.to_arrow(flat_languages["language"], extensionarray=False).to_pandas(),
+            sort=True,
+        )
+        self.languages = np.asarray(self.languages, dtype=object)
+        self.owners = (
+            ak.to_arrow(landscape["GitHub Org Name"], extensionarray=False)
+            .to_pandas()
+            .to_numpy()
+            if "GitHub Org Name" in landscape.fields
+            else None
+        )
+
+        self.matrix = np.zeros((len(landscape), len(self.languages)), dtype=np.int64)
+        self.matrix[repo_index, language_codes] = ak.to_numpy(
+            ak.fill_none(flat_languages["size"], 0)
+        )
+
+    def _rows(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Selects the matrix rows for a subset of repositories (all where
+        mask is None).
+        """
+
+        return self.matrix if mask is None else self.matrix[np.asarray(mask)]
+
+    def totals(self) -> np.ndarray:
+        """
+        Totals detected bytes of code for each repository.
+        """
+
+        return self.matrix.sum(axis=1)
+
+    def primary_languages(self) -> np.ndarray:
+        """
+        Finds each repository's primary language (the most detected bytes),
+        with None for repositories without detected languages.
+        """
+
+        primary = self.languages[self.matrix.argmax(axis=1)].astype(object)
+        primary[self.totals() == 0] = None
+
+        return primary
+
+    def primary_language_counts(
+        self, mask: Optional[np.ndarray] = None
+    ) -> pd.DataFrame:
+        """
+        Counts repositories by primary language, optionally for the
+        repositories selected by a boolean mask.
+        """
+
+        rows = self._rows(mask)
+        has_languages = rows.sum(axis=1) > 0
+        counts = np.bincount(
+            rows[has_languages].argmax(axis=1), minlength=len(self.languages)
+        )
+
+        return (
+            pd.DataFrame({"Primary language": self.languages, "Count": counts})
+            .query("Count > 0")
+            .sort_values(by="Count", ascending=False)
+            .reset_index(drop=True)
+        )
+
+    def line_counts(self, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Totals detected lines of code (bytes) by language with their
+        natural log, optionally for the repositories selected by a
+        boolean mask.
+        """
+
+        line_count = self._rows(mask).sum(axis=0)
+        present = line_count > 0
+
+        return (
+            pd.DataFrame(
+                {
+                    "language": self.languages[present],
+                    "line_count": line_count[present],
+                    "line_count_log": np.log(line_count[present]),
+                }
+            )
+            .sort_values(by="line_count")
+            .reset_index(drop=True)
+        )
+
+    def owner_language_share(self, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Finds the share of each owner's (org or user) detected code in each
+        language, optionally for the repositories selected by a boolean mask.
+        """
+
+        owners = self.owners if mask is None else self.owners[np.asarray(mask)]
+        owner_codes, owner_names = pd.factorize(owners, sort=True)
+
+        owner_totals = np.zeros((len(owner_names), len(self.languages)), dtype=np.int64)
+        np.add.at(owner_totals, owner_codes, self._rows(mask))
+        owner_sums = owner_totals.sum(axis=1, keepdims=True)
+
+        return pd.DataFrame(
+            np.divide(
+                owner_totals,
+                owner_sums,
+                out=np.zeros(owner_totals.shape),
+                where=owner_sums > 0,
+            ),
+            index=pd.Index(owner_names, name="owner"),
+            columns=self.languages,
+        )
@@ -0,0 +1,215 @@
+"""
+Loading of monday.com account export boards directly from the export zip.
+
+Boards (.xlsx members of the export zip) are read without extracting the
+zip, streamed row by row with openpyxl in read-only mode and parsed
+within a process pool. Each parsed board is cached as Parquet, keyed by
+the zip member's CRC-32 (from the zip directory), so loading the same
+export again skips Excel parsing entirely.
+"""
+
+import io
+import pathlib
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+from openpyxl import load_workbook
+from pandas.io.parsers import TextParser
+
+# default location for parsed board parquet files
+DEFAULT_BOARD_CACHE_DIR = pathlib.Path(__file__).parents[2] / "data/cache/monday-boards"
+
+# number of title rows above the column header within monday.com board exports
+BOARD_HEADER_ROWS = 4
+
+
+def list_boards(zip_path: Union[str, pathlib.Path]) -> pd.DataFrame:
+    """
+    Lists the boards within a monday.com export zip, including each
+    member's CRC-32 and uncompressed size (read from the zip directory).
+    """
+
+    with zipfile.ZipFile(zip_path) as export:
+        return pd.DataFrame(
+            [
+                {
+                    "board": pathlib.PurePosixPath(member.filename).stem,
+                    "member": member.filename,
+                    "crc": f"{member.CRC:08x}",
+                    "file_size": member.file_size,
+                }
+                for member in export.infolist()
+                if member.filename.endswith(".xlsx")
+            ],
+            columns=["board", "member", "crc", "file_size"],
+        )
+
+
+def board_cache_path(
+    board: str, crc: str, skiprows: int, cache_dir: Union[str, pathlib.Path]
+) -> pathlib.Path:
+    """
+    Forms the Parquet cache path for a board by member CRC and skipped rows.
+    """
+
+    return pathlib.Path(cache_dir) / "{}-{}-skip{}.parquet".format(
+        re.sub(r"[^\w.-]+", "_", board), crc, skiprows
+    )
+
+
+def prune_board_cache(
+    board: str, crc: str, cache_dir: Union[str, pathlib.Path]
+) -> List[pathlib.Path]:
+    """
+    Removes a board's cache files for other member CRCs (from earlier
+    exports), returning the removed paths.
+    """
+
+    pattern = re.compile(
+        r"{}-(?P<crc>[0-9a-f]{{8}})-skip\d+\.parquet".format(
+            re.escape(re.sub(r"[^\w.-]+", "_", board))
+        )
+    )
+    removed = []
+    for path in pathlib.Path(cache_dir).glob("*.parquet"):
+        match = pattern.fullmatch(path.name)
+        if match is not None and match["crc"] != crc:
+            path.unlink()
+            removed.append(path)
+
+    return removed
+
+
+def read_board_rows(content: bytes) -> List[List[Any]]:
+    """
+    Streams the cell values of the first worksheet of a board with
+    openpyxl in read-only mode, trimming trailing empty cells and rows
+    (as pandas does when reading Excel files).
+    """
+
+    workbook = load_workbook(
+        io.BytesIO(content), read_only=True, data_only=True, keep_links=False
+    )
+    try:
+        rows = []
+        for values in workbook.worksheets[0].iter_rows(values_only=True):
+            row = [
+                (
+                    ""
+                    if value is None
+                    else int(value)
+                    if isinstance(value, float) and value.is_integer()
+                    else value
+                )
+                for value in values
+            ]
+            while row and row[-1] == "":
+                row.pop()
+            rows.append(row)
+    finally:
+        workbook.close()
+
+    while rows and not rows[-1]:
+        rows.pop()
+    width = max((len(row) for row in rows), default=0)
+
+    return [row + [""] * (width - len(row)) for row in rows]
+
+
+def parse_board(
+    rows: List[List[Any]], skiprows: int = BOARD_HEADER_ROWS
+) -> pd.DataFrame:
+    """
+    Parses board rows into a dataframe using the row after skiprows as
+    the header, with the same type and missing value inference as
+    pandas.read_excel.
+    """
+
+    if len(rows) <= skiprows:
+        return pd.DataFrame()
+
+    return TextParser(rows[skiprows:], header=0).read()
+
+
+def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts object columns holding mixed value types (for example,
+    numbers and text) to strings so they may be stored as Parquet.
+    """
+
+    for column in df.columns[df.dtypes == object]:
+        values = df[column].dropna()
+        if values.map(type).nunique() > 1:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+
+    return df
+
+
+def _parse_board_member(job: Tuple[str, str, int, str]) -> str:
+    """
+    Reads, parses and caches one board from the export zip (run within a
+    worker process), returning the cache path.
+    """
+
+    zip_path, member, skiprows, cache_path = job
+    with zipfile.ZipFile(zip_path) as export:
+        content = export.read(member)
+
+    df_board = _parquet_safe(parse_board(read_board_rows(content), skiprows=skiprows))
+    df_board.columns = [str(column) for column in df_board.columns]
+    # write then rename so interrupted runs never leave partial cache files
+    df_board.to_parquet(f"{cache_path}.tmp", index=False)
+    pathlib.Path(f"{cache_path}.tmp").replace(cache_path)
+
+    return cache_path
+
+
+def load_boards(
+    zip_path: Union[str, pathlib.Path],
+    boards: Optional[List[str]] = None,
+    skiprows: int = BOARD_HEADER_ROWS,
+    cache_dir: Union[str, pathlib.Path] = DEFAULT_BOARD_CACHE_DIR,
+    max_workers: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Loads boards (all, or only those named, for example
+    "1883170887_Project Tasks") from a monday.com export zip as
+    dataframes keyed by board name.
+
+    Boards are read from their Parquet cache where the zip member's CRC
+    matches and are otherwise parsed within a process pool bounded by
+    max_workers and cached, removing the board's caches for other CRCs.
+    """
+
+    cache_dir = pathlib.Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    df_boards = list_boards(zip_path)
+    if boards is not None:
+        missing = set(boards) - set(df_boards["board"])
+        if missing:
+            raise KeyError(f"Boards not found in {zip_path}: {sorted(missing)}")
+        df_boards = df_boards[df_boards["board"].isin(boards)]
+
+    cache_paths = {
+        row.board: board_cache_path(row.board, row.crc, skiprows, cache_dir)
+        for row in df_boards.itertuples()
+    }
+    to_parse = [
+        row for row in df_boards.itertuples() if not cache_paths[row.board].exists()
+    ]
+    jobs = [
+        (str(zip_path), row.member, skiprows, str(cache_paths[row.board]))
+        for row in to_parse
+    ]
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_parse_board_member, jobs))
+        for row in to_parse:
+            prune_board_cache(row.board, row.crc, cache_dir)
+
+    return {board: pd.read_parquet(path) for board, path in cache_paths.items()}
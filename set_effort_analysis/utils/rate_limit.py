@@ -0,0 +1,223 @@
+"""
+Rate-limit-aware scheduling for GitHub API requests.
+
+Requests are paced with a token bucket, GitHub rate limit headers
+(X-RateLimit-Remaining / X-RateLimit-Reset and Retry-After) are used to
+wait only when quota is actually exhausted, and failed requests are
+retried with jittered exponential backoff. Several access tokens may be
+provided to rotate requests across their separate quotas.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RateLimitScheduler:
+    """
+    Tracks GitHub rate limit state per access token and API resource
+    (core, search, graphql) and decides when requests may be sent.
+    """
+
+    def __init__(
+        self,
+        tokens: Optional[List[str]] = None,
+        requests_per_second: float = 10.0,
+        burst: int = 10,
+        min_remaining: int = 10,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 120.0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.tokens = [token for token in (tokens or []) if token]
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.min_remaining = min_remaining
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.clock = clock
+
+        # rate limit state by (token, resource), filled from response headers
+        self.limits: Dict[Tuple[Optional[str], str], Dict[str, float]] = {}
+        self.stats = {"requests": 0, "retries": 0, "waited_seconds": 0.0}
+
+        self._lock = threading.Lock()
+        self._allowance = float(burst)
+        self._last_refill = clock()
+        self._blocked_until = 0.0
+
+    @staticmethod
+    def resource_for(url: str) -> str:
+        """
+        Determines which GitHub rate limit resource a url counts against.
+        """
+
+        path = requests.utils.urlparse(url).path
+        if path.endswith("/graphql"):
+            return "graphql"
+        if "/search/" in path:
+            return "search"
+        return "core"
+
+    def _token_wait(self, resource: str) -> Tuple[Optional[str], float]:
+        """
+        Chooses the token with the most remaining quota for a resource,
+        returning how long to wait where every token is exhausted
+        (expects the lock to be held). Where no tokens are managed the
+        quota of the caller's own token is tracked under None.
+        """
+
+        now = self.clock()
+        available = []
+        resets = []
+        for token in self.tokens or [None]:
+            limit = self.limits.get((token, resource))
+            if limit is None or limit["reset"] <= now:
+                available.append((float("inf"), token))
+            elif limit["remaining"] > self.min_remaining:
+                available.append((limit["remaining"], token))
+            else:
+                resets.append(limit["reset"])
+
+        if available:
+            return max(available, key=lambda item: item[0])[1], 0.0
+
+        # wait for the earliest reset (with a second of leeway)
+        return None, min(resets) - now + 1
+
+    def acquire(self, url: str) -> Optional[str]:
+        """
+        Blocks until a request to url may be sent, returning the
+        access token to use for it (or None where no tokens are managed).
+        """
+
+        resource = self.resource_for(url)
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._allowance = min(
+                    self.burst,
+                    self._allowance
+                    + (now - self._last_refill) * self.requests_per_second,
+                )
+                self._last_refill = now
+
+                if self._blocked_until > now:
+                    wait = self._blocked_until - now
+                elif self._allowance < 1:
+                    wait = (1 - self._allowance) / self.requests_per_second
+                else:
+                    token, wait = self._token_wait(resource)
+                    if wait <= 0:
+                        self._allowance -= 1
+                        self.stats["requests"] += 1
+                        # optimistically reserve quota for concurrent callers
+                        limit = self.limits.get((token, resource))
+                        if limit is not None:
+                            limit["remaining"] -= 1
+                        return token
+
+                self.stats["waited_seconds"] += wait
+            self.sleep(wait)
+
+    def update(self, token: Optional[str], response: requests.Response) -> None:
+        """
+        Records rate limit state from GitHub response headers.
+        """
+
+        if "X-RateLimit-Remaining" not in response.headers:
+            return
+
+        resource = response.headers.get(
+            "X-RateLimit-Resource", self.resource_for(response.url)
+        )
+        with self._lock:
+            self.limits[(token, resource)] = {
+                "remaining": int(response.headers["X-RateLimit-Remaining"]),
+                "reset": float(response.headers.get("X-RateLimit-Reset", 0)),
+            }
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter for a retry attempt.
+        """
+
+        return random.uniform(  # nosec B311
+            0, min(self.backoff_max, self.backoff_base * 2**attempt)
+        )
+
+    def retry_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+        """
+        Determines how long to wait before retrying a response,
+        returning None where the response should not be retried.
+        Secondary rate limits pause every request using this scheduler.
+        """
+
+        if attempt >= self.max_retries:
+            return None
+
+        if response.status_code in (403, 429):
+            if "Retry-After" in response.headers:
+                delay = float(response.headers["Retry-After"])
+            elif response.headers.get("X-RateLimit-Remaining") == "0":
+                # primary limit reached, acquire will rotate tokens or
+                # wait until the quota resets
+                delay = 0.0
+            elif (
+                response.status_code == 429
+                or "secondary rate limit" in response.text.lower()
+            ):
+                delay = self.backoff(attempt) + self.backoff_base
+            else:
+                return None
+        elif response.status_code >= 500:
+            delay = self.backoff(attempt)
+        else:
+            return None
+
+        with self._lock:
+            self.stats["retries"] += 1
+            self.stats["waited_seconds"] += delay
+            if response.status_code in (403, 429) and delay > 0:
+                self._blocked_until = max(self._blocked_until, self.clock() + delay)
+
+        return delay
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Requests transport adapter which sends every request through a
+    RateLimitScheduler, rotating tokens and retrying rate limited or
+    failed requests.
+    """
+
+    def __init__(self, scheduler: RateLimitScheduler, **kwargs):
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            token = self.scheduler.acquire(request.url)
+            if token is not None:
+                request.headers["Authorization"] = f"Bearer {token}"
+
+            response = super().send(request, **kwargs)
+            self.scheduler.update(token, response)
+
+            delay = self.scheduler.retry_delay(response, attempt)
+            if delay is None:
+                return response
+
+            response.close()
+            if delay > 0:
+                self.scheduler.sleep(delay)
+            attempt += 1
@@ -0,0 +1,235 @@
+"""
+Offline checks of the rate limit scheduler against a local fake GitHub server.
+
+Each check sends requests through a RateLimitedAdapter to a
+FakeGitHubServer with injected rate limits, with the scheduler and server
+sharing a simulated clock (scheduler waits advance it) so hour-long quota
+resets are checked instantly. Checks cover honoring Retry-After, pausing
+on 403 responses with X-RateLimit-Remaining: 0 until the quota resets and
+keeping separate limits for each token and resource, for example:
+
+python -m utils.rate_limit_check
+"""
+
+import argparse
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from utils.fake_github import FakeGitHubServer
+from utils.rate_limit import RateLimitedAdapter, RateLimitScheduler
+
+# org synthesized by the fake server for core requests
+CHECK_ORG = "rate-limit-check"
+
+
+class SimulatedClock:
+    """
+    Clock shared by the scheduler and fake server, where sleeping
+    advances time immediately.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        self.now = time.time() if start is None else start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds: float) -> None:
+        with self._lock:
+            self.now += max(0.0, seconds)
+
+
+def _session(scheduler: RateLimitScheduler) -> requests.Session:
+    """
+    Forms a requests session sending every request through the scheduler.
+    """
+
+    session = requests.Session()
+    session.mount("http://", RateLimitedAdapter(scheduler))
+
+    return session
+
+
+def _scheduler(
+    clock: SimulatedClock, tokens: List[str], min_remaining: int = 0
+) -> RateLimitScheduler:
+    """
+    Forms a scheduler on the simulated clock (with pacing fast enough
+    that only rate limits cause waits).
+    """
+
+    return RateLimitScheduler(
+        tokens=tokens,
+        requests_per_second=1000.0,
+        burst=1000,
+        min_remaining=min_remaining,
+        sleep=clock.sleep,
+        clock=clock.time,
+    )
+
+
+def check_retry_after(server: FakeGitHubServer, clock: SimulatedClock) -> str:
+    """
+    A secondary rate limit (403 with Retry-After) delays the retry and
+    requests which follow by at least Retry-After seconds.
+    """
+
+    retry_after = 30
+    scheduler = _scheduler(clock, tokens=["token-a"])
+    session = _session(scheduler)
+    server.add_secondary_rate_limits(count=1, retry_after=retry_after)
+
+    start = clock.time()
+    response = session.get(f"{server.url}/orgs/{CHECK_ORG}")
+    log = server.request_log
+
+    assert response.status_code == 200, f"final status {response.status_code}"
+    assert [status for _, _, _, status in log] == [403, 200], f"log {log}"
+    assert log[1][0] - log[0][0] >= retry_after, "retried before Retry-After"
+    assert clock.time() - start >= retry_after, "did not wait for Retry-After"
+
+    return f"retried once after {log[1][0] - log[0][0]:.0f}s"
+
+
+def check_exhausted_quota(server: FakeGitHubServer, clock: SimulatedClock) -> str:
+    """
+    A 403 with X-RateLimit-Remaining: 0 (quota spent elsewhere) pauses
+    the token's requests until the quota resets, without retrying early.
+    """
+
+    reset_after = 15 * 60
+    scheduler = _scheduler(clock, tokens=["token-a"])
+    session = _session(scheduler)
+    server.exhaust_quota("token-a", "core", reset_after=reset_after)
+
+    reset = clock.time() + reset_after
+    response = session.get(f"{server.url}/orgs/{CHECK_ORG}")
+    log = server.request_log
+
+    assert response.status_code == 200, f"final status {response.status_code}"
+    assert [status for _, _, _, status in log] == [403, 200], f"log {log}"
+    assert log[1][0] >= reset, "retried before the quota reset"
+
+    return f"retried once {log[1][0] - log[0][0]:.0f}s later (after reset)"
+
+
+def check_token_and_resource_limits(
+    server: FakeGitHubServer, clock: SimulatedClock
+) -> str:
+    """
+    Quotas are kept per token and per resource: core requests rotate
+    across tokens until every token's core quota is spent, search
+    requests continue while core is exhausted, and only further core
+    requests wait for the reset.
+    """
+
+    tokens = ["token-a", "token-b"]
+    scheduler = _scheduler(clock, tokens=tokens)
+    session = _session(scheduler)
+
+    start = clock.time()
+    for _ in range(server.rate_limit * len(tokens)):
+        session.get(f"{server.url}/orgs/{CHECK_ORG}")
+    for _ in range(server.rate_limit):
+        session.get(f"{server.url}/search/issues", params={"q": "is:pr"})
+    before_reset = clock.time()
+    session.get(f"{server.url}/orgs/{CHECK_ORG}")
+    log = server.request_log
+
+    assert all(status == 200 for _, _, _, status in log), "rate limited request"
+    core_counts = {
+        token: sum(
+            1
+            for _, logged, resource, _ in log[:-1]
+            if logged == token and resource == "core"
+        )
+        for token in tokens
+    }
+    assert core_counts == {
+        token: server.rate_limit for token in tokens
+    }, f"core requests by token {core_counts}"
+    assert before_reset == start, "waited before every quota was spent"
+    assert log[-1][0] - start >= server.rate_limit_window, "quota reset not awaited"
+
+    return (
+        f"core by token {core_counts}, search unaffected, "
+        f"next core request after {log[-1][0] - start:.0f}s"
+    )
+
+
+# checks which may be run
+CHECKS: Dict[str, Callable[[FakeGitHubServer, SimulatedClock], str]] = {
+    "retry-after": check_retry_after,
+    "exhausted-quota": check_exhausted_quota,
+    "token-and-resource-limits": check_token_and_resource_limits,
+}
+
+
+def run_checks(checks: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Runs the scheduler checks (by default, every check), each against
+    a fresh fake server, returning whether each passed.
+    """
+
+    results: List[Dict[str, Any]] = []
+    for name in checks or list(CHECKS):
+        clock = SimulatedClock()
+        with FakeGitHubServer(
+            orgs={CHECK_ORG: 1},
+            rate_limit=5,
+            rate_limit_window=60 * 60,
+            clock=clock.time,
+        ) as server:
+            try:
+                detail = CHECKS[name](server, clock)
+                passed = True
+            except AssertionError as error:
+                detail = str(error)
+                passed = False
+            results.append(
+                {
+                    "check": name,
+                    "passed": passed,
+                    "requests": server.stats["requests"],
+                    "rate_limited": server.stats["rate_limited"],
+                    "detail": detail,
+                }
+            )
+
+    return pd.DataFrame(results)
+
+
+def main(argv: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Command line entry point for the scheduler checks.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Check the rate limit scheduler against a local fake GitHub server."
+    )
+    parser.add_argument(
+        "--check",
+        action="append",
+        choices=list(CHECKS),
+        help="Check to run (may be repeated, defaults to all).",
+    )
+    args = parser.parse_args(argv)
+
+    df_results = run_checks(checks=args.check)
+
+    print(df_results.to_string(index=False))
+    if not df_results["passed"].all():
+        sys.exit(1)
+
+    return df_results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Content-addressed README store with a full-text search index.
+
+README contents are stored once per git blob SHA (compressed), so
+repository records only carry the SHA and unchanged READMEs never need
+to be downloaded again. README, description and topic text for each
+repository is indexed with SQLite FTS5 for keyword searches.
+"""
+
+import json
+import pathlib
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Optional, Set, Union
+
+import pandas as pd
+
+# default location for the readme store
+DEFAULT_README_STORE_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/github.com/readme-store.sqlite"
+)
+
+
+class ReadmeStore:
+    """
+    Stores README blobs by SHA and indexes repository text for search.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path] = DEFAULT_README_STORE_PATH):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, content BLOB)"
+        )
+        self._connection.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS repo_text USING fts5(
+                repo UNINDEXED,
+                description,
+                topics,
+                readme,
+                tokenize = 'porter unicode61'
+            )
+            """
+        )
+        self._connection.commit()
+
+    def missing(self, shas: Iterable[str]) -> Set[str]:
+        """
+        Finds which SHAs do not yet have stored contents.
+        """
+
+        shas = set(shas)
+        with self._lock:
+            stored = {
+                sha
+                for (sha,) in self._connection.execute(
+                    "SELECT sha FROM blobs WHERE sha IN (SELECT value FROM json_each(?))",
+                    (json.dumps(sorted(shas)),),
+                )
+            }
+
+        return shas - stored
+
+    def put(self, sha: str, content: bytes) -> None:
+        """
+        Stores (compressed) contents for a SHA where not already stored.
+        """
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO blobs VALUES (?, ?)",
+                (sha, zlib.compress(content)),
+            )
+            self._connection.commit()
+
+    def get(self, sha: str) -> Optional[bytes]:
+        """
+        Retrieves the contents for a SHA, returning None where none are stored.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content FROM blobs WHERE sha = ?", (sha,)
+            ).fetchone()
+
+        return zlib.decompress(row[0]) if row is not None else None
+
+    def index_repo(self, record: Dict[str, Any]) -> None:
+        """
+        Replaces the indexed description, topics and README text
+        for a landscape repository record.
+        """
+
+        readme = (
+            self.get(record["GitHub Readme SHA"])
+            if record.get("GitHub Readme SHA")
+            else None
+        )
+
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM repo_text WHERE repo = ?",
+                (record["GitHub Repo Full Name"],),
+            )
+            self._connection.execute(
+                "INSERT INTO repo_text VALUES (?, ?, ?, ?)",
+                (
+                    record["GitHub Repo Full Name"],
+                    record.get("GitHub Description") or "",
+                    " ".join(record.get("GitHub Topics") or []),
+                    readme.decode("utf-8", errors="replace") if readme else "",
+                ),
+            )
+            self._connection.commit()
+
+    def search(self, query: str, limit: int = 20) -> pd.DataFrame:
+        """
+        Searches indexed repositories using an FTS5 query (for example,
+        "single cell" OR imaging), returning the best matching repositories
+        with a highlighted README snippet.
+        """
+
+        with self._lock:
+            return pd.read_sql_query(
+                """
+                SELECT
+                    repo,
+                    bm25(repo_text) AS rank,
+                    snippet(repo_text, 3, '[', ']', '...', 16) AS readme_snippet
+                FROM repo_text
+                WHERE repo_text MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                self._connection,
+                params=(query, limit),
+            )
@@ -0,0 +1,118 @@
+"""
+Rule-based categorization of effort tasks by client and task name.
+
+Categories (include and exclude ILIKE patterns, optionally scoped to
+clients) are declared within a rule file. Every pattern is compiled into
+one combined regular expression of optional lookaheads, so one match of
+each distinct task name finds all the patterns it matches. Tasks are
+labeled with the first matching category, turning effort questions
+into group-bys over a category column.
+"""
+
+import pathlib
+import re
+from typing import Any, Dict, List, Union
+
+import pandas as pd
+from box import Box
+
+# default location for the task category rule file
+DEFAULT_TASK_CATEGORIES_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/analysis/task-categories.yaml"
+)
+
+
+def like_to_regex(pattern: str) -> str:
+    """
+    Converts an SQL LIKE pattern (% for any text, _ for any one
+    character) into a regular expression matching from the start of text.
+    """
+
+    regex = "".join(
+        ".*?" if char == "%" else "." if char == "_" else re.escape(char)
+        for char in pattern
+    )
+
+    return regex if pattern.endswith("%") else regex + r"\Z"
+
+
+class TaskCategorizer:
+    """
+    Labels tasks with the first of an ordered list of categories (each a
+    dictionary with a name, include patterns and optional exclude patterns
+    and clients) which the task matches.
+    """
+
+    def __init__(self, categories: List[Dict[str, Any]]):
+        self.categories = categories
+        self.patterns = list(
+            dict.fromkeys(
+                pattern
+                for category in categories
+                for pattern in [
+                    *category.get("include", []),
+                    *category.get("exclude", []),
+                ]
+            )
+        )
+        # (each optional lookahead records whether its pattern matches
+        # through an empty named group, so one match tests every pattern)
+        self.regex = re.compile(
+            r"\A"
+            + "".join(
+                f"(?:(?={like_to_regex(pattern)}(?P<p{idx}>)))?"
+                for idx, pattern in enumerate(self.patterns)
+            ),
+            flags=re.IGNORECASE | re.DOTALL,
+        )
+
+    @classmethod
+    def from_file(
+        cls, path: Union[str, pathlib.Path] = DEFAULT_TASK_CATEGORIES_PATH
+    ) -> "TaskCategorizer":
+        """
+        Reads categories from a YAML rule file (a categories list).
+        """
+
+        return cls(categories=Box.from_yaml(filename=str(path)).categories.to_list())
+
+    def match_patterns(self, names: pd.Series) -> pd.DataFrame:
+        """
+        Matches task names against every pattern in one pass, returning
+        a boolean dataframe with a column for each pattern.
+        """
+
+        matched = names.fillna("").str.extract(self.regex).notna()
+        matched.columns = self.patterns
+
+        return matched
+
+    def categorize(self, clients: pd.Series, names: pd.Series) -> pd.Series:
+        """
+        Labels each task (by client and task name) with its category,
+        with None for uncategorized tasks. Patterns are matched once for
+        each distinct client and task name pair.
+        """
+
+        tasks = pd.DataFrame(
+            {"client": clients.fillna("").values, "name": names.fillna("").values}
+        )
+        distinct = tasks.drop_duplicates().reset_index(drop=True)
+        matched = self.match_patterns(distinct["name"])
+
+        labels = pd.Series(None, index=distinct.index, dtype=object)
+        for category in self.categories:
+            selected = labels.isna() & matched[category["include"]].any(axis=1)
+            if category.get("exclude"):
+                selected &= ~matched[category["exclude"]].any(axis=1)
+            if category.get("clients"):
+                selected &= distinct["client"].isin(category["clients"])
+            labels[selected] = category["name"]
+
+        return pd.Series(
+            tasks.merge(
+                distinct.assign(category=labels), on=["client", "name"], how="left"
+            )["category"].values,
+            index=names.index,
+            name="category",
+        )
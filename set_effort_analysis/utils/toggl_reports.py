@@ -0,0 +1,345 @@
+"""
+Bulk, incremental collection of Toggl Track time entries.
+
+The workspace is resolved once and detailed report pages are requested
+for the longest date ranges the reports API allows (a year), with pages
+fetched concurrently and paced by a rate limit scheduler. Entries are
+stored in a Parquet dataset partitioned by day (as date=<YYYY-MM-DD>
+directories, including empty files for days without entries) so later
+collections only request days which are not already stored.
+"""
+
+import math
+import pathlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.rate_limit import RateLimitedAdapter, RateLimitScheduler
+
+# base url for the Toggl Track APIs
+TOGGL_API_URL = "https://api.track.toggl.com"
+
+# user agent sent with report requests (required by the reports API)
+TOGGL_USER_AGENT = "set-effort-analysis"
+
+# default location for the time entry dataset
+DEFAULT_TOGGL_ENTRIES_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/toggl.com/time-entries"
+)
+
+# longest date range (in days) accepted by the reports API
+MAX_REPORT_DAYS = 365
+
+# schema for stored time entries (matching the detailed report fields)
+TOGGL_ENTRY_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("pid", pa.int64()),
+        ("tid", pa.int64()),
+        ("uid", pa.int64()),
+        ("description", pa.string()),
+        ("start", pa.string()),
+        ("end", pa.string()),
+        ("updated", pa.string()),
+        ("dur", pa.int64()),
+        ("user", pa.string()),
+        ("client", pa.string()),
+        ("project", pa.string()),
+        ("task", pa.string()),
+        ("is_billable", pa.bool_()),
+        ("tags", pa.list_(pa.string())),
+    ]
+)
+
+# hive style partitioning of the time entry dataset by day
+TOGGL_PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+def get_toggl_session(
+    api_token: str,
+    requests_per_second: float = 1.0,
+    adapter: Optional[HTTPAdapter] = None,
+) -> requests.Session:
+    """
+    Forms a requests session authorized for Toggl with an api token.
+
+    Requests are paced (Toggl allows about one request per second) and
+    rate limited (429) or failed requests are retried with backoff,
+    unless another transport adapter is provided.
+    """
+
+    session = requests.Session()
+    session.auth = (api_token, "api_token")
+    adapter = adapter or RateLimitedAdapter(
+        RateLimitScheduler(requests_per_second=requests_per_second, burst=1)
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def get_default_workspace_id(
+    session: requests.Session, api_url: str = TOGGL_API_URL
+) -> int:
+    """
+    Finds the id of the first (default) workspace of the Toggl user.
+    """
+
+    response = session.get(f"{api_url}/api/v9/me/workspaces")
+    response.raise_for_status()
+
+    return response.json()[0]["id"]
+
+
+def date_ranges(
+    days: Iterable[date], max_days: int = MAX_REPORT_DAYS
+) -> List[Tuple[date, date]]:
+    """
+    Groups days into contiguous (since, until) ranges of at most max_days.
+    """
+
+    ranges: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if (
+            ranges
+            and ranges[-1][1] + timedelta(days=1) == day
+            and (day - ranges[-1][0]).days < max_days
+        ):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+
+    return ranges
+
+
+def get_detailed_report_page(
+    session: requests.Session,
+    workspace_id: int,
+    since: date,
+    until: date,
+    page: int = 1,
+    api_url: str = TOGGL_API_URL,
+) -> Dict[str, Any]:
+    """
+    Requests one page of a detailed report (time entries) for a date range.
+    """
+
+    response = session.get(
+        f"{api_url}/reports/api/v2/details",
+        params={
+            "workspace_id": workspace_id,
+            "since": since.isoformat(),
+            "until": until.isoformat(),
+            "page": page,
+            "user_agent": TOGGL_USER_AGENT,
+        },
+    )
+    response.raise_for_status()
+
+    return response.json()
+
+
+class TogglEntryStore:
+    """
+    Stores Toggl time entries within a Parquet dataset partitioned by day.
+    A day is stored once all of its entries were collected, so stored days
+    are never requested again.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path] = DEFAULT_TOGGL_ENTRIES_PATH):
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def partition_path(self, day: date) -> pathlib.Path:
+        """
+        Forms the partition directory for a day.
+        """
+
+        return self.path / f"date={day.isoformat()}"
+
+    def stored_days(self) -> Set[date]:
+        """
+        Finds the days which have been stored.
+        """
+
+        return {
+            date.fromisoformat(partition.name.split("=", 1)[1])
+            for partition in self.path.glob("date=*")
+            if (partition / "entries.parquet").exists()
+        }
+
+    def missing_days(self, since: date, until: date) -> List[date]:
+        """
+        Lists the days from since through until which have not been stored.
+        """
+
+        stored = self.stored_days()
+
+        return [
+            since + timedelta(days=offset)
+            for offset in range((until - since).days + 1)
+            if since + timedelta(days=offset) not in stored
+        ]
+
+    def write_days(
+        self, entries: Iterable[Dict[str, Any]], since: date, until: date
+    ) -> int:
+        """
+        Writes the entries for every day from since through until
+        (replacing stored days), returning the number of entries written.
+        """
+
+        by_day: Dict[date, Dict[int, Dict[str, Any]]] = {}
+        for entry in entries:
+            # (keyed by id as pages may overlap where entries change)
+            by_day.setdefault(date.fromisoformat(entry["start"][:10]), {})[
+                entry["id"]
+            ] = entry
+
+        written = 0
+        for offset in range((until - since).days + 1):
+            day = since + timedelta(days=offset)
+            day_entries = sorted(
+                by_day.get(day, {}).values(), key=lambda entry: entry["start"]
+            )
+            partition_path = self.partition_path(day)
+            partition_path.mkdir(parents=True, exist_ok=True)
+            # write then rename so interrupted runs never leave partial days
+            pq.write_table(
+                pa.Table.from_pylist(day_entries, schema=TOGGL_ENTRY_SCHEMA),
+                partition_path / "entries.parquet.tmp",
+            )
+            (partition_path / "entries.parquet.tmp").replace(
+                partition_path / "entries.parquet"
+            )
+            written += len(day_entries)
+
+        return written
+
+    def read(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> pd.DataFrame:
+        """
+        Reads stored entries (optionally only from since through until)
+        as a dataframe including the date of each entry.
+        """
+
+        dataset = ds.dataset(
+            sorted(str(path) for path in self.path.glob("date=*/entries.parquet")),
+            schema=TOGGL_ENTRY_SCHEMA.append(pa.field("date", pa.string())),
+            format="parquet",
+            partitioning=TOGGL_PARTITIONING,
+            partition_base_dir=str(self.path),
+        )
+        day_filter = None
+        if since is not None:
+            day_filter = ds.field("date") >= since.isoformat()
+        if until is not None:
+            until_filter = ds.field("date") <= until.isoformat()
+            day_filter = (
+                until_filter if day_filter is None else day_filter & until_filter
+            )
+
+        return dataset.to_table(filter=day_filter).to_pandas()
+
+
+def collect_toggl_entries(
+    session: requests.Session,
+    since: date,
+    until: Optional[date] = None,
+    workspace_id: Optional[int] = None,
+    store: Optional[TogglEntryStore] = None,
+    max_workers: int = 4,
+    api_url: str = TOGGL_API_URL,
+) -> int:
+    """
+    Collects time entries for the days from since through until (by
+    default, yesterday) which have not already been stored, returning
+    the number of entries written.
+
+    Missing days are requested as ranges of up to a year, first pages
+    for every range and then their remaining pages concurrently (bounded
+    by max_workers). Only complete days (before today) are stored, and
+    each range is stored once all of its pages have been collected.
+    """
+
+    store = store or TogglEntryStore()
+    until = min(until or date.today(), date.today() - timedelta(days=1))
+    ranges = date_ranges(store.missing_days(since, until))
+    if not ranges:
+        return 0
+
+    if workspace_id is None:
+        workspace_id = get_default_workspace_id(session=session, api_url=api_url)
+
+    def get_page(date_range: Tuple[date, date], page: int) -> Dict[str, Any]:
+        return get_detailed_report_page(
+            session=session,
+            workspace_id=workspace_id,
+            since=date_range[0],
+            until=date_range[1],
+            page=page,
+            api_url=api_url,
+        )
+
+    written = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        first_pages = {
+            executor.submit(get_page, date_range, 1): date_range
+            for date_range in ranges
+        }
+        for future in as_completed(first_pages):
+            date_range = first_pages[future]
+            first_page = future.result()
+            pages = (
+                math.ceil(first_page["total_count"] / first_page["per_page"])
+                if first_page.get("per_page")
+                else 1
+            )
+            entries = first_page["data"] + [
+                entry
+                for page in executor.map(
+                    lambda page: get_page(date_range, page), range(2, pages + 1)
+                )
+                for entry in page["data"]
+            ]
+            written += store.write_days(entries, *date_range)
+
+    return written
+
+
+def summarize_toggl_entries(df_entries: pd.DataFrame) -> pd.DataFrame:
+    """
+    Totals time entry durations by client, project and description (as
+    with the Toggl summary report exports), with durations as HH:MM:SS.
+    """
+
+    df_summary = (
+        df_entries.groupby(
+            ["client", "project", "description"], dropna=False, as_index=False
+        )["dur"]
+        .sum()
+        .rename(
+            columns={
+                "client": "Client",
+                "project": "Project",
+                "description": "Description",
+            }
+        )
+    )
+    seconds = df_summary.pop("dur") // 1000
+    df_summary["Duration"] = [
+        f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+        for total in seconds
+    ]
+
+    return df_summary
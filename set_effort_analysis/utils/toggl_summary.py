@@ -0,0 +1,284 @@
+"""
+Deduplicating DuckDB ingest of Toggl Track summary report CSV exports.
+
+Summary exports (named DB-Toggl_Track_summary_report_<since>_<until>.csv)
+total durations over their whole date range, so rows from exports with
+overlapping ranges cannot be told apart and would be counted twice.
+Each export's date range is recorded and overlaps are resolved by
+precedence: exports ending latest win, then the widest, then the most
+recently modified. Exports within the range of a winning export are
+superseded and never read. Only new or changed exports are read (with
+one parallel DuckDB read_csv over all of them), so later ingests cost
+only their own rows.
+"""
+
+import pathlib
+import re
+import warnings
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import duckdb
+import pandas as pd
+
+# default location for the ingested summary database
+DEFAULT_TOGGL_SUMMARY_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/toggl.com/toggl-summary.duckdb"
+)
+
+# default location and file name pattern of the summary report exports
+DEFAULT_TOGGL_EXPORT_DIR = pathlib.Path(__file__).parents[2] / "data/toggl.com"
+TOGGL_EXPORT_GLOB = "DB-Toggl_Track_summary_report_*.csv"
+
+# summary report date range within export file names
+EXPORT_DATE_RANGE_PATTERN = re.compile(
+    r"_(?P<since>\d{4}-\d{2}-\d{2})_(?P<until>\d{4}-\d{2}-\d{2})\.csv$"
+)
+
+# columns kept from the summary report exports
+SUMMARY_COLUMNS = ["Client", "Project", "Description", "Duration"]
+
+# export statuses (only active exports have rows in toggl_summary)
+ACTIVE = "active"
+SUPERSEDED = "superseded"
+OVERLAPPING = "overlapping"
+
+
+def export_date_range(path: Union[str, pathlib.Path]) -> Tuple[date, date]:
+    """
+    Finds the date range of a summary report export from its file name.
+    """
+
+    match = EXPORT_DATE_RANGE_PATTERN.search(pathlib.Path(path).name)
+    if match is None:
+        raise ValueError(f"No date range found in Toggl export name: {path}")
+
+    return date.fromisoformat(match["since"]), date.fromisoformat(match["until"])
+
+
+def resolve_exports(exports: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Decides the status of each export (by name) from their date ranges.
+
+    Exports are considered in precedence order (latest date_end, then
+    earliest date_start, then latest modified). An export is active
+    unless its range lies within an active export (superseded) or
+    partially overlaps one (overlapping, which is also excluded as its
+    rows cannot be split by date).
+    """
+
+    active: List[Tuple[date, date]] = []
+    statuses = {}
+    for export in sorted(
+        exports,
+        key=lambda export: (
+            -export["date_end"].toordinal(),
+            export["date_start"].toordinal(),
+            -export["modified"],
+        ),
+    ):
+        span = (export["date_start"], export["date_end"])
+        if any(start <= span[0] and span[1] <= end for start, end in active):
+            statuses[export["export"]] = SUPERSEDED
+        elif any(span[0] <= end and start <= span[1] for start, end in active):
+            statuses[export["export"]] = OVERLAPPING
+        else:
+            statuses[export["export"]] = ACTIVE
+            active.append(span)
+
+    return statuses
+
+
+class TogglSummaryStore:
+    """
+    Stores deduplicated Toggl summary report rows (toggl_summary) and the
+    date range and status of each ingested export (toggl_exports) within
+    a DuckDB database.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path] = DEFAULT_TOGGL_SUMMARY_PATH):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.connection = duckdb.connect(str(self.path))
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS toggl_exports (
+                export VARCHAR,
+                path VARCHAR,
+                date_start DATE,
+                date_end DATE,
+                file_size BIGINT,
+                modified DOUBLE,
+                status VARCHAR,
+                row_count BIGINT,
+                ingested_at TIMESTAMP
+            )
+            """
+        )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS toggl_summary (
+                export VARCHAR,
+                Client VARCHAR,
+                Project VARCHAR,
+                Description VARCHAR,
+                Duration VARCHAR
+            )
+            """
+        )
+
+    def exports(self) -> pd.DataFrame:
+        """
+        Lists the ingested exports with their date range, status and rows.
+        """
+
+        return self.connection.execute(
+            "SELECT * FROM toggl_exports ORDER BY date_start, date_end"
+        ).df()
+
+    def ingest(
+        self, paths: Optional[Iterable[Union[str, pathlib.Path]]] = None
+    ) -> pd.DataFrame:
+        """
+        Ingests summary report exports (by default, every export within
+        DEFAULT_TOGGL_EXPORT_DIR), reading only exports which are new or
+        changed (by size and modified time) and active after resolving
+        overlaps. Returns the ingested exports.
+        """
+
+        if paths is None:
+            paths = sorted(DEFAULT_TOGGL_EXPORT_DIR.glob(TOGGL_EXPORT_GLOB))
+
+        stored = {
+            export["export"]: export
+            for export in self.connection.execute("SELECT * FROM toggl_exports")
+            .df()
+            .to_dict(orient="records")
+        }
+        found = {}
+        for path in map(pathlib.Path, paths):
+            date_start, date_end = export_date_range(path)
+            stat = path.stat()
+            found[path.name] = {
+                "export": path.name,
+                "path": str(path.resolve()),
+                "date_start": date_start,
+                "date_end": date_end,
+                "file_size": stat.st_size,
+                "modified": stat.st_mtime,
+            }
+
+        changed = {
+            name
+            for name, export in found.items()
+            if name not in stored
+            or stored[name]["file_size"] != export["file_size"]
+            or stored[name]["modified"] != export["modified"]
+        }
+        # (exports no longer found keep their rows and status)
+        exports = {
+            **{
+                name: dict(
+                    export,
+                    date_start=pd.Timestamp(export["date_start"]).date(),
+                    date_end=pd.Timestamp(export["date_end"]).date(),
+                )
+                for name, export in stored.items()
+            },
+            **{name: found[name] for name in changed},
+        }
+        statuses = resolve_exports(exports.values())
+
+        to_remove = [
+            name
+            for name in stored
+            if name in changed or statuses[name] != stored[name]["status"]
+        ]
+        to_read = [
+            name
+            for name, status in statuses.items()
+            if status == ACTIVE
+            and (name in changed or stored[name]["status"] != ACTIVE)
+        ]
+        for name, status in statuses.items():
+            if status == OVERLAPPING:
+                warnings.warn(
+                    f"Excluding Toggl export {name} which partially overlaps "
+                    "a more recent export",
+                    stacklevel=2,
+                )
+
+        self.connection.execute("BEGIN TRANSACTION")
+        try:
+            for name in to_remove:
+                self.connection.execute(
+                    "DELETE FROM toggl_summary WHERE export = ?", [name]
+                )
+                self.connection.execute(
+                    "DELETE FROM toggl_exports WHERE export = ?", [name]
+                )
+            if to_read:
+                self.connection.execute(
+                    f"""
+                    INSERT INTO toggl_summary
+                    SELECT
+                        regexp_extract(filename, '[^/\\\\]+$') AS export,
+                        {", ".join(SUMMARY_COLUMNS)}
+                    FROM read_csv_auto(
+                        ?,
+                        header=true,
+                        filename=true,
+                        union_by_name=true,
+                        all_varchar=true
+                    )
+                    """,
+                    [[exports[name]["path"] for name in to_read]],
+                )
+            row_counts = dict(
+                self.connection.execute(
+                    "SELECT export, COUNT(*) FROM toggl_summary GROUP BY export"
+                ).fetchall()
+            )
+            ingested_at = datetime.now()
+            for name in changed | set(to_remove):
+                if name not in exports:
+                    continue
+                export = exports[name]
+                self.connection.execute(
+                    "INSERT INTO toggl_exports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        name,
+                        export["path"],
+                        export["date_start"],
+                        export["date_end"],
+                        export["file_size"],
+                        export["modified"],
+                        statuses[name],
+                        row_counts.get(name, 0),
+                        ingested_at,
+                    ],
+                )
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return self.exports()
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Reads the deduplicated summary rows (from active exports only).
+        """
+
+        return self.connection.execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM toggl_summary"
+        ).df()
+
+    def query(self, sql: str, *params: Any) -> pd.DataFrame:
+        """
+        Runs a SQL query over the stored exports and summary rows (tables
+        toggl_exports and toggl_summary), returning a dataframe.
+        """
+
+        return self.connection.execute(sql, list(params)).df()
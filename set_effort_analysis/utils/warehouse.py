@@ -0,0 +1,461 @@
+"""
+Persistent DuckDB warehouse shared by the effort analysis notebooks.
+
+monday.com boards, Toggl summary exports and time entries, GitHub
+landscape repositories, SBOM packages and contribution events are loaded
+into one local DuckDB database, along with materialized tables (the
+monday.com account / project / task join and the combined, categorized
+effort table) derived from them. Each table records a fingerprint of its
+sources so later builds only reload tables whose sources changed.
+Notebooks open the warehouse read-only and query it directly, for
+example after building it with:
+
+python -m utils.warehouse
+"""
+
+import argparse
+import hashlib
+import pathlib
+import warnings
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Union
+
+import duckdb
+import pandas as pd
+
+from utils.event_store import DEFAULT_EVENT_STORE_PATH
+from utils.landscape_analysis import (
+    build_landscape_array,
+    landscape_dataframe,
+    sbom_dependency_table,
+)
+from utils.landscape_store import DEFAULT_LANDSCAPE_RECORDS_PATH, read_landscape_table
+from utils.monday_boards import load_boards
+from utils.task_categories import DEFAULT_TASK_CATEGORIES_PATH, TaskCategorizer
+from utils.toggl_reports import DEFAULT_TOGGL_ENTRIES_PATH
+from utils.toggl_summary import (
+    DEFAULT_TOGGL_EXPORT_DIR,
+    DEFAULT_TOGGL_SUMMARY_PATH,
+    TOGGL_EXPORT_GLOB,
+    TogglSummaryStore,
+)
+
+# default location for the warehouse database
+DEFAULT_WAREHOUSE_PATH = (
+    pathlib.Path(__file__).parents[2] / "data/set-effort-warehouse.duckdb"
+)
+
+# default location for the monday.com account export
+DEFAULT_MONDAY_ZIP_PATH = (
+    pathlib.Path(__file__).parents[2]
+    / "data/monday.com/account_10368903_data_1661961547.zip"
+)
+
+# monday.com boards loaded into the warehouse (by table)
+MONDAY_BOARDS = {
+    "monday_accounts": "1882424009_Accounts",
+    "monday_projects": "1882404316_Customer Projects",
+    "monday_tasks": "1883170887_Project Tasks",
+}
+
+# join of monday.com accounts, projects and tasks (with task columns
+# prefixed by Task_, as task_columns)
+MONDAY_ACCT_PROJECT_TASKS_SQL = """
+WITH accts AS (
+    SELECT
+        "Name" AS Acct_Name,
+        "Type" AS Acct_Type,
+        "Contacts" AS Acct_Contacts,
+        "Notes" AS Acct_Notes
+    FROM monday_accounts
+),
+projects AS (
+    SELECT
+        "Name" AS Project_Name,
+        "Account" AS Project_Account,
+        "Project Contacts" AS "Project_Project Contacts"
+    FROM monday_projects
+    WHERE "Name" IS NOT NULL
+        AND "Account" IS NOT NULL
+        AND "Project Contacts" IS NOT NULL
+)
+SELECT * FROM accts
+JOIN projects ON
+    projects.Project_Account = accts.Acct_Name
+JOIN (SELECT {task_columns} FROM monday_tasks) AS tasks ON
+    tasks."Task_Customer Project" = projects.Project_Name
+"""
+
+# combined monday.com and toggl.com tasks (with monday.com clients
+# relabeled for clarity)
+EFFORT_TASKS_SQL = """
+SELECT
+    'monday.com' AS Source,
+    CASE
+        WHEN Acct_Name = 'HealthAI: Admin & Operations' THEN 'DBMI Administration'
+        ELSE replace(Acct_Name, 'HealthAI: Way Lab', 'Way Lab')
+    END AS Client,
+    Task_Name,
+    CAST("Task_Actual Time" AS VARCHAR) AS Duration
+FROM monday_acct_project_tasks
+UNION ALL
+SELECT 'toggl.com' AS Source, Client, Description AS Task_Name, Duration
+FROM toggl_summary
+"""
+
+
+def fingerprint(*paths: Union[str, pathlib.Path]) -> Optional[str]:
+    """
+    Forms a fingerprint of files and directories (the path, size and
+    modified time of every file within them), returning None where any
+    path does not exist.
+    """
+
+    digest = hashlib.sha256()
+    for path in map(pathlib.Path, paths):
+        if not path.exists():
+            return None
+        for file in sorted([path] if path.is_file() else path.rglob("*")):
+            if file.is_file():
+                stat = file.stat()
+                digest.update(f"{file}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+
+    return digest.hexdigest()
+
+
+class EffortWarehouse:
+    """
+    Builds and queries the warehouse database. Tables are (re)built from
+    their sources with build, while notebooks should open the warehouse
+    with read_only=True (allowing several readers at once).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path] = DEFAULT_WAREHOUSE_PATH,
+        read_only: bool = False,
+    ):
+        self.path = pathlib.Path(path)
+        if read_only:
+            self.connection = duckdb.connect(str(self.path), read_only=True)
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = duckdb.connect(str(self.path))
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS warehouse_tables (
+                table_name VARCHAR,
+                fingerprint VARCHAR,
+                row_count BIGINT,
+                built_at TIMESTAMP
+            )
+            """
+        )
+
+    def query(self, sql: str, *params: Any) -> pd.DataFrame:
+        """
+        Runs a SQL query over the warehouse tables, returning a dataframe.
+        """
+
+        return self.connection.execute(sql, list(params)).df()
+
+    def tables(self) -> pd.DataFrame:
+        """
+        Lists the warehouse tables with their row counts and build times.
+        """
+
+        return self.query("SELECT * FROM warehouse_tables ORDER BY table_name")
+
+    def _fingerprint(self, table_name: str) -> Optional[str]:
+        """
+        Retrieves the stored source fingerprint for a table.
+        """
+
+        row = self.connection.execute(
+            "SELECT fingerprint FROM warehouse_tables WHERE table_name = ?",
+            [table_name],
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def _replace_table(
+        self,
+        table_name: str,
+        source_fingerprint: str,
+        create: Callable[[duckdb.DuckDBPyConnection], None],
+    ) -> None:
+        """
+        Replaces a table (created by create, which is given the
+        connection) and its stored fingerprint within one transaction.
+        """
+
+        self.connection.execute("BEGIN TRANSACTION")
+        try:
+            create(self.connection)
+            row_count = self.connection.execute(
+                f'SELECT COUNT(*) FROM "{table_name}"'
+            ).fetchone()[0]
+            self.connection.execute(
+                "DELETE FROM warehouse_tables WHERE table_name = ?", [table_name]
+            )
+            self.connection.execute(
+                "INSERT INTO warehouse_tables VALUES (?, ?, ?, ?)",
+                [table_name, source_fingerprint, row_count, datetime.now()],
+            )
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def _replace_from_df(
+        self, table_name: str, source_fingerprint: str, df: pd.DataFrame
+    ) -> None:
+        """
+        Replaces a table with the contents of a dataframe.
+        """
+
+        self.connection.register("df_source", df)
+        try:
+            self._replace_table(
+                table_name,
+                source_fingerprint,
+                lambda connection: connection.execute(
+                    f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM df_source'
+                ),
+            )
+        finally:
+            self.connection.unregister("df_source")
+
+    def _replace_from_sql(
+        self, table_name: str, source_fingerprint: str, sql: str
+    ) -> None:
+        """
+        Replaces a table with the results of a query (a materialized view).
+        """
+
+        self._replace_table(
+            table_name,
+            source_fingerprint,
+            lambda connection: connection.execute(
+                f'CREATE OR REPLACE TABLE "{table_name}" AS {sql}'
+            ),
+        )
+
+    def build(
+        self,
+        monday_zip_path: Union[str, pathlib.Path] = DEFAULT_MONDAY_ZIP_PATH,
+        toggl_export_dir: Union[str, pathlib.Path] = DEFAULT_TOGGL_EXPORT_DIR,
+        toggl_summary_path: Union[str, pathlib.Path] = DEFAULT_TOGGL_SUMMARY_PATH,
+        toggl_entries_path: Union[str, pathlib.Path] = DEFAULT_TOGGL_ENTRIES_PATH,
+        landscape_records_path: Union[
+            str, pathlib.Path
+        ] = DEFAULT_LANDSCAPE_RECORDS_PATH,
+        event_store_path: Union[str, pathlib.Path] = DEFAULT_EVENT_STORE_PATH,
+        categories_path: Union[str, pathlib.Path] = DEFAULT_TASK_CATEGORIES_PATH,
+        force: bool = False,
+    ) -> List[str]:
+        """
+        Builds every table whose sources changed since the last build (or
+        every table where force), returning the names of the tables built.
+        Tables whose sources do not exist are skipped and kept as built.
+        """
+
+        built: List[str] = []
+
+        def stale(table_names: List[str], source_fingerprint: Optional[str]) -> bool:
+            if source_fingerprint is None:
+                # (reported at the caller of build)
+                warnings.warn(
+                    f"Skipping warehouse tables without sources: {table_names}",
+                    stacklevel=3,
+                )
+                return False
+            return force or any(
+                self._fingerprint(table_name) != source_fingerprint
+                for table_name in table_names
+            )
+
+        # monday.com boards (read through the board parquet cache)
+        monday_fingerprint = fingerprint(monday_zip_path)
+        if stale(list(MONDAY_BOARDS), monday_fingerprint):
+            boards = load_boards(monday_zip_path, boards=list(MONDAY_BOARDS.values()))
+            for table_name, board in MONDAY_BOARDS.items():
+                self._replace_from_df(table_name, monday_fingerprint, boards[board])
+                built.append(table_name)
+
+        # toggl.com summary exports (deduplicated by the summary store)
+        toggl_exports = sorted(pathlib.Path(toggl_export_dir).glob(TOGGL_EXPORT_GLOB))
+        toggl_fingerprint = fingerprint(*toggl_exports) if toggl_exports else None
+        if stale(["toggl_summary"], toggl_fingerprint):
+            summary_store = TogglSummaryStore(path=toggl_summary_path)
+            summary_store.ingest(toggl_exports)
+            self._replace_from_df(
+                "toggl_summary",
+                toggl_fingerprint,
+                summary_store.query("SELECT * FROM toggl_summary"),
+            )
+            built.append("toggl_summary")
+
+        # toggl.com time entries (partitioned by day)
+        entries_files = sorted(
+            pathlib.Path(toggl_entries_path).glob("date=*/entries.parquet")
+        )
+        entries_fingerprint = fingerprint(*entries_files) if entries_files else None
+        if stale(["toggl_entries"], entries_fingerprint):
+            self._replace_from_sql(
+                "toggl_entries",
+                entries_fingerprint,
+                "SELECT * FROM read_parquet('{}', hive_partitioning=1)".format(
+                    pathlib.Path(toggl_entries_path) / "date=*/entries.parquet"
+                ),
+            )
+            built.append("toggl_entries")
+
+        # github landscape repositories and sbom packages
+        landscape_fingerprint = fingerprint(landscape_records_path)
+        if stale(["github_repos", "sbom_packages"], landscape_fingerprint):
+            landscape, _ = build_landscape_array(
+                read_landscape_table(path=landscape_records_path)
+            )
+            self._replace_from_df(
+                "github_repos", landscape_fingerprint, landscape_dataframe(landscape)
+            )
+            self._replace_from_df(
+                "sbom_packages",
+                landscape_fingerprint,
+                sbom_dependency_table(landscape).drop(columns="repo_index"),
+            )
+            built += ["github_repos", "sbom_packages"]
+
+        # github contribution events (copied from the event store)
+        events_fingerprint = fingerprint(event_store_path)
+        if stale(["github_items", "github_reviews"], events_fingerprint):
+            self.connection.execute(
+                "ATTACH '{}' AS event_store (READ_ONLY)".format(
+                    str(event_store_path).replace("'", "''")
+                )
+            )
+            try:
+                for table_name in ["github_items", "github_reviews"]:
+                    self._replace_from_sql(
+                        table_name,
+                        events_fingerprint,
+                        f"SELECT * FROM event_store.{table_name}",
+                    )
+                    built.append(table_name)
+            finally:
+                self.connection.execute("DETACH event_store")
+
+        # materialized tables, rebuilt where any of their sources changed
+        acct_project_tasks_fingerprint = self._fingerprint("monday_tasks")
+        if acct_project_tasks_fingerprint is not None and stale(
+            ["monday_acct_project_tasks"], acct_project_tasks_fingerprint
+        ):
+            task_columns = [
+                column
+                for (column,) in self.connection.execute(
+                    "SELECT column_name FROM information_schema.columns"
+                    " WHERE table_name = 'monday_tasks' ORDER BY ordinal_position"
+                ).fetchall()
+            ]
+            self._replace_from_sql(
+                "monday_acct_project_tasks",
+                acct_project_tasks_fingerprint,
+                MONDAY_ACCT_PROJECT_TASKS_SQL.format(
+                    task_columns=", ".join(
+                        '"{0}" AS "Task_{0}"'.format(column.replace('"', '""'))
+                        for column in task_columns
+                    )
+                ),
+            )
+            built.append("monday_acct_project_tasks")
+
+        effort_sources = [
+            self._fingerprint("monday_acct_project_tasks"),
+            self._fingerprint("toggl_summary"),
+            fingerprint(categories_path),
+        ]
+        effort_fingerprint = (
+            hashlib.sha256("".join(effort_sources).encode()).hexdigest()
+            if None not in effort_sources
+            else None
+        )
+        if stale(["effort_tasks"], effort_fingerprint):
+            self._replace_from_df(
+                "effort_tasks",
+                effort_fingerprint,
+                effort_tasks(
+                    self.query(EFFORT_TASKS_SQL),
+                    TaskCategorizer.from_file(path=categories_path),
+                ),
+            )
+            built.append("effort_tasks")
+
+        return built
+
+
+def effort_tasks(df_tasks: pd.DataFrame, categorizer: TaskCategorizer) -> pd.DataFrame:
+    """
+    Completes the combined monday.com and toggl.com tasks with their
+    duration in minutes and category, dropping tasks without a client,
+    name or duration.
+    """
+
+    df_tasks = df_tasks.dropna(subset=["Client", "Task_Name", "Duration"]).reset_index(
+        drop=True
+    )
+    df_tasks["Duration_Minutes"] = (
+        pd.to_timedelta(df_tasks["Duration"], errors="coerce")
+        .dt.total_seconds()
+        .div(60)
+        .astype("Int64")
+    )
+    df_tasks["Category"] = categorizer.categorize(
+        clients=df_tasks["Client"], names=df_tasks["Task_Name"]
+    )
+
+    return df_tasks
+
+
+def open_warehouse(
+    path: Union[str, pathlib.Path] = DEFAULT_WAREHOUSE_PATH,
+) -> duckdb.DuckDBPyConnection:
+    """
+    Opens the warehouse read-only for querying (for example, from
+    notebooks) with DuckDB.
+    """
+
+    return EffortWarehouse(path=path, read_only=True).connection
+
+
+def main(argv: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Command line entry point for building the warehouse.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Build the set effort analysis DuckDB warehouse."
+    )
+    parser.add_argument(
+        "--path", default=DEFAULT_WAREHOUSE_PATH, help="Warehouse database file."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every table, including those whose sources are unchanged.",
+    )
+    args = parser.parse_args(argv)
+
+    warehouse = EffortWarehouse(path=args.path)
+    built = warehouse.build(force=args.force)
+    print(f"Built warehouse tables: {built or 'none'}")
+
+    df_tables = warehouse.tables()
+    print(df_tables.to_string(index=False))
+
+    return df_tables
+
+
+if __name__ == "__main__":
+    main()